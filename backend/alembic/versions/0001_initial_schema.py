@@ -0,0 +1,201 @@
+"""Initial schema
+
+Matches the tables created by create_tables() before migrations were
+introduced; databases created that way are adopted with `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 06:04:42
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('daily_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('run_date', sa.Date(), nullable=False),
+    sa.Column('universe', sa.String(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='dailyrunstatus'), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('run_date', 'universe')
+    )
+    op.create_index('ix_daily_runs_id', 'daily_runs', ['id'], unique=False)
+
+    op.create_table('stocks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('exchange', sa.String(), nullable=True),
+    sa.Column('currency', sa.String(), nullable=True),
+    sa.Column('sector', sa.String(), nullable=True),
+    sa.Column('industry', sa.String(), nullable=True),
+    sa.Column('is_tracked', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stocks_id', 'stocks', ['id'], unique=False)
+    op.create_index('ix_stocks_symbol', 'stocks', ['symbol'], unique=True)
+
+    op.create_table('user_config',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('top_n', sa.Integer(), nullable=True),
+    sa.Column('universe', sa.String(), nullable=True),
+    sa.Column('custom_tickers', sa.JSON(), nullable=True),
+    sa.Column('daily_run_time_local', sa.String(), nullable=True),
+    sa.Column('time_zone', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table('user_secrets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('openai_api_key_encrypted', sa.Text(), nullable=True),
+    sa.Column('market_data_api_key_encrypted', sa.Text(), nullable=True),
+    sa.Column('news_api_key_encrypted', sa.Text(), nullable=True),
+    sa.Column('options_api_key_encrypted', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table('analysis_reports',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('source_run_id', sa.Integer(), nullable=True),
+    sa.Column('analysis_type', sa.Enum('DAILY_AUTO', 'ON_DEMAND', name='analysistype'), nullable=False),
+    sa.Column('llm_model', sa.String(), nullable=True),
+    sa.Column('raw_prompt', sa.Text(), nullable=True),
+    sa.Column('raw_response', sa.Text(), nullable=True),
+    sa.Column('summary_markdown', sa.Text(), nullable=False),
+    sa.Column('entry_rating', sa.Enum('STRONG_BUY', 'BUY', 'HOLD', 'AVOID', name='entryrating'), nullable=True),
+    sa.Column('entry_comment', sa.Text(), nullable=True),
+    sa.Column('covered_call_rating', sa.Enum('ATTRACTIVE', 'NEUTRAL', 'UNATTRACTIVE', name='strategyrating'), nullable=True),
+    sa.Column('covered_call_comment', sa.Text(), nullable=True),
+    sa.Column('secured_put_rating', sa.Enum('ATTRACTIVE', 'NEUTRAL', 'UNATTRACTIVE', name='strategyrating'), nullable=True),
+    sa.Column('secured_put_comment', sa.Text(), nullable=True),
+    sa.Column('risk_flags', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['source_run_id'], ['daily_runs.id'], ),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_analysis_reports_id', 'analysis_reports', ['id'], unique=False)
+
+    op.create_table('earnings_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('source_run_id', sa.Integer(), nullable=True),
+    sa.Column('event_type', sa.Enum('UPCOMING', 'HISTORICAL', name='eventtype'), nullable=False),
+    sa.Column('fiscal_period', sa.String(), nullable=True),
+    sa.Column('event_date', sa.Date(), nullable=False),
+    sa.Column('eps_actual', sa.Numeric(), nullable=True),
+    sa.Column('eps_estimate', sa.Numeric(), nullable=True),
+    sa.Column('surprise_percent', sa.Numeric(), nullable=True),
+    sa.ForeignKeyConstraint(['source_run_id'], ['daily_runs.id'], ),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_earnings_events_id', 'earnings_events', ['id'], unique=False)
+
+    op.create_table('filings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('source_run_id', sa.Integer(), nullable=True),
+    sa.Column('filing_type', sa.String(), nullable=False),
+    sa.Column('period_end', sa.Date(), nullable=True),
+    sa.Column('file_url', sa.String(), nullable=False),
+    sa.Column('file_date', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['source_run_id'], ['daily_runs.id'], ),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_filings_id', 'filings', ['id'], unique=False)
+
+    op.create_table('news_articles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('source_run_id', sa.Integer(), nullable=True),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('url', sa.String(), nullable=False),
+    sa.Column('published_at', sa.DateTime(), nullable=False),
+    sa.Column('source', sa.String(), nullable=True),
+    sa.Column('summary_raw', sa.Text(), nullable=True),
+    sa.Column('is_issue_flag', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['source_run_id'], ['daily_runs.id'], ),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_news_articles_id', 'news_articles', ['id'], unique=False)
+
+    op.create_table('options_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('source_run_id', sa.Integer(), nullable=True),
+    sa.Column('underlying_price', sa.Numeric(), nullable=False),
+    sa.Column('days_to_expiry', sa.Integer(), nullable=False),
+    sa.Column('call_strike', sa.Numeric(), nullable=True),
+    sa.Column('put_strike', sa.Numeric(), nullable=True),
+    sa.Column('call_bid', sa.Numeric(), nullable=True),
+    sa.Column('put_bid', sa.Numeric(), nullable=True),
+    sa.Column('implied_vol', sa.Numeric(), nullable=True),
+    sa.Column('delta_call', sa.Numeric(), nullable=True),
+    sa.Column('delta_put', sa.Numeric(), nullable=True),
+    sa.ForeignKeyConstraint(['source_run_id'], ['daily_runs.id'], ),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_options_snapshots_id', 'options_snapshots', ['id'], unique=False)
+
+    op.create_table('stock_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('daily_run_id', sa.Integer(), nullable=False),
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('sequence', sa.Integer(), nullable=False),
+    sa.Column('market_cap', sa.Numeric(), nullable=False),
+    sa.Column('price', sa.Numeric(), nullable=False),
+    sa.Column('open_price', sa.Numeric(), nullable=True),
+    sa.Column('day_high', sa.Numeric(), nullable=True),
+    sa.Column('day_low', sa.Numeric(), nullable=True),
+    sa.Column('volume', sa.Integer(), nullable=True),
+    sa.Column('high_52w', sa.Numeric(), nullable=True),
+    sa.Column('low_52w', sa.Numeric(), nullable=True),
+    sa.Column('pe_ratio', sa.Numeric(), nullable=True),
+    sa.Column('dividend_yield', sa.Numeric(), nullable=True),
+    sa.Column('beta', sa.Numeric(), nullable=True),
+    sa.Column('as_of', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['daily_run_id'], ['daily_runs.id'], ),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_snapshots_id', 'stock_snapshots', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_stock_snapshots_id', table_name='stock_snapshots')
+    op.drop_table('stock_snapshots')
+    op.drop_index('ix_options_snapshots_id', table_name='options_snapshots')
+    op.drop_table('options_snapshots')
+    op.drop_index('ix_news_articles_id', table_name='news_articles')
+    op.drop_table('news_articles')
+    op.drop_index('ix_filings_id', table_name='filings')
+    op.drop_table('filings')
+    op.drop_index('ix_earnings_events_id', table_name='earnings_events')
+    op.drop_table('earnings_events')
+    op.drop_index('ix_analysis_reports_id', table_name='analysis_reports')
+    op.drop_table('analysis_reports')
+    op.drop_table('user_secrets')
+    op.drop_table('user_config')
+    op.drop_index('ix_stocks_symbol', table_name='stocks')
+    op.drop_index('ix_stocks_id', table_name='stocks')
+    op.drop_table('stocks')
+    op.drop_index('ix_daily_runs_id', table_name='daily_runs')
+    op.drop_table('daily_runs')
+    
+    # PostgreSQL keeps enum types after their tables are dropped
+    bind = op.get_bind()
+    for name in ('dailyrunstatus', 'analysistype', 'entryrating', 'strategyrating', 'eventtype'):
+        sa.Enum(name=name).drop(bind, checkfirst=True)
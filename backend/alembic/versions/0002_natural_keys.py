@@ -0,0 +1,72 @@
+"""Natural keys for earnings events and news articles, LLM input hash
+
+Backfills news_articles.url_hash and removes duplicate rows (keeping the
+newest per key, as app.jobs.compaction does) before the unique constraints
+are created.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 06:04:43
+"""
+import hashlib
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+earnings_events = sa.table(
+    'earnings_events',
+    sa.column('id', sa.Integer), sa.column('stock_id', sa.Integer),
+    sa.column('event_date', sa.Date), sa.column('event_type', sa.String),
+)
+news_articles = sa.table(
+    'news_articles',
+    sa.column('id', sa.Integer), sa.column('stock_id', sa.Integer),
+    sa.column('url', sa.String), sa.column('url_hash', sa.String),
+)
+
+def _delete_duplicates(table, key_columns):
+    # Keep the newest row (highest id) of each natural key
+    keep = sa.select(sa.func.max(table.c.id)).group_by(*key_columns).subquery()
+    op.execute(table.delete().where(table.c.id.not_in(sa.select(keep.c[0]))))
+
+def upgrade():
+    with op.batch_alter_table('analysis_reports', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('input_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_analysis_reports_input_hash', ['input_hash'], unique=False)
+
+    _delete_duplicates(earnings_events, [earnings_events.c.stock_id, earnings_events.c.event_date,
+                                         earnings_events.c.event_type])
+    with op.batch_alter_table('earnings_events', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_earnings_events_natural_key', ['stock_id', 'event_date', 'event_type'])
+
+    # Hash first and dedup on the constrained key, so URLs differing only in
+    # surrounding whitespace count as one. Hashed in Python on every dialect:
+    # the same normalisation as app.utils.hashing.url_hash
+    op.add_column('news_articles', sa.Column('url_hash', sa.String(length=64), nullable=True))
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(news_articles.c.id, news_articles.c.url)).all()
+    if rows:
+        bind.execute(
+            news_articles.update().where(news_articles.c.id == sa.bindparam('row_id')),
+            [{'row_id': row.id, 'url_hash': hashlib.sha256(row.url.strip().encode()).hexdigest()} for row in rows]
+        )
+    _delete_duplicates(news_articles, [news_articles.c.stock_id, news_articles.c.url_hash])
+    with op.batch_alter_table('news_articles', schema=None) as batch_op:
+        batch_op.alter_column('url_hash', existing_type=sa.String(length=64), nullable=False)
+        batch_op.create_unique_constraint('uq_news_articles_url', ['stock_id', 'url_hash'])
+
+def downgrade():
+    with op.batch_alter_table('news_articles', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_news_articles_url', type_='unique')
+        batch_op.drop_column('url_hash')
+
+    with op.batch_alter_table('earnings_events', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_earnings_events_natural_key', type_='unique')
+
+    with op.batch_alter_table('analysis_reports', schema=None) as batch_op:
+        batch_op.drop_index('ix_analysis_reports_input_hash')
+        batch_op.drop_column('input_hash')
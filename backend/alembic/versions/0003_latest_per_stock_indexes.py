@@ -0,0 +1,42 @@
+"""Composite indexes for "latest rows per stock" and per-run lookups
+
+The stock detail and latest-analysis endpoints filter by stock_id and
+order by a time column; with these indexes each query reads only the
+rows it returns instead of sorting every row of the stock. On PostgreSQL
+the indexes are built CONCURRENTLY so large tables stay writable.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 06:05:02
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_analysis_reports_stock_id_created_at', 'analysis_reports', ['stock_id', 'created_at']),
+    ('ix_analysis_reports_source_run_id', 'analysis_reports', ['source_run_id']),
+    ('ix_news_articles_stock_id_published_at', 'news_articles', ['stock_id', 'published_at']),
+    ('ix_news_articles_source_run_id', 'news_articles', ['source_run_id']),
+    ('ix_filings_stock_id_file_date', 'filings', ['stock_id', 'file_date']),
+    ('ix_filings_source_run_id', 'filings', ['source_run_id']),
+    ('ix_options_snapshots_stock_id_id', 'options_snapshots', ['stock_id', 'id']),
+    ('ix_options_snapshots_source_run_id', 'options_snapshots', ['source_run_id']),
+    ('ix_earnings_events_source_run_id', 'earnings_events', ['source_run_id']),
+    ('ix_stock_snapshots_daily_run_id', 'stock_snapshots', ['daily_run_id']),
+]
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
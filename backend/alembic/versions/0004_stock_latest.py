@@ -0,0 +1,39 @@
+"""stock_latest: newest report, options snapshot and news per stock
+
+Rows are built by app.services.stock_latest when a run completes, or on the
+first detail request for a stock, so the table starts empty.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 06:08:57
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('stock_latest',
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('report_id', sa.Integer(), nullable=True),
+    sa.Column('options_snapshot_id', sa.Integer(), nullable=True),
+    sa.Column('news_ids', sa.JSON(), nullable=True),
+    sa.Column('filing_ids', sa.JSON(), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('source_run_id', sa.Integer(), nullable=True),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['options_snapshot_id'], ['options_snapshots.id'], ),
+    sa.ForeignKeyConstraint(['report_id'], ['analysis_reports.id'], ),
+    sa.ForeignKeyConstraint(['source_run_id'], ['daily_runs.id'], ),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('stock_id')
+    )
+    op.create_index('ix_stock_latest_symbol', 'stock_latest', ['symbol'], unique=True)
+
+def downgrade():
+    op.drop_index('ix_stock_latest_symbol', table_name='stock_latest')
+    op.drop_table('stock_latest')
@@ -0,0 +1,52 @@
+"""Current ratings on stocks for filtered, keyset-paginated listings
+
+The rating columns are backfilled from each stock's newest analysis report
+(served by ix_analysis_reports_stock_id_created_at from 0003).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 06:21:40
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_stocks_tracked_sector_id', ['is_tracked', 'sector', 'id']),
+    ('ix_stocks_tracked_entry_rating_id', ['is_tracked', 'latest_entry_rating', 'id']),
+    ('ix_stocks_tracked_covered_call_rating_id', ['is_tracked', 'latest_covered_call_rating', 'id']),
+    ('ix_stocks_tracked_secured_put_rating_id', ['is_tracked', 'latest_secured_put_rating', 'id']),
+]
+
+def upgrade():
+    # The enum types already exist (created with analysis_reports)
+    op.add_column('stocks', sa.Column('latest_entry_rating', sa.Enum('STRONG_BUY', 'BUY', 'HOLD', 'AVOID', name='entryrating'), nullable=True))
+    op.add_column('stocks', sa.Column('latest_covered_call_rating', sa.Enum('ATTRACTIVE', 'NEUTRAL', 'UNATTRACTIVE', name='strategyrating'), nullable=True))
+    op.add_column('stocks', sa.Column('latest_secured_put_rating', sa.Enum('ATTRACTIVE', 'NEUTRAL', 'UNATTRACTIVE', name='strategyrating'), nullable=True))
+    op.add_column('stocks', sa.Column('latest_report_at', sa.DateTime(), nullable=True))
+
+    newest = "(SELECT {column} FROM analysis_reports WHERE analysis_reports.stock_id = stocks.id " \
+             "ORDER BY analysis_reports.created_at DESC LIMIT 1)"
+    op.execute(
+        "UPDATE stocks SET "
+        f"latest_entry_rating = {newest.format(column='entry_rating')}, "
+        f"latest_covered_call_rating = {newest.format(column='covered_call_rating')}, "
+        f"latest_secured_put_rating = {newest.format(column='secured_put_rating')}, "
+        f"latest_report_at = {newest.format(column='created_at')}"
+    )
+
+    for name, columns in INDEXES:
+        op.create_index(name, 'stocks', columns, unique=False)
+
+def downgrade():
+    for name, columns in reversed(INDEXES):
+        op.drop_index(name, table_name='stocks')
+    with op.batch_alter_table('stocks', schema=None) as batch_op:
+        batch_op.drop_column('latest_report_at')
+        batch_op.drop_column('latest_secured_put_rating')
+        batch_op.drop_column('latest_covered_call_rating')
+        batch_op.drop_column('latest_entry_rating')
@@ -0,0 +1,42 @@
+"""analysis_jobs: durable queue of daily and on-demand analyses
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 06:41:12
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('analysis_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_type', sa.Enum('DAILY_RUN', 'ON_DEMAND', name='jobtype'), nullable=False),
+    sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'COMPLETED', 'FAILED', name='jobstatus'), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('daily_run_id', sa.Integer(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('locked_by', sa.String(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['daily_run_id'], ['daily_runs.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_analysis_jobs_id', 'analysis_jobs', ['id'], unique=False)
+    op.create_index('ix_analysis_jobs_status_run_after_id', 'analysis_jobs', ['status', 'run_after', 'id'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_analysis_jobs_status_run_after_id', table_name='analysis_jobs')
+    op.drop_index('ix_analysis_jobs_id', table_name='analysis_jobs')
+    op.drop_table('analysis_jobs')
+    bind = op.get_bind()
+    for name in ('jobstatus', 'jobtype'):
+        sa.Enum(name=name).drop(bind, checkfirst=True)
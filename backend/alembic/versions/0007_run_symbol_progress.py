@@ -0,0 +1,40 @@
+"""run_symbol_progress: per-symbol checkpoints of daily runs
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 07:02:35
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('run_symbol_progress',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('daily_run_id', sa.Integer(), nullable=False),
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'DONE', 'FAILED', name='symbolstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('duration_ms', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['daily_run_id'], ['daily_runs.id'], ),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('daily_run_id', 'symbol', name='uq_run_symbol_progress_run_symbol')
+    )
+    op.create_index('ix_run_symbol_progress_id', 'run_symbol_progress', ['id'], unique=False)
+    op.create_index('ix_run_symbol_progress_run_status', 'run_symbol_progress', ['daily_run_id', 'status'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_run_symbol_progress_run_status', table_name='run_symbol_progress')
+    op.drop_index('ix_run_symbol_progress_id', table_name='run_symbol_progress')
+    op.drop_table('run_symbol_progress')
+    sa.Enum(name='symbolstatus').drop(op.get_bind(), checkfirst=True)
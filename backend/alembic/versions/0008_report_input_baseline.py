@@ -0,0 +1,28 @@
+"""Input baseline and carry-forward link on analysis reports
+
+Existing reports get no baseline, so their stocks are analyzed again on the
+next run before delta detection can skip them.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 07:24:18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('analysis_reports') as batch_op:
+        batch_op.add_column(sa.Column('input_baseline', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('carried_from_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_analysis_reports_carried_from_id', 'analysis_reports', ['carried_from_id'], ['id'])
+
+def downgrade():
+    with op.batch_alter_table('analysis_reports') as batch_op:
+        batch_op.drop_constraint('fk_analysis_reports_carried_from_id', type_='foreignkey')
+        batch_op.drop_column('carried_from_id')
+        batch_op.drop_column('input_baseline')
@@ -1,57 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict
-from app.database import get_db
-from app.models import Stock, AnalysisReport, AnalysisType
+from app.database import get_async_db
+from app.jobs.queue import enqueue
+from app.models import Stock, AnalysisReport, JobType
 from app.schemas.analysis_schemas import AnalysisRequest, AnalysisResponse
-from app.services.analysis_service import AnalysisService
+from app.services.stock_latest import serialize_row
 
 router = APIRouter()
 
 @router.post("/analyze_stock", response_model=AnalysisResponse)
 async def analyze_stock(
     request: AnalysisRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Trigger on-demand analysis for a specific stock"""
     symbol = request.symbol.upper()
     
     # Check if stock exists
-    stock = db.query(Stock).filter(Stock.symbol == symbol).first()
+    stock = await db.scalar(select(Stock).where(Stock.symbol == symbol))
     if not stock:
         # Create new stock entry
         stock = Stock(symbol=symbol, name=symbol, is_tracked=False)
         db.add(stock)
-        db.commit()
-        db.refresh(stock)
+        await db.flush()
     
-    # Start analysis in background
-    analysis_service = AnalysisService(db)
-    background_tasks.add_task(
-        analysis_service.run_on_demand_analysis,
-        stock.id,
-        symbol
-    )
+    # Queue the analysis for a worker
+    enqueue(db, JobType.ON_DEMAND, {'stock_id': stock.id, 'symbol': symbol})
+    await db.commit()
     
-    return {"message": f"Analysis started for {symbol}", "symbol": symbol}
+    return {"message": f"Analysis queued for {symbol}", "symbol": symbol}
 
 @router.get("/latest_analysis/{symbol}", response_model=AnalysisResponse)
-async def get_latest_analysis(symbol: str, db: Session = Depends(get_db)):
+async def get_latest_analysis(symbol: str, db: AsyncSession = Depends(get_async_db)):
     """Get the latest analysis for a stock"""
-    stock = db.query(Stock).filter(Stock.symbol == symbol.upper()).first()
+    stock = await db.scalar(select(Stock).where(Stock.symbol == symbol.upper()))
     if not stock:
         raise HTTPException(status_code=404, detail="Stock not found")
     
-    latest_analysis = db.query(AnalysisReport).filter(
+    latest_analysis = await db.scalar(select(AnalysisReport).where(
         AnalysisReport.stock_id == stock.id
-    ).order_by(AnalysisReport.created_at.desc()).first()
+    ).order_by(AnalysisReport.created_at.desc()).limit(1))
     
     if not latest_analysis:
         raise HTTPException(status_code=404, detail="No analysis found for this stock")
     
     return {
         "symbol": symbol,
-        "analysis": latest_analysis,
+        "analysis": serialize_row(latest_analysis),
         "message": "Analysis retrieved successfully"
     }
\ No newline at end of file
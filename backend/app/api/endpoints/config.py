@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, List
-from app.database import get_db
+from app.database import get_async_db
+from app.jobs.scheduler import parse_schedule
 from app.models import UserConfig, UserSecrets
 from app.schemas.config_schemas import ConfigResponse, ConfigUpdate, SecretsResponse, SecretsUpdate
 from app.utils.encryption import encrypt_key, decrypt_key, mask_key
@@ -10,25 +12,25 @@ import os
 router = APIRouter()
 
 @router.get("/config", response_model=ConfigResponse)
-async def get_config(db: Session = Depends(get_db)):
+async def get_config(db: AsyncSession = Depends(get_async_db)):
     """Get current configuration"""
-    config = db.query(UserConfig).first()
+    config = await db.scalar(select(UserConfig).limit(1))
     if not config:
         # Create default config
         config = UserConfig()
         db.add(config)
-        db.commit()
-        db.refresh(config)
+        await db.commit()
+        await db.refresh(config)
     
     return config
 
 @router.post("/config", response_model=ConfigResponse)
 async def update_config(
     config_update: ConfigUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update configuration"""
-    config = db.query(UserConfig).first()
+    config = await db.scalar(select(UserConfig).limit(1))
     if not config:
         config = UserConfig()
         db.add(config)
@@ -40,19 +42,26 @@ async def update_config(
         config.universe = config_update.universe
     if config_update.custom_tickers is not None:
         config.custom_tickers = config_update.custom_tickers
+    # The scheduler reads these; reject values it cannot interpret
+    if config_update.daily_run_time_local is not None or config_update.time_zone is not None:
+        try:
+            parse_schedule(config_update.daily_run_time_local or config.daily_run_time_local or "09:00",
+                           config_update.time_zone or config.time_zone or "America/New_York")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     if config_update.daily_run_time_local is not None:
         config.daily_run_time_local = config_update.daily_run_time_local
     if config_update.time_zone is not None:
         config.time_zone = config_update.time_zone
     
-    db.commit()
-    db.refresh(config)
+    await db.commit()
+    await db.refresh(config)
     return config
 
 @router.get("/secrets", response_model=SecretsResponse)
-async def get_secrets_status(db: Session = Depends(get_db)):
+async def get_secrets_status(db: AsyncSession = Depends(get_async_db)):
     """Get status of API keys (masked)"""
-    secrets = db.query(UserSecrets).first()
+    secrets = await db.scalar(select(UserSecrets).limit(1))
     
     response = {
         "openai_key_set": False,
@@ -72,10 +81,10 @@ async def get_secrets_status(db: Session = Depends(get_db)):
 @router.post("/secrets")
 async def update_secrets(
     secrets_update: SecretsUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update API keys"""
-    secrets = db.query(UserSecrets).first()
+    secrets = await db.scalar(select(UserSecrets).limit(1))
     if not secrets:
         secrets = UserSecrets()
         db.add(secrets)
@@ -93,17 +102,23 @@ async def update_secrets(
     if secrets_update.options_api_key:
         secrets.options_api_key_encrypted = encrypt_key(secrets_update.options_api_key)
     
-    db.commit()
+    await db.commit()
+    
+    # Drop the cached OpenAI key so the next analysis picks up the new one
+    if secrets_update.openai_api_key:
+        from app.services.openai_service import openai_client_registry
+        await openai_client_registry.invalidate()
     
     return {"message": "API keys updated successfully"}
 
 @router.post("/test_openai")
-async def test_openai_connection(db: Session = Depends(get_db)):
+async def test_openai_connection(db: AsyncSession = Depends(get_async_db)):
     """Test OpenAI API connection"""
     from app.services.openai_service import OpenAIService
     
     try:
-        openai_service = OpenAIService(db)
+        # Key lookup is synchronous; run it on the session's connection
+        openai_service = await db.run_sync(OpenAIService)
         result = await openai_service.test_connection()
         return {"success": result["success"], "message": result["message"]}
     except Exception as e:
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict
+from app.database import get_async_db, pool_stats
+from app.jobs import worker_metrics
+from app.jobs.queue import queue_stats
+from app.services.cache import get_cache
+from app.services.provider_executor import provider_executor
+from app.services.rate_limiter import llm_rate_limiter
+
+router = APIRouter()
+
+# /providers, /cache, /llm and /db describe the API process; the workers'
+# own figures are under /workers
+
+@router.get("/providers")
+async def get_provider_metrics() -> Dict:
+    """Get data provider thread pool queue depth and wait times"""
+    return provider_executor.stats()
+
+@router.get("/cache")
+async def get_cache_metrics() -> Dict:
+    """Get market data cache hit/miss counters per data kind"""
+    return get_cache().stats()
+
+@router.get("/llm")
+async def get_llm_metrics() -> Dict:
+    """Get LLM rate limiter queueing and retry counters"""
+    return llm_rate_limiter.stats()
+
+@router.get("/db")
+async def get_db_metrics() -> Dict:
+    """Get database connection pool occupancy and checkout wait times"""
+    return pool_stats()
+
+@router.get("/jobs")
+async def get_job_metrics(db: AsyncSession = Depends(get_async_db)) -> Dict:
+    """Get analysis job counts per status and the age of the oldest queued job"""
+    return await queue_stats(db)
+
+@router.get("/workers")
+async def get_worker_metrics() -> Dict:
+    """Get the provider, cache, LLM and pool metrics published by each live worker"""
+    return worker_metrics.collect()
@@ -1,26 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.database import get_db
-from app.models import DailyRun, DailyRunStatus
-from app.schemas.run_schemas import DailyRunResponse, DailyRunSummary
-from app.services.analysis_service import AnalysisService
-import datetime
+from app.database import get_async_db
+from app.jobs.queue import enqueue
+from app.jobs.scheduler import SCHEDULED_UNIVERSE, current_run_date
+from app.models import AnalysisJob, DailyRun, DailyRunStatus, JobStatus, JobType, RunSymbolProgress, SymbolStatus
+from app.schemas.run_schemas import DailyRunResponse, DailyRunSummary, SymbolProgressResponse
 
 router = APIRouter()
 
 @router.post("/run_daily", response_model=DailyRunResponse)
-async def trigger_daily_run(
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
+async def trigger_daily_run(db: AsyncSession = Depends(get_async_db)):
     """Trigger a new daily analysis run"""
-    # Check if there's already a running or pending run for today
-    today = datetime.date.today()
-    existing_run = db.query(DailyRun).filter(
+    # Check if there's already a running or pending run for today; "today" is the
+    # scheduler's local day, so manual and scheduled runs share one run_date
+    today = await current_run_date(db)
+    existing_run = await db.scalar(select(DailyRun).where(
         DailyRun.run_date == today,
         DailyRun.status.in_([DailyRunStatus.PENDING, DailyRunStatus.RUNNING])
-    ).first()
+    ).limit(1))
     
     if existing_run:
         raise HTTPException(
@@ -28,38 +27,95 @@ async def trigger_daily_run(
             detail=f"A run for {today} is already {existing_run.status.value}"
         )
     
+    # (run_date, universe) is unique; an unfinished run of today is resumed instead
+    finished_run = await db.scalar(select(DailyRun).where(
+        DailyRun.run_date == today, DailyRun.universe == SCHEDULED_UNIVERSE
+    ))
+    if finished_run:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Run {finished_run.id} for {today} already {finished_run.status.value}; "
+                   f"use POST /api/runs/{finished_run.id}/resume to retry unfinished symbols"
+        )
+    
     # Create new daily run record
     new_run = DailyRun(
         run_date=today,
-        universe="US_LARGE_CAP",
+        universe=SCHEDULED_UNIVERSE,
         status=DailyRunStatus.PENDING
     )
     db.add(new_run)
-    db.commit()
-    db.refresh(new_run)
+    await db.flush()
     
-    # Start the analysis in background
-    analysis_service = AnalysisService(db)
-    background_tasks.add_task(analysis_service.run_daily_analysis, new_run.id)
+    # Queue the analysis for a worker; the run and its job are committed together
+    enqueue(db, JobType.DAILY_RUN, daily_run_id=new_run.id)
+    await db.commit()
+    await db.refresh(new_run)
     
     return new_run
 
 @router.get("/latest", response_model=DailyRunSummary)
-async def get_latest_run(db: Session = Depends(get_db)):
+async def get_latest_run(db: AsyncSession = Depends(get_async_db)):
     """Get the latest completed daily run"""
-    latest_run = db.query(DailyRun).filter(
+    latest_run = await db.scalar(select(DailyRun).where(
         DailyRun.status == DailyRunStatus.COMPLETED
-    ).order_by(DailyRun.run_date.desc()).first()
+    ).order_by(DailyRun.run_date.desc()).limit(1))
     
     if not latest_run:
         raise HTTPException(status_code=404, detail="No completed runs found")
     
     return latest_run
 
+@router.post("/{run_id}/resume", response_model=DailyRunResponse)
+async def resume_run(run_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Queue a run again to process only its unfinished symbols"""
+    run = await db.get(DailyRun, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if run.universe == "ON_DEMAND":
+        raise HTTPException(status_code=400, detail="On-demand analyses are not resumable")
+    
+    active_job = await db.scalar(select(AnalysisJob.id).where(
+        AnalysisJob.daily_run_id == run_id,
+        AnalysisJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+    ).limit(1))
+    if active_job:
+        raise HTTPException(status_code=400, detail=f"Run {run_id} is already queued or running")
+    
+    unfinished = await db.scalar(select(func.count()).select_from(RunSymbolProgress).where(
+        RunSymbolProgress.daily_run_id == run_id,
+        RunSymbolProgress.status != SymbolStatus.DONE
+    ))
+    planned = await db.scalar(select(func.count()).select_from(RunSymbolProgress).where(
+        RunSymbolProgress.daily_run_id == run_id
+    ))
+    # A run that died before recording its symbols starts over
+    if planned and not unfinished:
+        raise HTTPException(status_code=400, detail=f"Run {run_id} has no unfinished symbols")
+    
+    run.status = DailyRunStatus.PENDING
+    run.completed_at = None
+    enqueue(db, JobType.DAILY_RUN, daily_run_id=run.id)
+    await db.commit()
+    await db.refresh(run)
+    return run
+
+@router.get("/{run_id}/progress", response_model=List[SymbolProgressResponse])
+async def get_run_progress(
+    run_id: int,
+    status: Optional[SymbolStatus] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List per-symbol progress of a run"""
+    query = select(RunSymbolProgress).where(RunSymbolProgress.daily_run_id == run_id)
+    if status:
+        query = query.where(RunSymbolProgress.status == status)
+    return (await db.scalars(query.order_by(RunSymbolProgress.rank))).all()
+
 @router.get("/{run_id}", response_model=DailyRunResponse)
-async def get_run_by_id(run_id: int, db: Session = Depends(get_db)):
+async def get_run_by_id(run_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific daily run by ID"""
-    run = db.query(DailyRun).filter(DailyRun.id == run_id).first()
+    run = await db.get(DailyRun, run_id)
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
     return run
@@ -68,10 +124,10 @@ async def get_run_by_id(run_id: int, db: Session = Depends(get_db)):
 async def list_runs(
     limit: int = 10,
     offset: int = 0,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List recent daily runs"""
-    runs = db.query(DailyRun).order_by(
+    runs = (await db.scalars(select(DailyRun).order_by(
         DailyRun.run_date.desc()
-    ).offset(offset).limit(limit).all()
+    ).offset(offset).limit(limit))).all()
     return runs
\ No newline at end of file
@@ -1,76 +1,105 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.database import get_db
-from app.models import Stock, AnalysisReport, NewsArticle, Filing, OptionsSnapshot
-from app.schemas.stock_schemas import StockDetailResponse, StockSummary
+from app.database import get_async_db
+from app.models import Stock, EntryRating, StrategyRating
+from app.schemas.stock_schemas import OptionChainResponse, StockDetailResponse, StockSummary
+from app.services.stock_latest import get_stock_detail_payload
 
 router = APIRouter()
 
+# Upper bound on page size for list_stocks
+MAX_PAGE_SIZE = 200
+
 @router.get("/", response_model=List[StockSummary])
 async def list_stocks(
-    limit: int = 50,
-    offset: int = 0,
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = None,
     sector: Optional[str] = None,
-    entry_rating: Optional[str] = None,
-    db: Session = Depends(get_db)
+    entry_rating: Optional[EntryRating] = None,
+    covered_call_rating: Optional[StrategyRating] = None,
+    secured_put_rating: Optional[StrategyRating] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List stocks with optional filtering"""
-    query = db.query(Stock).filter(Stock.is_tracked == True)
+    """List stocks with optional filtering.
+
+    Results are ordered by id and paged with a keyset cursor: pass the id of
+    the last stock received (also returned in the X-Next-Cursor header) as
+    `after` to get the next page. Rating filters match the newest report only.
+    """
+    query = select(Stock).where(Stock.is_tracked == True)
     
     if sector:
-        query = query.filter(Stock.sector == sector)
+        query = query.where(Stock.sector == sector)
     
     if entry_rating:
-        query = query.join(AnalysisReport).filter(
-            AnalysisReport.entry_rating == entry_rating
-        )
+        query = query.where(Stock.latest_entry_rating == entry_rating)
+    
+    if covered_call_rating:
+        query = query.where(Stock.latest_covered_call_rating == covered_call_rating)
+    
+    if secured_put_rating:
+        query = query.where(Stock.latest_secured_put_rating == secured_put_rating)
+    
+    if after is not None:
+        query = query.where(Stock.id > after)
     
-    stocks = query.offset(offset).limit(limit).all()
+    stocks = (await db.scalars(query.order_by(Stock.id).limit(limit))).all()
+    if len(stocks) == limit:
+        response.headers["X-Next-Cursor"] = str(stocks[-1].id)
     return stocks
 
+@router.get("/sectors", response_model=List[str])
+async def get_sectors(db: AsyncSession = Depends(get_async_db)):
+    """Get list of all sectors"""
+    sectors = await db.scalars(select(Stock.sector).distinct().where(
+        Stock.sector.isnot(None)
+    ))
+    return [sector for sector in sectors if sector]
+
 @router.get("/{symbol}", response_model=StockDetailResponse)
-async def get_stock_detail(symbol: str, db: Session = Depends(get_db)):
+async def get_stock_detail(symbol: str, db: AsyncSession = Depends(get_async_db)):
     """Get detailed information for a specific stock"""
-    stock = db.query(Stock).filter(
-        Stock.symbol == symbol.upper()
-    ).first()
+    # Served from the stock_latest view refreshed at the end of each run
+    detail = await db.run_sync(get_stock_detail_payload, symbol.upper())
     
-    if not stock:
+    if not detail:
         raise HTTPException(status_code=404, detail="Stock not found")
     
-    # Get latest analysis
-    latest_analysis = db.query(AnalysisReport).filter(
-        AnalysisReport.stock_id == stock.id
-    ).order_by(AnalysisReport.created_at.desc()).first()
-    
-    # Get recent news
-    recent_news = db.query(NewsArticle).filter(
-        NewsArticle.stock_id == stock.id
-    ).order_by(NewsArticle.published_at.desc()).limit(10).all()
+    return detail
+
+@router.get("/{symbol}/options", response_model=OptionChainResponse)
+async def get_option_chain(
+    symbol: str,
+    min_dte: Optional[int] = Query(None, ge=0),
+    max_dte: Optional[int] = Query(None, ge=0)
+):
+    """Get every contract expiring within the DTE window with Greeks and yields.
+
+    Chains are read from the market data cache shared with the analysis
+    pipeline; only expirations that are not cached yet are fetched.
+    """
+    from app.services.market_data import MarketDataService
+    from app.services.options_analytics import OPTIONS_MAX_DTE, OPTIONS_MIN_DTE, contract_records
     
-    # Get latest filings
-    latest_filings = db.query(Filing).filter(
-        Filing.stock_id == stock.id
-    ).order_by(Filing.file_date.desc()).limit(5).all()
+    min_dte = OPTIONS_MIN_DTE if min_dte is None else min_dte
+    max_dte = OPTIONS_MAX_DTE if max_dte is None else max_dte
+    if min_dte > max_dte:
+        raise HTTPException(status_code=400, detail="min_dte must not exceed max_dte")
     
-    # Get latest options snapshot
-    latest_options = db.query(OptionsSnapshot).filter(
-        OptionsSnapshot.stock_id == stock.id
-    ).order_by(OptionsSnapshot.id.desc()).first()
+    symbol = symbol.upper()
+    analyzed_chain = await MarketDataService().get_analyzed_chain(symbol, min_dte, max_dte)
+    if not analyzed_chain:
+        raise HTTPException(status_code=404, detail="No options data available")
     
+    current_price, analyzed = analyzed_chain
+    is_call = (analyzed['option_type'] == 'call').to_numpy()
     return {
-        "stock": stock,
-        "latest_analysis": latest_analysis,
-        "recent_news": recent_news,
-        "latest_filings": latest_filings,
-        "latest_options": latest_options
+        'symbol': symbol,
+        'underlying_price': current_price,
+        'expirations': list(dict.fromkeys(analyzed['expiration_date'])),
+        'calls': contract_records(analyzed[is_call]),
+        'puts': contract_records(analyzed[~is_call]),
     }
-
-@router.get("/sectors", response_model=List[str])
-async def get_sectors(db: Session = Depends(get_db)):
-    """Get list of all sectors"""
-    sectors = db.query(Stock.sector).distinct().filter(
-        Stock.sector.isnot(None)
-    ).all()
-    return [sector[0] for sector in sectors if sector[0]]
\ No newline at end of file
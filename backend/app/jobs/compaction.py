@@ -0,0 +1,60 @@
+"""One-off cleanup of duplicate earnings events and news articles.
+
+Alembic revision 0002 performs the same cleanup before adding the
+natural-key unique constraints; this job is for running it on its own:
+
+    python -m app.jobs.compaction [--dry-run]
+"""
+import sys
+from typing import Dict
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+from app.models import EarningsEvent, NewsArticle
+from app.utils.hashing import url_hash
+
+# Natural keys; the newest row (highest id) of each group is kept
+DUPLICATE_KEYS = {
+    EarningsEvent: (EarningsEvent.stock_id, EarningsEvent.event_date, EarningsEvent.event_type),
+    NewsArticle: (NewsArticle.stock_id, NewsArticle.url_hash),
+}
+
+def _duplicate_ids(db: Session, model, key_columns):
+    keep = select(func.max(model.id)).group_by(*key_columns)
+    # Rows with an incomplete key are nobody's duplicate
+    return select(model.id).where(model.id.not_in(keep), *[column.is_not(None) for column in key_columns])
+
+def compact_duplicates(db: Session, dry_run: bool = False) -> Dict[str, int]:
+    """Delete duplicate rows, keeping the newest of each natural key"""
+    removed = {}
+    # Articles are compared by url_hash, so articles stored without one are hashed first
+    if not dry_run:
+        rows = db.execute(select(NewsArticle.id, NewsArticle.url).where(NewsArticle.url_hash.is_(None))).all()
+        if rows:
+            db.execute(update(NewsArticle), [{'id': row.id, 'url_hash': url_hash(row.url)} for row in rows])
+        removed['news_articles_hashed'] = len(rows)
+
+    for model, key_columns in DUPLICATE_KEYS.items():
+        duplicate_ids = _duplicate_ids(db, model, key_columns)
+        if dry_run:
+            removed[model.__tablename__] = db.scalar(
+                select(func.count()).select_from(duplicate_ids.subquery())
+            )
+        else:
+            result = db.execute(
+                delete(model).where(model.id.in_(duplicate_ids)).execution_options(synchronize_session=False)
+            )
+            removed[model.__tablename__] = result.rowcount
+
+    if not dry_run:
+        db.commit()
+    return removed
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        for table, count in compact_duplicates(db, dry_run="--dry-run" in sys.argv).items():
+            print(f"{table}: {count}")
+    finally:
+        db.close()
@@ -0,0 +1,131 @@
+"""Database-backed queue of analysis jobs.
+
+The API enqueues jobs in the same transaction as the records they refer to;
+worker processes (app.worker) claim them one at a time. A claim selects the
+oldest due job with FOR UPDATE SKIP LOCKED and then flips its status with a
+guarded UPDATE, so concurrent workers never run the same job, including on
+SQLite where row locks are not available.
+"""
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import AnalysisJob, DailyRun, DailyRunStatus, JobStatus, JobType
+
+# Attempts per job before it is marked failed, and the delay before a retry
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY = int(os.getenv("JOB_RETRY_DELAY", "60"))
+
+# A running job whose worker has not sent a heartbeat for this long is requeued
+JOB_HEARTBEAT_TIMEOUT = int(os.getenv("JOB_HEARTBEAT_TIMEOUT", "300"))
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def enqueue(db: AsyncSession, job_type: JobType, payload: Optional[Dict] = None,
+            daily_run_id: Optional[int] = None) -> AnalysisJob:
+    """Add a job to the session; it becomes visible to workers on commit"""
+    job = AnalysisJob(
+        job_type=job_type,
+        status=JobStatus.QUEUED,
+        payload=payload or {},
+        daily_run_id=daily_run_id,
+        max_attempts=JOB_MAX_ATTEMPTS,
+        run_after=datetime.utcnow(),
+    )
+    db.add(job)
+    return job
+
+async def _fail_run(db: AsyncSession, daily_run_id: Optional[int], error: str):
+    """Mark the daily run of a job that will not be retried as failed"""
+    if daily_run_id is None:
+        return
+    await db.execute(update(DailyRun).where(
+        DailyRun.id == daily_run_id,
+        DailyRun.status.in_([DailyRunStatus.PENDING, DailyRunStatus.RUNNING])
+    ).values(status=DailyRunStatus.FAILED, completed_at=datetime.now(), notes=error))
+
+async def requeue_stale(db: AsyncSession) -> int:
+    """Return jobs of crashed or killed workers to the queue"""
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_HEARTBEAT_TIMEOUT)
+    stale = (await db.scalars(select(AnalysisJob).where(
+        AnalysisJob.status == JobStatus.RUNNING, AnalysisJob.heartbeat_at < cutoff
+    ).with_for_update(skip_locked=True))).all()
+    for job in stale:
+        job.locked_by = None
+        if job.attempts < job.max_attempts:
+            job.status = JobStatus.QUEUED
+        else:
+            job.status = JobStatus.FAILED
+            job.finished_at = datetime.utcnow()
+            job.last_error = "worker stopped sending heartbeats"
+            await _fail_run(db, job.daily_run_id, job.last_error)
+    await db.commit()
+    return len(stale)
+
+async def claim(db: AsyncSession, worker: str) -> Optional[AnalysisJob]:
+    """Take the oldest due job, or return None when the queue is empty"""
+    now = datetime.utcnow()
+    job_id = await db.scalar(select(AnalysisJob.id).where(
+        AnalysisJob.status == JobStatus.QUEUED,
+        AnalysisJob.run_after <= now
+    ).order_by(AnalysisJob.run_after, AnalysisJob.id).limit(1).with_for_update(skip_locked=True))
+    if job_id is None:
+        await db.rollback()
+        return None
+
+    claimed = await db.execute(update(AnalysisJob).where(
+        AnalysisJob.id == job_id, AnalysisJob.status == JobStatus.QUEUED
+    ).values(
+        status=JobStatus.RUNNING, locked_by=worker, heartbeat_at=now,
+        attempts=AnalysisJob.attempts + 1
+    ))
+    await db.commit()
+    if claimed.rowcount != 1:
+        # Another worker won the race
+        return None
+    return await db.get(AnalysisJob, job_id, populate_existing=True)
+
+async def heartbeat(db: AsyncSession, job_id: int, worker: str) -> bool:
+    """Refresh a running job's heartbeat; False once the job is no longer ours"""
+    result = await db.execute(update(AnalysisJob).where(
+        AnalysisJob.id == job_id, AnalysisJob.locked_by == worker,
+        AnalysisJob.status == JobStatus.RUNNING
+    ).values(heartbeat_at=datetime.utcnow()))
+    await db.commit()
+    return result.rowcount == 1
+
+async def complete(db: AsyncSession, job_id: int, worker: str):
+    await db.execute(update(AnalysisJob).where(
+        AnalysisJob.id == job_id, AnalysisJob.locked_by == worker
+    ).values(status=JobStatus.COMPLETED, finished_at=datetime.utcnow(), locked_by=None))
+    await db.commit()
+
+async def fail(db: AsyncSession, job: AnalysisJob, worker: str, error: str):
+    """Schedule a retry with linear backoff, or fail the job for good"""
+    values = {'locked_by': None, 'last_error': error[:2000]}
+    if job.attempts < job.max_attempts:
+        values.update(status=JobStatus.QUEUED,
+                      run_after=datetime.utcnow() + timedelta(seconds=JOB_RETRY_DELAY * job.attempts))
+    else:
+        values.update(status=JobStatus.FAILED, finished_at=datetime.utcnow())
+        await _fail_run(db, job.daily_run_id, error)
+    await db.execute(update(AnalysisJob).where(
+        AnalysisJob.id == job.id, AnalysisJob.locked_by == worker
+    ).values(**values))
+    await db.commit()
+
+async def queue_stats(db: AsyncSession) -> Dict:
+    """Job counts per status and the age of the oldest due job"""
+    counts = dict((await db.execute(
+        select(AnalysisJob.status, func.count()).group_by(AnalysisJob.status)
+    )).all())
+    oldest = await db.scalar(select(func.min(AnalysisJob.run_after)).where(
+        AnalysisJob.status == JobStatus.QUEUED, AnalysisJob.run_after <= datetime.utcnow()
+    ))
+    return {
+        **{status.value: counts.get(status, 0) for status in JobStatus},
+        'oldest_queued_age_s': round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0.0,
+    }
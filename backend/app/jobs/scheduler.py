@@ -0,0 +1,86 @@
+"""Starts the daily run at UserConfig.daily_run_time_local in UserConfig.time_zone.
+
+Every worker process checks the schedule while polling. The job is queued
+PREWARM_LEAD_MINUTES ahead of the configured time: the worker that claims
+it prefetches market data into the cache and then waits for the run time
+(see app.worker). The unique (run_date, universe) constraint on daily_runs
+makes sure only one worker creates the day's run.
+"""
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.jobs.queue import enqueue
+from app.models import DailyRun, DailyRunStatus, JobType, UserConfig
+
+# Whether worker processes start the daily run on schedule
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+
+# Minutes before the run time at which caches are pre-warmed; keep it below the
+# options and news cache TTLs so the prefetched data is still fresh at run time
+PREWARM_LEAD_MINUTES = int(os.getenv("PREWARM_LEAD_MINUTES", "5"))
+
+SCHEDULED_UNIVERSE = "US_LARGE_CAP"
+
+def parse_schedule(run_time_local: str, time_zone: str) -> Tuple[time, ZoneInfo]:
+    """Validate an "HH:MM" run time and an IANA time zone name"""
+    try:
+        hours, minutes = (int(part) for part in run_time_local.split(":"))
+        run_time = time(hours, minutes)
+    except ValueError:
+        raise ValueError(f"Invalid daily run time {run_time_local!r}, expected HH:MM")
+    try:
+        return run_time, ZoneInfo(time_zone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone {time_zone!r}")
+
+def scheduled_run(config: UserConfig, now: datetime) -> Tuple[date, datetime]:
+    """Local run date and UTC run time of the scheduled run on now's local day"""
+    run_time, zone = parse_schedule(config.daily_run_time_local or "09:00",
+                                    config.time_zone or "America/New_York")
+    local_day = now.astimezone(zone).date()
+    run_at = datetime.combine(local_day, run_time, tzinfo=zone)
+    return local_day, run_at.astimezone(timezone.utc)
+
+async def _load_config(db: AsyncSession) -> UserConfig:
+    return await db.scalar(select(UserConfig).limit(1)) or UserConfig()
+
+async def current_run_date(db: AsyncSession, now: Optional[datetime] = None) -> date:
+    """Run date of now in the configured time zone, shared by manual and scheduled runs"""
+    config = await _load_config(db)
+    return scheduled_run(config, now or datetime.now(timezone.utc))[0]
+
+async def schedule_due_run(db: AsyncSession, now: Optional[datetime] = None) -> Optional[DailyRun]:
+    """Queue today's run once its pre-warm time has passed; returns the new run.
+
+    A run that is due but missing (e.g. every worker was down at run time)
+    is started on the same local day; earlier days are not backfilled.
+    """
+    now = now or datetime.now(timezone.utc)
+    config = await _load_config(db)
+    run_date, run_at = scheduled_run(config, now)
+    if now < run_at - timedelta(minutes=PREWARM_LEAD_MINUTES):
+        return None
+
+    exists = await db.scalar(select(DailyRun.id).where(
+        DailyRun.run_date == run_date, DailyRun.universe == SCHEDULED_UNIVERSE
+    ))
+    if exists:
+        return None
+
+    try:
+        daily_run = DailyRun(run_date=run_date, universe=SCHEDULED_UNIVERSE, status=DailyRunStatus.PENDING)
+        db.add(daily_run)
+        await db.flush()
+        enqueue(db, JobType.DAILY_RUN, {'scheduled_at': run_at.isoformat(), 'prewarm': True},
+                daily_run_id=daily_run.id)
+        await db.commit()
+    except IntegrityError:
+        # Another worker (or a manual trigger) created it first
+        await db.rollback()
+        return None
+    print(f"Scheduled daily run {daily_run.id} for {run_at.isoformat()}")
+    return daily_run
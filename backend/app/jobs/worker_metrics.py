@@ -0,0 +1,71 @@
+"""Metrics of worker processes, published to Redis for the API to read.
+
+The provider, cache, LLM and pool metrics endpoints describe the process
+that serves them, i.e. the API. Workers, which run the analyses, publish
+the same snapshots under one key each; a key expires when its worker
+stops publishing.
+"""
+import json
+import os
+from datetime import datetime
+from typing import Dict
+from app.services.cache import REDIS_URL
+
+# "redis" publishes worker metrics at REDIS_URL; "none" disables them
+WORKER_METRICS_BACKEND = os.getenv("WORKER_METRICS_BACKEND", "none")
+# Seconds between snapshots; a snapshot expires after three missed ones
+WORKER_METRICS_INTERVAL = float(os.getenv("WORKER_METRICS_INTERVAL", "15"))
+
+KEY_PREFIX = "stockresearch:metrics:worker:"
+
+_client = None
+
+def get_client():
+    """Redis client for worker metrics, or None when they are disabled"""
+    global _client
+    if _client is None and WORKER_METRICS_BACKEND == "redis":
+        import redis
+        _client = redis.Redis.from_url(REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+    return _client
+
+def snapshot() -> Dict:
+    """Metrics of this process, as served by the /api/metrics endpoints"""
+    from app.database import pool_stats
+    from app.services.cache import get_cache
+    from app.services.provider_executor import provider_executor
+    from app.services.rate_limiter import llm_rate_limiter
+
+    return {
+        'updated_at': datetime.utcnow().isoformat(),
+        'providers': provider_executor.stats(),
+        'cache': get_cache().stats(),
+        'llm': llm_rate_limiter.stats(),
+        'db': pool_stats(),
+    }
+
+def publish(worker: str, client=None) -> bool:
+    """Store this worker's snapshot; False when metrics are disabled"""
+    client = client or get_client()
+    if client is None:
+        return False
+    client.set(KEY_PREFIX + worker, json.dumps(snapshot()), ex=max(1, int(WORKER_METRICS_INTERVAL * 3)))
+    return True
+
+def collect(client=None) -> Dict[str, Dict]:
+    """Latest snapshot of every live worker, keyed by worker id"""
+    client = client or get_client()
+    if client is None:
+        return {}
+    keys = sorted(client.scan_iter(match=KEY_PREFIX + "*"))
+    snapshots = {}
+    for key, raw in zip(keys, client.mget(keys) if keys else []):
+        if raw is not None:
+            key = key.decode() if isinstance(key, bytes) else key
+            snapshots[key[len(KEY_PREFIX):]] = json.loads(raw)
+    return snapshots
+
+def clear(worker: str, client=None):
+    """Remove a stopped worker's snapshot"""
+    client = client or get_client()
+    if client is not None:
+        client.delete(KEY_PREFIX + worker)
@@ -1,21 +1,39 @@
-from fastapi import FastAPI, HTTPException, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from app.database import get_db, create_tables
-from app.services.market_data import MarketDataService
-from app.services.news_service import NewsService
-from app.services.openai_service import OpenAIService
-from app.services.analysis_service import AnalysisService
-from app.api.endpoints import stocks, runs, config, analysis
-import uvicorn
-
-# Create database tables on startup
-create_tables()
+from app.database import create_tables, dispose_async_engine
+from app.api.endpoints import stocks, runs, config, analysis, metrics
+from app.services.provider_executor import provider_executor
+import os
+
+# Startup behaviour: heavy work is deferred to first use unless requested here.
+# The schema is managed by Alembic; DB_BOOTSTRAP=true only suits throwaway databases,
+# since create_all never adds columns or constraints to existing tables
+DB_BOOTSTRAP = os.getenv("DB_BOOTSTRAP", "false").lower() == "true"
+EAGER_STARTUP = os.getenv("EAGER_STARTUP", "false").lower() == "true"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create database tables on startup
+    if DB_BOOTSTRAP:
+        create_tables()
+    
+    # Optionally pay the import and key-derivation costs before serving traffic
+    if EAGER_STARTUP:
+        from app.services.analysis_service import AnalysisService
+        from app.utils.encryption import get_fernet
+        get_fernet()
+    
+    yield
+    
+    provider_executor.shutdown()
+    await dispose_async_engine()
 
 app = FastAPI(
     title="Stock Research API",
     description="Autonomous stock research and analysis platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -25,6 +43,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Paging cursor of GET /api/stocks/, readable by browser clients
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include API routers
@@ -32,6 +52,7 @@ app.include_router(stocks.router, prefix="/api/stocks", tags=["stocks"])
 app.include_router(runs.router, prefix="/api/runs", tags=["runs"])
 app.include_router(config.router, prefix="/api/config", tags=["config"])
 app.include_router(analysis.router, prefix="/api/analysis", tags=["analysis"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
 
 @app.get("/")
 async def root():
@@ -42,4 +63,5 @@ async def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
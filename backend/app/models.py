@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Date, Boolean, Text, ForeignKey, JSON, Enum, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Date, Boolean, Text, ForeignKey, JSON, Enum, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -31,6 +31,21 @@ class EventType(enum.Enum):
     UPCOMING = "upcoming"
     HISTORICAL = "historical"
 
+class SymbolStatus(enum.Enum):
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+class JobType(enum.Enum):
+    DAILY_RUN = "daily_run"
+    ON_DEMAND = "on_demand"
+
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
 class Stock(Base):
     __tablename__ = "stocks"
     
@@ -43,6 +58,20 @@ class Stock(Base):
     industry = Column(String)
     is_tracked = Column(Boolean, default=True)
     
+    # Ratings of the newest analysis report, written together with the report
+    latest_entry_rating = Column(Enum(EntryRating))
+    latest_covered_call_rating = Column(Enum(StrategyRating))
+    latest_secured_put_rating = Column(Enum(StrategyRating))
+    latest_report_at = Column(DateTime)
+    
+    # Filtered listings page through id (keyset pagination)
+    __table_args__ = (
+        Index('ix_stocks_tracked_sector_id', 'is_tracked', 'sector', 'id'),
+        Index('ix_stocks_tracked_entry_rating_id', 'is_tracked', 'latest_entry_rating', 'id'),
+        Index('ix_stocks_tracked_covered_call_rating_id', 'is_tracked', 'latest_covered_call_rating', 'id'),
+        Index('ix_stocks_tracked_secured_put_rating_id', 'is_tracked', 'latest_secured_put_rating', 'id'),
+    )
+    
     # Relationships
     snapshots = relationship("StockSnapshot", back_populates="stock")
     earnings = relationship("EarningsEvent", back_populates="stock")
@@ -71,6 +100,27 @@ class DailyRun(Base):
     options = relationship("OptionsSnapshot", back_populates="daily_run")
     analyses = relationship("AnalysisReport", back_populates="daily_run")
 
+# Per-symbol checkpoint of a daily run; a resumed run only processes unfinished symbols
+class RunSymbolProgress(Base):
+    __tablename__ = "run_symbol_progress"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    daily_run_id = Column(Integer, ForeignKey("daily_runs.id"), nullable=False)
+    stock_id = Column(Integer, ForeignKey("stocks.id"), nullable=False)
+    symbol = Column(String, nullable=False)
+    rank = Column(Integer, nullable=False)
+    status = Column(Enum(SymbolStatus), default=SymbolStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    duration_ms = Column(Integer)
+    error = Column(Text)
+    
+    __table_args__ = (
+        UniqueConstraint('daily_run_id', 'symbol', name='uq_run_symbol_progress_run_symbol'),
+        Index('ix_run_symbol_progress_run_status', 'daily_run_id', 'status'),
+    )
+
 class StockSnapshot(Base):
     __tablename__ = "stock_snapshots"
     
@@ -91,6 +141,10 @@ class StockSnapshot(Base):
     beta = Column(Numeric)
     as_of = Column(DateTime, nullable=False)
     
+    __table_args__ = (
+        Index('ix_stock_snapshots_daily_run_id', 'daily_run_id'),
+    )
+    
     # Relationships
     daily_run = relationship("DailyRun", back_populates="snapshots")
     stock = relationship("Stock", back_populates="snapshots")
@@ -108,6 +162,11 @@ class EarningsEvent(Base):
     eps_estimate = Column(Numeric)
     surprise_percent = Column(Numeric)
     
+    __table_args__ = (
+        UniqueConstraint('stock_id', 'event_date', 'event_type', name='uq_earnings_events_natural_key'),
+        Index('ix_earnings_events_source_run_id', 'source_run_id'),
+    )
+    
     # Relationships
     stock = relationship("Stock", back_populates="earnings")
 
@@ -119,11 +178,18 @@ class NewsArticle(Base):
     source_run_id = Column(Integer, ForeignKey("daily_runs.id"), nullable=True)
     title = Column(String, nullable=False)
     url = Column(String, nullable=False)
+    url_hash = Column(String(64), nullable=False)  # sha256 of url, see app.utils.hashing
     published_at = Column(DateTime, nullable=False)
     source = Column(String)
     summary_raw = Column(Text)
     is_issue_flag = Column(Boolean, default=False)
     
+    __table_args__ = (
+        UniqueConstraint('stock_id', 'url_hash', name='uq_news_articles_url'),
+        Index('ix_news_articles_stock_id_published_at', 'stock_id', 'published_at'),
+        Index('ix_news_articles_source_run_id', 'source_run_id'),
+    )
+    
     # Relationships
     stock = relationship("Stock", back_populates="news")
     daily_run = relationship("DailyRun", back_populates="news")
@@ -139,6 +205,11 @@ class Filing(Base):
     file_url = Column(String, nullable=False)
     file_date = Column(Date, nullable=False)
     
+    __table_args__ = (
+        Index('ix_filings_stock_id_file_date', 'stock_id', 'file_date'),
+        Index('ix_filings_source_run_id', 'source_run_id'),
+    )
+    
     # Relationships
     stock = relationship("Stock", back_populates="filings")
     daily_run = relationship("DailyRun", back_populates="filings")
@@ -159,6 +230,11 @@ class OptionsSnapshot(Base):
     delta_call = Column(Numeric)
     delta_put = Column(Numeric)
     
+    __table_args__ = (
+        Index('ix_options_snapshots_stock_id_id', 'stock_id', 'id'),
+        Index('ix_options_snapshots_source_run_id', 'source_run_id'),
+    )
+    
     # Relationships
     stock = relationship("Stock", back_populates="options")
     daily_run = relationship("DailyRun", back_populates="options")
@@ -171,6 +247,7 @@ class AnalysisReport(Base):
     source_run_id = Column(Integer, ForeignKey("daily_runs.id"), nullable=True)
     analysis_type = Column(Enum(AnalysisType), nullable=False)
     llm_model = Column(String)
+    input_hash = Column(String(64), index=True)  # sha256 of normalized LLM input
     raw_prompt = Column(Text)
     raw_response = Column(Text)
     summary_markdown = Column(Text, nullable=False)
@@ -181,12 +258,57 @@ class AnalysisReport(Base):
     secured_put_rating = Column(Enum(StrategyRating))
     secured_put_comment = Column(Text)
     risk_flags = Column(JSON)
+    input_baseline = Column(JSON)  # inputs the analysis is based on, for delta detection
+    carried_from_id = Column(Integer, ForeignKey("analysis_reports.id"), nullable=True)  # report reused unchanged
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    # Serves "latest report for a stock" and per-run lookups
+    __table_args__ = (
+        Index('ix_analysis_reports_stock_id_created_at', 'stock_id', 'created_at'),
+        Index('ix_analysis_reports_source_run_id', 'source_run_id'),
+    )
+    
     # Relationships
     stock = relationship("Stock", back_populates="analyses")
     daily_run = relationship("DailyRun", back_populates="analyses")
 
+# Denormalized newest data per stock, refreshed when a run completes
+class StockLatest(Base):
+    __tablename__ = "stock_latest"
+    
+    stock_id = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    symbol = Column(String, unique=True, index=True, nullable=False)
+    report_id = Column(Integer, ForeignKey("analysis_reports.id"))
+    options_snapshot_id = Column(Integer, ForeignKey("options_snapshots.id"))
+    news_ids = Column(JSON, default=list)
+    filing_ids = Column(JSON, default=list)
+    payload = Column(JSON, nullable=False)  # serialized StockDetailResponse
+    source_run_id = Column(Integer, ForeignKey("daily_runs.id"), nullable=True)
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+# Durable queue of analysis work, claimed by worker processes
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(Enum(JobType), nullable=False)
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    payload = Column(JSON, default=dict)  # arguments of the job, e.g. stock_id and symbol
+    daily_run_id = Column(Integer, ForeignKey("daily_runs.id"), nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = Column(String)
+    heartbeat_at = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+    
+    # Workers claim the oldest due job of a status
+    __table_args__ = (
+        Index('ix_analysis_jobs_status_run_after_id', 'status', 'run_after', 'id'),
+    )
+
 class UserConfig(Base):
     __tablename__ = "user_config"
     
@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime, date
 from typing import List, Optional
-from app.models import DailyRunStatus
+from app.models import DailyRunStatus, SymbolStatus
 
 class DailyRunSummary(BaseModel):
     id: int
@@ -17,4 +17,17 @@ class DailyRunSummary(BaseModel):
 
 class DailyRunResponse(DailyRunSummary):
     # Add any additional fields needed for detailed response
-    pass
\ No newline at end of file
+    pass
+
+class SymbolProgressResponse(BaseModel):
+    symbol: str
+    rank: int
+    status: SymbolStatus
+    attempts: int
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[int] = None
+    error: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
@@ -7,10 +7,13 @@ class StockSummary(BaseModel):
     id: int
     symbol: str
     name: str
-    exchange: str
+    exchange: Optional[str] = None
     sector: Optional[str] = None
     industry: Optional[str] = None
     is_tracked: bool
+    latest_entry_rating: Optional[EntryRating] = None
+    latest_covered_call_rating: Optional[StrategyRating] = None
+    latest_secured_put_rating: Optional[StrategyRating] = None
     
     class Config:
         from_attributes = True
@@ -23,4 +26,23 @@ class StockDetailResponse(BaseModel):
     latest_options: Optional[dict] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class OptionContract(BaseModel):
+    strike: float
+    bid: float
+    ask: Optional[float] = None  # Providers omit the ask of illiquid contracts
+    implied_vol: float
+    delta: float
+    theta: float
+    premium: float
+    annualized_yield: float
+    expiration_date: str
+    days_to_expiry: int
+
+class OptionChainResponse(BaseModel):
+    symbol: str
+    underlying_price: float
+    expirations: List[str]
+    calls: List[OptionContract]
+    puts: List[OptionContract]
@@ -1,203 +1,437 @@
 import asyncio
+import os
 from datetime import datetime
 from typing import Dict, List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
 from app.models import (
     Stock, DailyRun, StockSnapshot, EarningsEvent, 
-    NewsArticle, Filing, OptionsSnapshot, AnalysisReport,
-    DailyRunStatus, AnalysisType, EventType
+    NewsArticle, OptionsSnapshot, AnalysisReport,
+    RunSymbolProgress, DailyRunStatus, AnalysisType, EventType, EntryRating, StrategyRating,
+    SymbolStatus
 )
+from app.services.bulk_writer import BulkWriter, ensure_stocks
+from app.services.delta_detection import find_unchanged_report, input_baseline
+from app.services.llm_cache import analysis_input_hash, find_cached_report, report_payload
 from app.services.market_data import MarketDataService
 from app.services.news_service import NewsService
-from app.services.openai_service import OpenAIService
+from app.services.ohlcv_store import OHLCV_STORE_ENABLED, ingest
+from app.services.openai_service import OpenAIService, OPENAI_MODEL
+from app.services.snapshot_store import SNAPSHOT_STORE_ENABLED, compact, write_run
+from app.services.stock_latest import refresh_stock_latest
+from app.utils.hashing import url_hash
+
+# Maximum number of symbols analyzed at the same time during a daily run
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", "5"))
+
+# Per-source fetch timeouts (seconds); a source that times out is treated as missing
+SOURCE_TIMEOUTS = {
+    'quote': float(os.getenv("QUOTE_FETCH_TIMEOUT", "15")),
+    'earnings': float(os.getenv("EARNINGS_FETCH_TIMEOUT", "15")),
+    'news': float(os.getenv("NEWS_FETCH_TIMEOUT", "10")),
+    'options': float(os.getenv("OPTIONS_FETCH_TIMEOUT", "20")),
+}
+
+def _as_date(value):
+    """Provider dates arrive as dates, datetimes or pandas Timestamps"""
+    return value.date() if hasattr(value, 'date') else value
+
+def _parse_rating(enum_cls, value, default):
+    """Map an LLM rating string such as "buy" onto its enum member"""
+    try:
+        return enum_cls(str(value).strip().lower())
+    except ValueError:
+        return default
 
 class AnalysisService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession, concurrency: Optional[int] = None):
         self.db = db
+        self.concurrency = max(1, concurrency or ANALYSIS_CONCURRENCY)
         self.market_service = MarketDataService()
         self.news_service = NewsService()
+        self.llm_cache_hits = 0
+        self.unchanged_skips = 0
     
     async def run_daily_analysis(self, run_id: int):
-        """Run comprehensive daily analysis for configured stocks"""
+        """Run comprehensive daily analysis for configured stocks.
+
+        Progress is checkpointed per symbol, so running the same run again
+        (after a crash or via the resume endpoint) only processes the
+        symbols that are not done yet.
+        """
+        daily_run = None
+        history = None
         try:
             # Get the daily run record
-            daily_run = self.db.query(DailyRun).filter(DailyRun.id == run_id).first()
+            daily_run = await self.db.get(DailyRun, run_id)
             if not daily_run:
                 return
             
             # Update status to running
             daily_run.status = DailyRunStatus.RUNNING
-            self.db.commit()
+            await self.db.commit()
             
-            # Get configuration
-            from app.models import UserConfig
-            config = self.db.query(UserConfig).first()
-            if not config:
-                config = UserConfig(top_n=20, universe="US_LARGE_CAP", custom_tickers=[])
-                self.db.add(config)
-                self.db.commit()
+            # The symbol list is fixed by the first attempt of a run
+            self.market_service.reset_run_cache()
+            progress = await self._load_progress(run_id)
+            resumed = bool(progress)
+            if not resumed:
+                progress = await self._plan_run(run_id)
+            remaining = [row for row in progress if row.status != SymbolStatus.DONE]
+            await self.db.execute(update(RunSymbolProgress).where(
+                RunSymbolProgress.daily_run_id == run_id,
+                RunSymbolProgress.status != SymbolStatus.DONE
+            ).values(attempts=RunSymbolProgress.attempts + 1))
+            await self.db.commit()
             
-            # Get top stocks by market cap
-            top_stocks = await self.market_service.get_top_stocks_by_market_cap(config.top_n)
+            # Daily bar history is brought up to date alongside the analyses, on its own threads
+            history = asyncio.create_task(self._ingest_bars([row.symbol for row in progress]))
             
-            # Add custom tickers
-            all_symbols = list(set([stock['symbol'] for stock in top_stocks] + config.custom_tickers))
+            # Process stocks concurrently, bounded by the configured limit; results are
+            # buffered and written in chunks together with each symbol's checkpoint
+            writer = BulkWriter()
+            semaphore = asyncio.Semaphore(self.concurrency)
+            await asyncio.gather(*[
+                self._analyze_symbol_isolated(semaphore, row, daily_run.id, writer=writer)
+                for row in remaining
+            ])
+            await writer.flush()
+            bar_stats = await history
+            if writer.failed_symbols:
+                await self._mark_failed(run_id, writer.failed_symbols, "Failed to store results")
             
-            # Process each stock
-            for i, symbol in enumerate(all_symbols):
-                try:
-                    await self._analyze_single_stock(
-                        symbol, daily_run, rank=i+1
-                    )
-                except Exception as e:
-                    print(f"Error analyzing {symbol}: {e}")
-                    continue
+            statuses = dict((await self.db.execute(select(RunSymbolProgress.symbol, RunSymbolProgress.status).where(
+                RunSymbolProgress.daily_run_id == run_id
+            ))).all())
+            failed = sorted(symbol for symbol, status in statuses.items() if status != SymbolStatus.DONE)
             
-            # Update run status to completed
-            daily_run.status = DailyRunStatus.COMPLETED
+            # A run only fails outright when no symbol could be analyzed
+            if statuses and len(failed) == len(statuses):
+                daily_run.status = DailyRunStatus.FAILED
+            else:
+                daily_run.status = DailyRunStatus.COMPLETED
             daily_run.completed_at = datetime.now()
-            self.db.commit()
+            daily_run.notes = f"Analyzed {len(statuses) - len(failed)}/{len(statuses)} symbols"
+            if resumed:
+                daily_run.notes += f"; resumed with {len(remaining)} remaining"
+            if failed:
+                daily_run.notes += f"; failed: {', '.join(failed)}"
+            daily_run.notes += f"; upstream requests: {self.market_service.request_stats()['total']}"
+            daily_run.notes += f"; LLM cache hits: {self.llm_cache_hits}"
+            if remaining:
+                daily_run.notes += (f"; unchanged, report carried forward: {self.unchanged_skips}/{len(remaining)}"
+                                    f" ({self.unchanged_skips / len(remaining):.0%})")
+            if bar_stats and (bar_stats['backfilled'] or bar_stats['updated']):
+                daily_run.notes += (f"; daily bars: {bar_stats['backfilled']} backfilled, "
+                                    f"{bar_stats['updated']} updated")
+            write_stats = writer.stats()
+            daily_run.notes += f"; wrote {write_stats['rows_written']} rows at {write_stats['rows_per_sec']} rows/sec"
+            await self.db.commit()
+            
+            # Refresh the detail view for every stock this attempt touched
+            await self._refresh_latest([row.stock_id for row in remaining], daily_run.id)
+            await self._store_history(daily_run.id)
             
         except Exception as e:
             # Update run status to failed
+            await self.db.rollback()
             if daily_run:
                 daily_run.status = DailyRunStatus.FAILED
                 daily_run.notes = str(e)
-                self.db.commit()
+                await self.db.commit()
             print(f"Daily analysis failed: {e}")
+        finally:
+            if history is not None and not history.done():
+                history.cancel()
+    
+    async def prewarm(self) -> Dict[str, int]:
+        """Prefetch quotes, fundamentals, earnings, options, news and daily bars of the universe.
+
+        Fills the market data cache ahead of a scheduled run so the run itself
+        mostly waits on the LLM. Returns the upstream request counts.
+        """
+        self.market_service.reset_run_cache()
+        symbols = await self._select_symbols()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def fetch_symbol(symbol: str):
+            async with semaphore:
+                await asyncio.gather(
+                    self._fetch_source('quote', symbol, self.market_service.get_stock_data(symbol), None),
+                    self._fetch_source('earnings', symbol, self.market_service.get_earnings_data(symbol), None),
+                    self._fetch_source('news', symbol, self.news_service.get_stock_news(symbol), None),
+                    self._fetch_source('options', symbol, self.market_service.get_options_data(symbol), None),
+                )
+        
+        await asyncio.gather(self._ingest_bars(symbols), *[fetch_symbol(symbol) for symbol in symbols])
+        return {'symbols': len(symbols), **self.market_service.request_stats()}
     
     async def run_on_demand_analysis(self, stock_id: int, symbol: str):
         """Run on-demand analysis for a single stock"""
         try:
-            # Create a dummy daily run for on-demand analysis
-            daily_run = DailyRun(
-                run_date=datetime.now().date(),
-                universe="ON_DEMAND",
-                status=DailyRunStatus.COMPLETED,
-                completed_at=datetime.now()
-            )
-            self.db.add(daily_run)
-            self.db.commit()
+            daily_run = await self._on_demand_run()
             
             # Analyze the stock
+            writer = BulkWriter()
             await self._analyze_single_stock(
-                symbol, daily_run, rank=1, analysis_type=AnalysisType.ON_DEMAND
+                symbol, stock_id, daily_run.id, rank=1, writer=writer,
+                analysis_type=AnalysisType.ON_DEMAND
             )
+            if not await writer.flush():
+                raise RuntimeError(f"Failed to store analysis for {symbol}")
+            await self._refresh_latest([stock_id], daily_run.id)
             
         except Exception as e:
             print(f"On-demand analysis failed for {symbol}: {e}")
-            self.db.rollback()
+            await self.db.rollback()
+            # Let the job queue retry it
+            raise
     
-    async def _analyze_single_stock(self, symbol: str, daily_run: DailyRun, 
-                                   rank: int, analysis_type: AnalysisType = AnalysisType.DAILY_AUTO):
-        """Analyze a single stock and store results"""
+    async def _load_progress(self, run_id: int) -> List[RunSymbolProgress]:
+        return (await self.db.scalars(select(RunSymbolProgress).where(
+            RunSymbolProgress.daily_run_id == run_id
+        ).order_by(RunSymbolProgress.rank))).all()
+    
+    async def _select_symbols(self) -> List[str]:
+        """Configured universe: top stocks by market cap plus custom tickers"""
+        # Get configuration
+        from app.models import UserConfig
+        config = await self.db.scalar(select(UserConfig).limit(1))
+        if not config:
+            config = UserConfig(top_n=20, universe="US_LARGE_CAP", custom_tickers=[])
+            self.db.add(config)
+            await self.db.commit()
         
-        # Get or create stock record
-        stock = self.db.query(Stock).filter(Stock.symbol == symbol).first()
-        if not stock:
-            stock = Stock(symbol=symbol, name=symbol, is_tracked=True)
-            self.db.add(stock)
-            self.db.commit()
-            self.db.refresh(stock)
+        # Get top stocks by market cap; quotes fetched here are reused per symbol
+        top_stocks = await self.market_service.get_top_stocks_by_market_cap(config.top_n)
         
-        # Fetch market data
-        stock_data = await self.market_service.get_stock_data(symbol)
-        if not stock_data:
+        # Add custom tickers
+        return list(dict.fromkeys([stock['symbol'] for stock in top_stocks] + (config.custom_tickers or [])))
+    
+    async def _plan_run(self, run_id: int) -> List[RunSymbolProgress]:
+        """Select the run's symbols and record them as pending"""
+        all_symbols = await self._select_symbols()
+        
+        # Create any missing stock records in one round-trip
+        stock_ids = await self.db.run_sync(ensure_stocks, all_symbols)
+        
+        if all_symbols:
+            await self.db.execute(insert(RunSymbolProgress), [{
+                'daily_run_id': run_id, 'stock_id': stock_ids[symbol], 'symbol': symbol,
+                'rank': i + 1, 'status': SymbolStatus.PENDING
+            } for i, symbol in enumerate(all_symbols)])
+            await self.db.commit()
+        return await self._load_progress(run_id)
+    
+    async def _mark_failed(self, run_id: int, symbols: List[str], error: str):
+        await self.db.execute(update(RunSymbolProgress).where(
+            RunSymbolProgress.daily_run_id == run_id,
+            RunSymbolProgress.symbol.in_(symbols),
+            RunSymbolProgress.status != SymbolStatus.DONE
+        ).values(status=SymbolStatus.FAILED, error=error, finished_at=datetime.utcnow()))
+        await self.db.commit()
+    
+    async def _on_demand_run(self) -> DailyRun:
+        """Today's shared run record for on-demand analyses.
+
+        (run_date, universe) is unique, so all on-demand analyses of a day
+        belong to one run instead of each creating its own.
+        """
+        today = datetime.now().date()
+        query = select(DailyRun).where(DailyRun.run_date == today, DailyRun.universe == "ON_DEMAND")
+        daily_run = await self.db.scalar(query)
+        if daily_run:
+            return daily_run
+        try:
+            daily_run = DailyRun(
+                run_date=today,
+                universe="ON_DEMAND",
+                status=DailyRunStatus.COMPLETED,
+                completed_at=datetime.now()
+            )
+            self.db.add(daily_run)
+            await self.db.commit()
+            return daily_run
+        except IntegrityError:
+            # Created concurrently by another worker
+            await self.db.rollback()
+            return await self.db.scalar(query)
+    
+    async def _refresh_latest(self, stock_ids, run_id: int):
+        """Update stock_latest; a failure here never fails the run itself"""
+        try:
+            await self.db.run_sync(refresh_stock_latest, list(stock_ids), run_id)
+        except Exception as e:
+            await self.db.rollback()
+            print(f"Failed to refresh stock_latest for run {run_id}: {e}")
+    
+    async def _ingest_bars(self, symbols: List[str]) -> Optional[Dict[str, int]]:
+        """Backfill or extend the daily bar store; a failure here never fails the run"""
+        if not OHLCV_STORE_ENABLED:
+            return None
+        try:
+            return await ingest(symbols, self.market_service)
+        except Exception as e:
+            print(f"Failed to ingest daily bars: {e}")
+            return None
+    
+    async def _store_history(self, run_id: int):
+        """Write the run's snapshots to the columnar history store; never fails the run"""
+        if not SNAPSHOT_STORE_ENABLED:
             return
+        try:
+            await self.db.run_sync(write_run, run_id)
+            await asyncio.to_thread(compact)
+        except Exception as e:
+            print(f"Failed to write snapshot history for run {run_id}: {e}")
+    
+    async def _analyze_symbol_isolated(self, semaphore: asyncio.Semaphore, progress: RunSymbolProgress,
+                                       run_id: int, writer: BulkWriter) -> bool:
+        """Analyze one symbol of a daily run in its own DB session"""
+        async with semaphore:
+            started_at = datetime.utcnow()
+            async with AsyncSessionLocal() as db:
+                try:
+                    await self._analyze_single_stock(progress.symbol, progress.stock_id, run_id,
+                                                     rank=progress.rank, writer=writer, db=db,
+                                                     progress_id=progress.id, started_at=started_at)
+                    return True
+                except Exception as e:
+                    await db.rollback()
+                    print(f"Error analyzing {progress.symbol}: {e}")
+                    # Record the failure; the symbol is retried when the run is resumed
+                    finished_at = datetime.utcnow()
+                    try:
+                        await db.execute(update(RunSymbolProgress).where(RunSymbolProgress.id == progress.id).values(
+                            status=SymbolStatus.FAILED, started_at=started_at, finished_at=finished_at,
+                            duration_ms=int((finished_at - started_at).total_seconds() * 1000), error=str(e)[:2000]
+                        ))
+                        await db.commit()
+                    except Exception as e:
+                        print(f"Failed to record progress for {progress.symbol}: {e}")
+                    return False
+    
+    async def _fetch_source(self, source: str, symbol: str, fetch, default):
+        """Await a data source fetch with its timeout, falling back to a default"""
+        try:
+            return await asyncio.wait_for(fetch, timeout=SOURCE_TIMEOUTS[source])
+        except asyncio.TimeoutError:
+            print(f"Timed out fetching {source} data for {symbol}")
+        except Exception as e:
+            print(f"Error fetching {source} data for {symbol}: {e}")
+        return default
+    
+    async def _analyze_single_stock(self, symbol: str, stock_id: int, run_id: int,
+                                   rank: int, writer: BulkWriter,
+                                   analysis_type: AnalysisType = AnalysisType.DAILY_AUTO,
+                                   db: Optional[AsyncSession] = None,
+                                   progress_id: Optional[int] = None,
+                                   started_at: Optional[datetime] = None):
+        """Analyze a single stock and queue its results on the writer"""
+        db = db or self.db
+        source_run_id = run_id if analysis_type == AnalysisType.DAILY_AUTO else None
+        
+        # Fetch all data sources together; a failed or slow source degrades to empty data
+        stock_data, earnings_data, news_data, options_data = await asyncio.gather(
+            self._fetch_source('quote', symbol, self.market_service.get_stock_data(symbol), None),
+            self._fetch_source('earnings', symbol, self.market_service.get_earnings_data(symbol),
+                               {'upcoming': [], 'historical': []}),
+            self._fetch_source('news', symbol, self.news_service.get_stock_news(symbol), []),
+            self._fetch_source('options', symbol, self.market_service.get_options_data(symbol), None),
+        )
+        if not stock_data:
+            raise ValueError(f"No market data available for {symbol}")
         
         # Update stock info
-        stock.name = stock_data.get('name', symbol)
-        stock.sector = stock_data.get('sector')
-        stock.industry = stock_data.get('industry')
+        updates = [(Stock, {
+            'id': stock_id,
+            'name': stock_data.get('name', symbol),
+            'sector': stock_data.get('sector'),
+            'industry': stock_data.get('industry')
+        })]
         
         # Create stock snapshot
-        snapshot = StockSnapshot(
-            daily_run_id=daily_run.id,
-            stock_id=stock.id,
-            sequence=rank,
-            market_cap=stock_data['market_cap'],
-            price=stock_data['price'],
-            open_price=stock_data.get('open_price', stock_data['price']),
-            day_high=stock_data.get('day_high', stock_data['price']),
-            day_low=stock_data.get('day_low', stock_data['price']),
-            volume=stock_data.get('volume', 0),
-            high_52w=stock_data.get('high_52w', stock_data['price']),
-            low_52w=stock_data.get('low_52w', stock_data['price']),
-            pe_ratio=stock_data.get('pe_ratio'),
-            dividend_yield=stock_data.get('dividend_yield'),
-            beta=stock_data.get('beta'),
-            as_of=stock_data['as_of']
-        )
-        self.db.add(snapshot)
-        
-        # Fetch earnings data
-        earnings_data = await self.market_service.get_earnings_data(symbol)
+        inserts = [(StockSnapshot, {
+            'daily_run_id': run_id,
+            'stock_id': stock_id,
+            'sequence': rank,
+            'market_cap': stock_data['market_cap'],
+            'price': stock_data['price'],
+            'open_price': stock_data.get('open_price', stock_data['price']),
+            'day_high': stock_data.get('day_high', stock_data['price']),
+            'day_low': stock_data.get('day_low', stock_data['price']),
+            'volume': stock_data.get('volume', 0),
+            'high_52w': stock_data.get('high_52w', stock_data['price']),
+            'low_52w': stock_data.get('low_52w', stock_data['price']),
+            'pe_ratio': stock_data.get('pe_ratio'),
+            'dividend_yield': stock_data.get('dividend_yield'),
+            'beta': stock_data.get('beta'),
+            'as_of': stock_data['as_of']
+        })]
         
         # Store earnings events
         for earning in earnings_data.get('upcoming', []):
-            earnings_event = EarningsEvent(
-                stock_id=stock.id,
-                source_run_id=daily_run.id if analysis_type == AnalysisType.DAILY_AUTO else None,
-                event_type=EventType.UPCOMING,
-                fiscal_period=earning.get('fiscal_period', 'Q1'),
-                event_date=earning['event_date'],
-                eps_estimate=earning.get('eps_estimate')
-            )
-            self.db.add(earnings_event)
+            inserts.append((EarningsEvent, {
+                'stock_id': stock_id,
+                'source_run_id': source_run_id,
+                'event_type': EventType.UPCOMING,
+                'fiscal_period': earning.get('fiscal_period', 'Q1'),
+                'event_date': _as_date(earning['event_date']),
+                'eps_actual': None,
+                'eps_estimate': earning.get('eps_estimate'),
+                'surprise_percent': None
+            }))
         
         for earning in earnings_data.get('historical', []):
-            earnings_event = EarningsEvent(
-                stock_id=stock.id,
-                source_run_id=daily_run.id if analysis_type == AnalysisType.DAILY_AUTO else None,
-                event_type=EventType.HISTORICAL,
-                event_date=earning['event_date'],
-                eps_actual=earning.get('eps_actual'),
-                eps_estimate=earning.get('eps_estimate'),
-                surprise_percent=earning.get('surprise_percent')
-            )
-            self.db.add(earnings_event)
-        
-        # Fetch news
-        news_data = await self.news_service.get_stock_news(symbol)
+            inserts.append((EarningsEvent, {
+                'stock_id': stock_id,
+                'source_run_id': source_run_id,
+                'event_type': EventType.HISTORICAL,
+                'fiscal_period': None,
+                'event_date': _as_date(earning['event_date']),
+                'eps_actual': earning.get('eps_actual'),
+                'eps_estimate': earning.get('eps_estimate'),
+                'surprise_percent': earning.get('surprise_percent')
+            }))
         
         # Store news articles
         for article in news_data:
-            news_article = NewsArticle(
-                stock_id=stock.id,
-                source_run_id=daily_run.id if analysis_type == AnalysisType.DAILY_AUTO else None,
-                title=article['title'],
-                url=article['url'],
-                published_at=article['published_at'],
-                source=article['source'],
-                summary_raw=article.get('summary'),
-                is_issue_flag=article.get('is_issue_flag', False)
-            )
-            self.db.add(news_article)
-        
-        # Fetch options data
-        options_data = await self.market_service.get_options_data(symbol)
+            inserts.append((NewsArticle, {
+                'stock_id': stock_id,
+                'source_run_id': source_run_id,
+                'title': article['title'],
+                'url': article['url'],
+                'url_hash': url_hash(article['url']),
+                'published_at': article['published_at'],
+                'source': article['source'],
+                'summary_raw': article.get('summary'),
+                'is_issue_flag': article.get('is_issue_flag', False)
+            }))
         
         # Store options snapshot
         if options_data:
-            # Store the best covered call and cash-secured put options
+            # Store the covered call and cash-secured put closest to the target deltas
             best_call = options_data['calls'][0] if options_data['calls'] else None
-            best_put = options_data['puts'][-1] if options_data['puts'] else None
+            # One days_to_expiry is stored, so the put must expire with the call
+            best_put = next((put for put in options_data['puts']
+                             if best_call and put['expiration_date'] == best_call['expiration_date']), None)
             
             if best_call and best_put:
-                options_snapshot = OptionsSnapshot(
-                    stock_id=stock.id,
-                    source_run_id=daily_run.id if analysis_type == AnalysisType.DAILY_AUTO else None,
-                    underlying_price=options_data['underlying_price'],
-                    days_to_expiry=options_data['days_to_expiry'],
-                    call_strike=best_call['strike'],
-                    put_strike=best_put['strike'],
-                    call_bid=best_call['bid'],
-                    put_bid=best_put['bid'],
-                    implied_vol=best_call.get('implied_vol'),
-                    delta_call=best_call.get('delta'),
-                    delta_put=best_put.get('delta')
-                )
-                self.db.add(options_snapshot)
+                inserts.append((OptionsSnapshot, {
+                    'stock_id': stock_id,
+                    'source_run_id': source_run_id,
+                    'underlying_price': options_data['underlying_price'],
+                    'days_to_expiry': options_data['days_to_expiry'],
+                    'call_strike': best_call['strike'],
+                    'put_strike': best_put['strike'],
+                    'call_bid': best_call['bid'],
+                    'put_bid': best_put['bid'],
+                    'implied_vol': best_call.get('implied_vol'),
+                    'delta_call': best_call.get('delta'),
+                    'delta_put': best_put.get('delta')
+                }))
         
         # Prepare data for OpenAI analysis
         analysis_data = {
@@ -233,26 +467,80 @@ class AnalysisService:
             }
         }
         
-        # Get OpenAI analysis
-        openai_service = OpenAIService(self.db)
-        ai_analysis = await openai_service.analyze_stock(analysis_data)
+        # Daily runs carry the previous report forward when no input changed materially
+        input_hash = analysis_input_hash(analysis_data, OPENAI_MODEL)
+        baseline = input_baseline(stock_data, news_data, earnings_data, options_data)
+        carried_from_id = None
+        unchanged_report = None
+        openai_service = None
+        if analysis_type == AnalysisType.DAILY_AUTO:
+            unchanged_report = await db.run_sync(find_unchanged_report, stock_id, baseline, OPENAI_MODEL)
+        if unchanged_report:
+            self.unchanged_skips += 1
+            ai_analysis = report_payload(unchanged_report)
+            # Later runs keep comparing against the inputs the model actually saw
+            baseline = unchanged_report.input_baseline
+            input_hash = unchanged_report.input_hash
+            carried_from_id = unchanged_report.carried_from_id or unchanged_report.id
+        else:
+            # Reuse a report generated from the same (normalized) input, otherwise ask OpenAI
+            cached_report = await db.run_sync(find_cached_report, input_hash, OPENAI_MODEL)
+            if cached_report:
+                self.llm_cache_hits += 1
+                ai_analysis = report_payload(cached_report)
+                # A reused report keeps the age and inputs of the one the model wrote
+                baseline = cached_report.input_baseline
+                carried_from_id = cached_report.id
+            else:
+                openai_service = await db.run_sync(OpenAIService)
+        
+        # Reads are done: hand the connection back to the pool before the LLM call,
+        # results are written by the BulkWriter in its own sessions
+        await db.commit()
+        if openai_service is not None:
+            ai_analysis = await openai_service.analyze_stock(analysis_data)
         
         # Create analysis report
-        report = AnalysisReport(
-            stock_id=stock.id,
-            source_run_id=daily_run.id if analysis_type == AnalysisType.DAILY_AUTO else None,
-            analysis_type=analysis_type,
-            llm_model="gpt-4",
-            summary_markdown=ai_analysis.get('summary_markdown', 'Analysis completed'),
-            entry_rating=ai_analysis['entry']['rating'],
-            entry_comment=ai_analysis['entry']['rationale'],
-            covered_call_rating=ai_analysis['covered_call']['rating'],
-            covered_call_comment=ai_analysis['covered_call']['rationale'],
-            secured_put_rating=ai_analysis['secured_put']['rating'],
-            secured_put_comment=ai_analysis['secured_put']['rationale'],
-            risk_flags=ai_analysis.get('risks_and_issues', [])
-        )
-        self.db.add(report)
+        report = {
+            'stock_id': stock_id,
+            'source_run_id': source_run_id,
+            'analysis_type': analysis_type,
+            'llm_model': OPENAI_MODEL,
+            # Failed analyses are not cacheable
+            'input_hash': None if ai_analysis.get('analysis_failed') else input_hash,
+            'summary_markdown': ai_analysis.get('summary_markdown', 'Analysis completed'),
+            'entry_rating': _parse_rating(EntryRating, ai_analysis['entry']['rating'], EntryRating.HOLD),
+            'entry_comment': ai_analysis['entry']['rationale'],
+            'covered_call_rating': _parse_rating(StrategyRating, ai_analysis['covered_call']['rating'], StrategyRating.NEUTRAL),
+            'covered_call_comment': ai_analysis['covered_call']['rationale'],
+            'secured_put_rating': _parse_rating(StrategyRating, ai_analysis['secured_put']['rating'], StrategyRating.NEUTRAL),
+            'secured_put_comment': ai_analysis['secured_put']['rationale'],
+            'risk_flags': ai_analysis.get('risks_and_issues', []),
+            'input_baseline': None if ai_analysis.get('analysis_failed') else baseline,
+            'carried_from_id': carried_from_id,
+            'created_at': datetime.utcnow()
+        }
+        inserts.append((AnalysisReport, report))
+        
+        # Keep the stock's current ratings in step with its newest report
+        updates[0][1].update({
+            'latest_entry_rating': report['entry_rating'],
+            'latest_covered_call_rating': report['covered_call_rating'],
+            'latest_secured_put_rating': report['secured_put_rating'],
+            'latest_report_at': report['created_at']
+        })
+        
+        # Checkpoint the symbol of a daily run together with its results
+        if progress_id is not None:
+            finished_at = datetime.utcnow()
+            updates.append((RunSymbolProgress, {
+                'id': progress_id,
+                'status': SymbolStatus.DONE,
+                'started_at': started_at,
+                'finished_at': finished_at,
+                'duration_ms': int((finished_at - started_at).total_seconds() * 1000),
+                'error': None
+            }))
         
-        # Commit all changes
-        self.db.commit()
\ No newline at end of file
+        # Queue all rows for this symbol; they are written in the same transaction
+        await writer.add_symbol(symbol, inserts, updates)
\ No newline at end of file
@@ -0,0 +1,149 @@
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import inspect, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.database import AsyncSessionLocal
+from app.models import Stock, EarningsEvent, NewsArticle
+
+# Rows buffered before a chunk is written in one transaction
+BULK_WRITE_CHUNK_SIZE = int(os.getenv("BULK_WRITE_CHUNK_SIZE", "500"))
+
+# Tables written with insert-or-update on their natural key instead of plain inserts
+UPSERT_KEYS = {
+    EarningsEvent: ('stock_id', 'event_date', 'event_type'),
+    NewsArticle: ('stock_id', 'url_hash'),
+}
+
+def upsert(db: Session, model: type, rows: List[Dict], key_columns: Tuple[str, ...]):
+    """Insert rows, updating the existing row when the natural key already exists"""
+    # A statement may not touch the same row twice, so keep the last row per key
+    rows = list({tuple(row[column] for column in key_columns): row for row in rows}.values())
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        _select_then_write(db, model, rows, key_columns)
+        return
+    
+    stmt = dialect_insert(model)
+    update_columns = [column for column in rows[0] if column not in key_columns]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={column: stmt.excluded[column] for column in update_columns}
+    )
+    db.execute(stmt, rows)
+
+def _select_then_write(db: Session, model: type, rows: List[Dict], key_columns: Tuple[str, ...]):
+    """Upsert for dialects without ON CONFLICT: update the rows whose key exists, insert the rest.
+
+    Not atomic against concurrent writers of the same keys; the unique
+    constraint rejects a racing duplicate insert.
+    """
+    primary_key = [column.key for column in inspect(model).primary_key]
+    keys = [getattr(model, column) for column in key_columns]
+    # Narrow by the first key column, match the full key here
+    found = db.execute(select(*keys, *[getattr(model, column) for column in primary_key]).where(
+        keys[0].in_({row[key_columns[0]] for row in rows})
+    )).all()
+    existing = {tuple(found_row[:len(keys)]): found_row[len(keys):] for found_row in found}
+    
+    updates, inserts = [], []
+    for row in rows:
+        ids = existing.get(tuple(row[column] for column in key_columns))
+        if ids is None:
+            inserts.append(row)
+        else:
+            updates.append({**row, **dict(zip(primary_key, ids))})
+    if updates:
+        db.execute(update(model), updates)
+    if inserts:
+        db.execute(insert(model), inserts)
+
+class BulkWriter:
+    """Buffers run results and writes them with executemany, one transaction per chunk.
+
+    Rows are grouped by symbol so a chunk never holds half of a symbol's
+    results: each symbol is either fully written or reported as failed.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+                 chunk_size: int = BULK_WRITE_CHUNK_SIZE):
+        self.session_factory = session_factory
+        self.chunk_size = max(1, chunk_size)
+        self._inserts: Dict[type, List[Dict]] = {}
+        self._updates: Dict[type, List[Dict]] = {}
+        self._pending_rows = 0
+        self._pending_symbols: List[str] = []
+        self.rows_written = 0
+        self.chunks_written = 0
+        self.write_seconds = 0.0
+        self.failed_symbols: List[str] = []
+
+    async def add_symbol(self, symbol: str, inserts: List[Tuple[type, Dict]],
+                         updates: Optional[List[Tuple[type, Dict]]] = None):
+        """Queue all rows produced for one symbol, flushing when the chunk is full"""
+        for model, row in inserts:
+            self._inserts.setdefault(model, []).append(row)
+        for model, row in updates or []:
+            self._updates.setdefault(model, []).append(row)
+        self._pending_rows += len(inserts) + len(updates or [])
+        self._pending_symbols.append(symbol)
+        if self._pending_rows >= self.chunk_size:
+            await self.flush()
+
+    @staticmethod
+    def _write(db: Session, inserts: Dict[type, List[Dict]], updates: Dict[type, List[Dict]]):
+        for model, model_rows in updates.items():
+            db.execute(update(model), model_rows)
+        for model, model_rows in inserts.items():
+            if model in UPSERT_KEYS:
+                upsert(db, model, model_rows, UPSERT_KEYS[model])
+            else:
+                db.execute(insert(model), model_rows)
+
+    async def flush(self) -> bool:
+        """Write the buffered chunk in a single transaction"""
+        if not self._pending_symbols:
+            return True
+        inserts, updates, symbols = self._inserts, self._updates, self._pending_symbols
+        rows = self._pending_rows
+        self._inserts, self._updates, self._pending_symbols, self._pending_rows = {}, {}, [], 0
+
+        start = time.perf_counter()
+        async with self.session_factory() as db:
+            try:
+                await db.run_sync(self._write, inserts, updates)
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                self.failed_symbols.extend(symbols)
+                print(f"Bulk write failed for {', '.join(symbols)}: {e}")
+                return False
+        self.write_seconds += time.perf_counter() - start
+        self.rows_written += rows
+        self.chunks_written += 1
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            'rows_written': self.rows_written,
+            'chunks_written': self.chunks_written,
+            'failed_symbols': list(self.failed_symbols),
+            'rows_per_sec': round(self.rows_written / self.write_seconds, 1) if self.write_seconds else 0.0,
+        }
+
+def ensure_stocks(db: Session, symbols: List[str]) -> Dict[str, int]:
+    """Map symbols to stock ids, creating missing stocks in one bulk insert"""
+    existing = dict(db.query(Stock.symbol, Stock.id).filter(Stock.symbol.in_(symbols)).all())
+    missing = [symbol for symbol in symbols if symbol not in existing]
+    if missing:
+        db.execute(insert(Stock), [
+            {'symbol': symbol, 'name': symbol, 'is_tracked': True} for symbol in missing
+        ])
+        db.commit()
+        existing.update(db.query(Stock.symbol, Stock.id).filter(Stock.symbol.in_(missing)).all())
+    return existing
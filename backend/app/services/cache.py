@@ -0,0 +1,217 @@
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import date, datetime
+from io import StringIO
+from typing import Any, Dict, Optional
+
+# Backend selection: "memory" (default) or "redis" (uses REDIS_URL)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+
+# Time-to-live in seconds for each kind of cached data
+CACHE_TTLS = {
+    'quote': int(os.getenv("CACHE_TTL_QUOTE", "30")),
+    'fundamentals': int(os.getenv("CACHE_TTL_FUNDAMENTALS", "21600")),
+    'earnings': int(os.getenv("CACHE_TTL_EARNINGS", "21600")),
+    'options': int(os.getenv("CACHE_TTL_OPTIONS", "600")),
+    'news': int(os.getenv("CACHE_TTL_NEWS", "900")),
+}
+
+_MISSING = object()
+
+def _encode_default(value: Any) -> Any:
+    """JSON form of the non-JSON types found in market data, tagged for decode"""
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(value, pd.DataFrame):
+        return {'__dataframe__': value.to_json(orient='table', date_format='iso')}
+    if isinstance(value, pd.Timestamp):
+        return {'__timestamp__': value.isoformat()}
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    if isinstance(value, np.ndarray):
+        return {'__ndarray__': value.tolist(), 'dtype': value.dtype.str}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot cache values of type {type(value).__name__}")
+
+def _decode_object(obj: Dict) -> Any:
+    if '__ndarray__' in obj:
+        import numpy as np
+        return np.array(obj['__ndarray__'], dtype=obj['dtype'])
+    if '__timestamp__' in obj:
+        import pandas as pd
+        return pd.Timestamp(obj['__timestamp__'])
+    if '__dataframe__' in obj:
+        import pandas as pd
+        return pd.read_json(StringIO(obj['__dataframe__']), orient='table')
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    if '__date__' in obj:
+        return date.fromisoformat(obj['__date__'])
+    return obj
+
+def encode(value: Any) -> bytes:
+    """Serialize a cache value as JSON; unlike pickle, decoding it cannot run code"""
+    return json.dumps(value, default=_encode_default, separators=(',', ':')).encode()
+
+def decode(raw: bytes) -> Any:
+    return json.loads(raw, object_hook=_decode_object)
+
+class InMemoryBackend:
+    """Process-local cache with per-entry TTL and bounded LRU eviction"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+class RedisBackend:
+    """Cache stored in Redis; any client exposing get/set(ex=)/delete works.
+
+    Values are stored as JSON (see encode). Eviction is left to the server
+    (``maxmemory-policy allkeys-lru``).
+    """
+
+    def __init__(self, client, prefix: str = "stockresearch:"):
+        self.client = client
+        self.prefix = prefix
+        self.evictions = 0
+
+    @classmethod
+    def from_url(cls, url: str = REDIS_URL) -> "RedisBackend":
+        import redis
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return _MISSING
+        return decode(raw)
+
+    def set(self, key: str, value: Any, ttl: int):
+        self.client.set(self.prefix + key, encode(value), ex=ttl)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+    def size(self) -> Optional[int]:
+        return None
+
+class MarketDataCache:
+    """Typed cache front-end with per-kind TTLs and hit/miss counters"""
+
+    def __init__(self, backend, ttls: Optional[Dict[str, int]] = None):
+        self.backend = backend
+        self.ttls = {**CACHE_TTLS, **(ttls or {})}
+        self.hits = Counter()
+        self.misses = Counter()
+        self.errors = 0
+
+    def get(self, kind: str, key: str, default: Any = None) -> Any:
+        try:
+            value = self.backend.get(f"{kind}:{key}")
+        except Exception as e:
+            # A broken cache must never break data fetching
+            self.errors += 1
+            print(f"Cache read failed for {kind}:{key}: {e}")
+            value = _MISSING
+        if value is _MISSING:
+            self.misses[kind] += 1
+            return default
+        self.hits[kind] += 1
+        return value
+
+    def set(self, kind: str, key: str, value: Any):
+        try:
+            self.backend.set(f"{kind}:{key}", value, self.ttls[kind])
+        except Exception as e:
+            self.errors += 1
+            print(f"Cache write failed for {kind}:{key}: {e}")
+
+    def delete(self, kind: str, key: str):
+        try:
+            self.backend.delete(f"{kind}:{key}")
+        except Exception as e:
+            self.errors += 1
+            print(f"Cache delete failed for {kind}:{key}: {e}")
+
+    def stats(self) -> Dict:
+        kinds = sorted(set(self.ttls) | set(self.hits) | set(self.misses))
+        return {
+            'backend': type(self.backend).__name__,
+            'entries': self.backend.size(),
+            'evictions': self.backend.evictions,
+            'errors': self.errors,
+            'kinds': {
+                kind: {
+                    'ttl_seconds': self.ttls.get(kind),
+                    'hits': self.hits[kind],
+                    'misses': self.misses[kind],
+                } for kind in kinds
+            }
+        }
+
+_cache: Optional[MarketDataCache] = None
+
+def get_cache() -> MarketDataCache:
+    """Process-wide market data cache, created on first use"""
+    global _cache
+    if _cache is None:
+        backend = None
+        if CACHE_BACKEND == "redis":
+            try:
+                backend = RedisBackend.from_url(REDIS_URL)
+            except Exception as e:
+                print(f"Redis cache unavailable, falling back to memory: {e}")
+        _cache = MarketDataCache(backend or InMemoryBackend())
+    return _cache
+
+def set_cache(cache: Optional[MarketDataCache]):
+    """Replace the process-wide cache (e.g. with a local Redis stand-in)"""
+    global _cache
+    _cache = cache
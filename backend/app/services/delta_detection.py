@@ -0,0 +1,77 @@
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models import AnalysisReport
+from app.utils.hashing import url_hash
+
+DELTA_DETECTION_ENABLED = os.getenv("DELTA_DETECTION_ENABLED", "true").lower() == "true"
+# Relative price move and relative implied volatility change that trigger a new analysis
+DELTA_PRICE_THRESHOLD = float(os.getenv("DELTA_PRICE_THRESHOLD", "0.02"))
+DELTA_IV_THRESHOLD = float(os.getenv("DELTA_IV_THRESHOLD", "0.10"))
+# New (non-issue) articles tolerated before re-analyzing; issue-flagged articles always count
+DELTA_MAX_NEW_ARTICLES = int(os.getenv("DELTA_MAX_NEW_ARTICLES", "0"))
+# A report is re-generated at least this often, however quiet the stock
+DELTA_MAX_AGE_HOURS = float(os.getenv("DELTA_MAX_AGE_HOURS", "72"))
+
+def _float(value) -> Optional[float]:
+    """Plain float for JSON storage; missing and NaN values become None"""
+    if value is None or value != value:
+        return None
+    return float(value)
+
+def input_baseline(stock_data: Dict, news_data: List[Dict], earnings_data: Dict,
+                   options_data: Optional[Dict]) -> Dict:
+    """Compact record of the inputs a report is based on, stored with the report"""
+    best_call = options_data['calls'][0] if options_data and options_data.get('calls') else None
+    earnings = [
+        f"{kind}:{str(event['event_date'])[:10]}:{event.get('eps_actual')}"
+        for kind in ('upcoming', 'historical') for event in earnings_data.get(kind, [])
+    ]
+    return {
+        'analyzed_at': datetime.utcnow().isoformat(),
+        'price': _float(stock_data['price']),
+        'implied_vol': _float(best_call.get('implied_vol')) if best_call else None,
+        'has_options': options_data is not None,
+        'news': sorted(url_hash(article['url']) for article in news_data),
+        'issue_news': sorted(url_hash(article['url']) for article in news_data if article.get('is_issue_flag')),
+        'earnings': sorted(earnings),
+    }
+
+def _relative_change(old: Optional[float], new: Optional[float]) -> float:
+    if old is None or new is None:
+        return 0.0 if old == new else float('inf')
+    if old == 0:
+        return 0.0 if new == 0 else float('inf')
+    return abs(new - old) / abs(old)
+
+def detect_changes(baseline: Dict, current: Dict, now: Optional[datetime] = None) -> List[str]:
+    """Reasons the current inputs differ materially from a report's baseline"""
+    now = now or datetime.utcnow()
+    reasons = []
+    if now - datetime.fromisoformat(baseline['analyzed_at']) > timedelta(hours=DELTA_MAX_AGE_HOURS):
+        reasons.append('stale')
+    if _relative_change(baseline['price'], current['price']) > DELTA_PRICE_THRESHOLD:
+        reasons.append('price')
+    if baseline['has_options'] != current['has_options'] or \
+            _relative_change(baseline['implied_vol'], current['implied_vol']) > DELTA_IV_THRESHOLD:
+        reasons.append('options')
+    new_articles = set(current['news']) - set(baseline['news'])
+    if len(new_articles) > DELTA_MAX_NEW_ARTICLES or new_articles & set(current['issue_news']):
+        reasons.append('news')
+    if set(current['earnings']) != set(baseline['earnings']):
+        reasons.append('earnings')
+    return reasons
+
+def find_unchanged_report(db: Session, stock_id: int, baseline: Dict, model: str) -> Optional[AnalysisReport]:
+    """The stock's newest report when its inputs have not materially changed since"""
+    if not DELTA_DETECTION_ENABLED:
+        return None
+    report = db.scalar(select(AnalysisReport).where(
+        AnalysisReport.stock_id == stock_id
+    ).order_by(AnalysisReport.created_at.desc()).limit(1))
+    # Failed analyses (no input hash) and reports from before baselines existed are redone
+    if not report or not report.input_baseline or report.input_hash is None or report.llm_model != model:
+        return None
+    return None if detect_changes(report.input_baseline, baseline) else report
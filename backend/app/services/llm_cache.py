@@ -0,0 +1,106 @@
+import hashlib
+import json
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy.orm import Session
+from app.models import AnalysisReport
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+# Relative band (e.g. 0.01 = 1%) within which price fields are considered unchanged
+LLM_CACHE_PRICE_TOLERANCE = float(os.getenv("LLM_CACHE_PRICE_TOLERANCE", "0.01"))
+# Reports older than this are never reused, even when the input is unchanged
+LLM_CACHE_MAX_AGE_HOURS = float(os.getenv("LLM_CACHE_MAX_AGE_HOURS", "24"))
+
+# Fields whose values are banded by LLM_CACHE_PRICE_TOLERANCE before hashing
+PRICE_FIELDS = {
+    'price', 'market_cap', 'high_52w', 'low_52w', 'underlying_price',
+    'bid', 'ask', 'premium', 'eps_actual', 'eps_estimate'
+}
+# Implied volatility is hashed to whole vol points
+IMPLIED_VOL_STEP = 0.01
+# Fields that change on every fetch without changing what the model sees. Option
+# delta, theta and yield move with every tick of the underlying but follow from
+# hashed fields (strike, bid, implied vol, expiry and the banded underlying price)
+VOLATILE_FIELDS = {'as_of', 'delta', 'theta', 'annualized_yield'}
+
+def _band(value: float, tolerance: float) -> float:
+    """Map a positive value onto a logarithmic bucket of the given relative width"""
+    if tolerance <= 0 or value <= 0:
+        return round(value, 6)
+    return float(round(math.log(value) / math.log1p(tolerance)))
+
+def normalize_input(data: Any, tolerance: float = LLM_CACHE_PRICE_TOLERANCE, key: str = None) -> Any:
+    """Reduce analysis input to the parts that should change the LLM's answer"""
+    if isinstance(data, dict):
+        return {
+            k: normalize_input(v, tolerance, k)
+            for k, v in data.items() if k not in VOLATILE_FIELDS
+        }
+    if isinstance(data, (list, tuple)):
+        return [normalize_input(v, tolerance, key) for v in data]
+    if hasattr(data, 'item') and not isinstance(data, (str, bytes)):
+        # NumPy scalars from provider frames
+        data = data.item()
+    if isinstance(data, bool) or data is None:
+        return data
+    if isinstance(data, (int, float)):
+        value = float(data)
+        if math.isnan(value):
+            return None
+        if key in PRICE_FIELDS:
+            return _band(value, tolerance)
+        if key == 'implied_vol':
+            return round(round(value / IMPLIED_VOL_STEP) * IMPLIED_VOL_STEP, 6)
+        return float(f"{value:.4g}")
+    if isinstance(data, datetime):
+        return data.date().isoformat()
+    if key == 'published_at' and isinstance(data, str):
+        # News timestamps only matter to the day
+        return data[:10]
+    if hasattr(data, 'isoformat'):
+        return data.isoformat()
+    return str(data)
+
+def analysis_input_hash(analysis_data: Dict, model: str,
+                        tolerance: float = LLM_CACHE_PRICE_TOLERANCE) -> str:
+    """Stable content hash of the normalized prompt input and model"""
+    payload = {'model': model, 'input': normalize_input(analysis_data, tolerance)}
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+def find_cached_report(db: Session, input_hash: str, model: str) -> Optional[AnalysisReport]:
+    """Newest report the model produced from the same input, if still fresh.
+
+    Only reports that came from the model count: copies made by cache hits
+    and carry-forwards would otherwise restart the age on every reuse.
+    Failed analyses are stored without an input hash and never match.
+    """
+    if not LLM_CACHE_ENABLED:
+        return None
+    return db.query(AnalysisReport).filter(
+        AnalysisReport.input_hash == input_hash,
+        AnalysisReport.llm_model == model,
+        AnalysisReport.carried_from_id.is_(None),
+        AnalysisReport.created_at >= datetime.utcnow() - timedelta(hours=LLM_CACHE_MAX_AGE_HOURS)
+    ).order_by(AnalysisReport.created_at.desc()).first()
+
+def report_payload(report: AnalysisReport) -> Dict:
+    """Rebuild the analyze_stock result stored in a report"""
+    return {
+        'summary_markdown': report.summary_markdown,
+        'entry': {
+            'rating': report.entry_rating.value if report.entry_rating else None,
+            'rationale': report.entry_comment
+        },
+        'covered_call': {
+            'rating': report.covered_call_rating.value if report.covered_call_rating else None,
+            'rationale': report.covered_call_comment
+        },
+        'secured_put': {
+            'rating': report.secured_put_rating.value if report.secured_put_rating else None,
+            'rationale': report.secured_put_comment
+        },
+        'risks_and_issues': report.risk_flags or []
+    }
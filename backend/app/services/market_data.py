@@ -1,52 +1,271 @@
 import aiohttp
+import asyncio
 import os
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
 import yfinance as yf
+from app.services.cache import MarketDataCache, get_cache
+from app.services.options_analytics import (
+    OPTIONS_MAX_DTE, OPTIONS_MIN_DTE, TARGET_CALL_DELTA, TARGET_PUT_DELTA,
+    analyze_chain, chain_frame, contract_records, expirations_in_window, pack_chain, select_by_delta
+)
+from app.services.provider_executor import ProviderExecutor, provider_executor
+
+# Tickers per batched yf.download call (universe ranking and daily bar history)
+QUOTE_BATCH_SIZE = int(os.getenv("QUOTE_BATCH_SIZE", "200"))
+
+# For demonstration, using a predefined list of large-cap stocks
+# In production, this would come from the market data API
+LARGE_CAP_UNIVERSE = [
+    "AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "META", "NVDA", "JPM",
+    "JNJ", "V", "PG", "UNH", "HD", "MA", "DIS", "PYPL", "ADBE",
+    "NFLX", "CRM", "PEP"
+]
+
+QUOTE_COLUMNS = ['price', 'open_price', 'day_high', 'day_low', 'volume', 'market_cap']
+
+# yf.download columns kept for daily bar history
+BAR_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# ticker.info fields cached under the fundamentals TTL; live fields such as
+# currentPrice and marketCap come from the short-lived quote instead
+FUNDAMENTAL_FIELDS = [
+    'longName', 'exchange', 'sector', 'industry', 'sharesOutstanding',
+    'fiftyTwoWeekHigh', 'fiftyTwoWeekLow', 'trailingPE', 'dividendYield', 'beta'
+]
 
 class MarketDataService:
-    def __init__(self):
+    def __init__(self, cache: Optional[MarketDataCache] = None):
         self.api_key = os.getenv("MARKET_DATA_API_KEY")
         self.base_url = "https://api.polygon.io"  # Using Polygon.io as default
+        self.cache = cache or get_cache()
+        self._memo_lock = threading.Lock()
+        self.reset_run_cache()
+    
+    def reset_run_cache(self):
+        """Drop memoized Ticker objects and payloads at the start of a run"""
+        with self._memo_lock:
+            self._tickers: Dict[str, yf.Ticker] = {}
+            self._info: Dict[str, Dict] = {}
+            self._stock_data: Dict[str, Dict] = {}
+            self._quotes = pd.DataFrame(columns=QUOTE_COLUMNS)
+            self._symbol_locks: Dict[str, threading.Lock] = {}
+            self.request_counts = Counter()
+    
+    def request_stats(self) -> Dict[str, int]:
+        """Upstream provider requests issued since the last reset, by kind"""
+        with self._memo_lock:
+            return {'total': sum(self.request_counts.values()), **self.request_counts}
     
-    async def get_top_stocks_by_market_cap(self, limit: int = 20) -> List[Dict]:
+    def _count_request(self, kind: str):
+        with self._memo_lock:
+            self.request_counts[kind] += 1
+    
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        with self._memo_lock:
+            return self._symbol_locks.setdefault(symbol, threading.Lock())
+    
+    def _get_ticker(self, symbol: str) -> yf.Ticker:
+        """Run-scoped yf.Ticker shared by every fetch for the symbol"""
+        with self._memo_lock:
+            ticker = self._tickers.get(symbol)
+            if ticker is None:
+                ticker = self._tickers[symbol] = yf.Ticker(symbol)
+            return ticker
+    
+    def _get_info(self, symbol: str) -> Dict:
+        """Run-scoped fundamentals from ticker.info, fetched at most once per symbol"""
+        with self._symbol_lock(symbol):
+            if symbol not in self._info:
+                info = self.cache.get('fundamentals', symbol)
+                if info is None:
+                    self._count_request('info')
+                    payload = self._get_ticker(symbol).info or {}
+                    info = {field: payload[field] for field in FUNDAMENTAL_FIELDS if payload.get(field) is not None}
+                    if info:
+                        self.cache.set('fundamentals', symbol, info)
+                self._info[symbol] = info
+            return self._info[symbol]
+    
+    async def get_top_stocks_by_market_cap(self, limit: int = 20,
+                                           universe: Optional[List[str]] = None) -> List[Dict]:
         """Get top stocks by market cap"""
         try:
-            # For demonstration, using a predefined list of large-cap stocks
-            # In production, this would call the actual API
-            large_cap_stocks = [
-                "AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "META", "NVDA", "JPM",
-                "JNJ", "V", "PG", "UNH", "HD", "MA", "DIS", "PYPL", "ADBE",
-                "NFLX", "CRM", "PEP"
-            ]
-            
-            stock_data = []
-            for symbol in large_cap_stocks[:limit]:
-                data = await self.get_stock_data(symbol)
-                if data:
-                    stock_data.append(data)
+            quotes = await self.get_bulk_quotes(universe or LARGE_CAP_UNIVERSE)
+            if quotes.empty:
+                return []
             
             # Sort by market cap
-            stock_data.sort(key=lambda x: x.get('market_cap', 0), reverse=True)
-            return stock_data
+            top = quotes.sort_values('market_cap', ascending=False).head(limit)
+            return [{'symbol': symbol, **row} for symbol, row in top.to_dict('index').items()]
             
         except Exception as e:
             print(f"Error fetching top stocks: {e}")
             return []
     
+    async def get_bulk_quotes(self, symbols: List[str]) -> pd.DataFrame:
+        """Get latest OHLCV and market cap for many symbols as a frame indexed by symbol"""
+        symbols = list(dict.fromkeys(symbols))
+        
+        # Only download bars that are not already cached
+        cached = {symbol: self.cache.get('quote', f"{symbol}:bar") for symbol in symbols}
+        missing = [symbol for symbol, bar in cached.items() if bar is None]
+        batches = [missing[i:i + QUOTE_BATCH_SIZE] for i in range(0, len(missing), QUOTE_BATCH_SIZE)]
+        frames = await asyncio.gather(*[
+            provider_executor.run(self._download_quotes, batch) for batch in batches
+        ])
+        bars = {symbol: bar for symbol, bar in cached.items() if bar is not None}
+        for frame in frames:
+            for symbol, bar in frame.to_dict('index').items():
+                self.cache.set('quote', f"{symbol}:bar", bar)
+                bars[symbol] = bar
+        if not bars:
+            return pd.DataFrame(columns=QUOTE_COLUMNS)
+        quotes = pd.DataFrame.from_dict(bars, orient='index', columns=QUOTE_COLUMNS)
+        
+        # Market cap is derived from the batched price and cached share counts
+        shares = {symbol: self.cache.get('fundamentals', f"{symbol}:shares") for symbol in quotes.index}
+        missing = [symbol for symbol, count in shares.items() if count is None]
+        fetched = await asyncio.gather(*[provider_executor.run(self._fetch_shares, symbol) for symbol in missing])
+        shares.update(zip(missing, fetched))
+        quotes['market_cap'] = quotes['price'] * quotes.index.map(lambda symbol: shares[symbol] or 0).astype(float)
+        
+        # Hand the quotes to the analysis stage so they are not fetched again
+        with self._memo_lock:
+            self._quotes = pd.concat([self._quotes.drop(quotes.index, errors='ignore'), quotes])
+        return quotes
+    
+    def _download_quotes(self, symbols: List[str]) -> pd.DataFrame:
+        """Blocking batched yf.download of the latest daily bar for each symbol"""
+        try:
+            self._count_request('download')
+            data = yf.download(symbols, period="5d", interval="1d", group_by="ticker",
+                               threads=True, progress=False)
+        except Exception as e:
+            print(f"Error downloading quotes: {e}")
+            return pd.DataFrame(columns=QUOTE_COLUMNS)
+        
+        rows = {}
+        grouped = isinstance(data.columns, pd.MultiIndex)
+        for symbol in symbols:
+            if grouped and symbol not in data.columns.get_level_values(0):
+                continue
+            bars = (data[symbol] if grouped else data).dropna(subset=['Close'])
+            if bars.empty:
+                continue
+            last = bars.iloc[-1]
+            rows[symbol] = {
+                'price': float(last['Close']),
+                'open_price': float(last['Open']),
+                'day_high': float(last['High']),
+                'day_low': float(last['Low']),
+                'volume': int(last['Volume']),
+                'market_cap': 0.0
+            }
+        return pd.DataFrame.from_dict(rows, orient='index', columns=QUOTE_COLUMNS)
+    
+    async def download_daily_bars(self, symbols: List[str], start: Optional[date] = None, period: str = "max",
+                                  executor: ProviderExecutor = provider_executor) -> Dict[str, Dict[str, np.ndarray]]:
+        """Unadjusted daily bars per symbol, from start (inclusive) or over a period such as 10y.
+        
+        Each symbol's bars are plain column arrays: date, open, high, low, close, volume.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        batches = [symbols[i:i + QUOTE_BATCH_SIZE] for i in range(0, len(symbols), QUOTE_BATCH_SIZE)]
+        frames = await asyncio.gather(*[
+            executor.run(self._download_bars, batch, start, period) for batch in batches
+        ])
+        return {symbol: bars for frame in frames for symbol, bars in frame.items()}
+    
+    def _download_bars(self, symbols: List[str], start: Optional[date], period: str) -> Dict[str, Dict[str, np.ndarray]]:
+        """Blocking batched yf.download of daily bars"""
+        window = {'start': start.isoformat()} if start else {'period': period}
+        try:
+            self._count_request('bars')
+            data = yf.download(symbols, interval="1d", group_by="ticker", auto_adjust=False, actions=False,
+                               threads=True, progress=False, **window)
+        except Exception as e:
+            print(f"Error downloading daily bars: {e}")
+            return {}
+        if data.empty:
+            return {}
+        
+        # One conversion for the whole batch: rows x symbols x fields
+        if isinstance(data.columns, pd.MultiIndex):
+            symbols = [symbol for symbol in symbols if symbol in data.columns.get_level_values(0)]
+            columns = pd.MultiIndex.from_product([symbols, BAR_FIELDS])
+        else:
+            symbols, columns = symbols[:1], BAR_FIELDS
+        values = data.reindex(columns=columns).to_numpy(dtype=float).reshape(len(data), len(symbols), len(BAR_FIELDS))
+        dates = pd.DatetimeIndex(data.index).tz_localize(None).to_numpy().astype('datetime64[D]')
+        
+        bars = {}
+        for i, symbol in enumerate(symbols):
+            rows = values[:, i, :]
+            traded = ~np.isnan(rows[:, 3])
+            if traded.any():
+                bars[symbol] = {'date': dates[traded], **{
+                    field.lower(): rows[traded, j] for j, field in enumerate(BAR_FIELDS)
+                }}
+        return bars
+    
+    def _fetch_shares(self, symbol: str) -> Optional[int]:
+        """Blocking lookup of shares outstanding for market cap ranking"""
+        try:
+            self._count_request('shares')
+            shares = self._get_ticker(symbol).fast_info['shares']
+            if shares:
+                self.cache.set('fundamentals', f"{symbol}:shares", int(shares))
+                return int(shares)
+        except Exception as e:
+            print(f"Error fetching shares outstanding for {symbol}: {e}")
+        return None
+    
     async def get_stock_data(self, symbol: str) -> Optional[Dict]:
         """Get comprehensive stock data"""
+        if symbol in self._stock_data:
+            return self._stock_data[symbol]
+        stock_data = self.cache.get('quote', symbol)
+        if stock_data is None:
+            stock_data = await provider_executor.run(self._fetch_stock_data, symbol)
+            if stock_data:
+                self.cache.set('quote', symbol, stock_data)
+        if stock_data:
+            self._stock_data[symbol] = stock_data
+        return stock_data
+    
+    def _fetch_stock_data(self, symbol: str) -> Optional[Dict]:
+        """Blocking yfinance fetch for get_stock_data"""
         try:
             # Using yfinance as a fallback for demonstration
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
+            ticker = self._get_ticker(symbol)
+            info = self._get_info(symbol)
             
             if not info:
                 return None
             
-            # Get current quote
-            hist = ticker.history(period="1d")
-            current_price = hist['Close'].iloc[-1] if not hist.empty else info.get('currentPrice', 0)
+            # Get current quote, reusing the batched ranking quote when available
+            if symbol in self._quotes.index:
+                quote = self._quotes.loc[symbol].to_dict()
+            else:
+                # The last session's bar, also when today has not traded yet
+                self._count_request('history')
+                hist = ticker.history(period="5d").dropna(subset=['Close'])
+                if hist.empty:
+                    return None
+                quote = {
+                    'price': float(hist['Close'].iloc[-1]),
+                    'open_price': float(hist['Open'].iloc[-1]),
+                    'day_high': float(hist['High'].iloc[-1]),
+                    'day_low': float(hist['Low'].iloc[-1]),
+                    'volume': hist['Volume'].iloc[-1],
+                    'market_cap': 0.0
+                }
+            current_price = quote['price']
             
             return {
                 'symbol': symbol,
@@ -54,12 +273,12 @@ class MarketDataService:
                 'exchange': info.get('exchange', 'NASDAQ'),
                 'sector': info.get('sector'),
                 'industry': info.get('industry'),
-                'market_cap': info.get('marketCap', 0),
+                'market_cap': quote['market_cap'] or current_price * info.get('sharesOutstanding', 0),
                 'price': current_price,
-                'open_price': hist['Open'].iloc[-1] if not hist.empty else current_price,
-                'day_high': hist['High'].iloc[-1] if not hist.empty else current_price,
-                'day_low': hist['Low'].iloc[-1] if not hist.empty else current_price,
-                'volume': int(hist['Volume'].iloc[-1]) if not hist.empty else 0,
+                'open_price': quote['open_price'],
+                'day_high': quote['day_high'],
+                'day_low': quote['day_low'],
+                'volume': int(quote['volume']),
                 'high_52w': info.get('fiftyTwoWeekHigh', current_price),
                 'low_52w': info.get('fiftyTwoWeekLow', current_price),
                 'pe_ratio': info.get('trailingPE'),
@@ -74,10 +293,20 @@ class MarketDataService:
     
     async def get_earnings_data(self, symbol: str) -> Dict:
         """Get earnings data"""
+        earnings_data = self.cache.get('earnings', symbol)
+        if earnings_data is None:
+            earnings_data = await provider_executor.run(self._fetch_earnings_data, symbol)
+            if earnings_data['upcoming'] or earnings_data['historical']:
+                self.cache.set('earnings', symbol, earnings_data)
+        return earnings_data
+    
+    def _fetch_earnings_data(self, symbol: str) -> Dict:
+        """Blocking yfinance fetch for get_earnings_data"""
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._get_ticker(symbol)
             
             # Get earnings calendar
+            self._count_request('calendar')
             calendar = ticker.calendar
             earnings_data = {
                 'upcoming': [],
@@ -93,6 +322,7 @@ class MarketDataService:
                     })
             
             # Get historical earnings
+            self._count_request('earnings_dates')
             earnings_history = ticker.earnings_dates
             if earnings_history is not None and not earnings_history.empty:
                 for date, row in earnings_history.head(4).iterrows():
@@ -112,72 +342,90 @@ class MarketDataService:
     async def get_options_data(self, symbol: str) -> Optional[Dict]:
         """Get options data for covered calls and cash-secured puts"""
         try:
-            ticker = yf.Ticker(symbol)
-            
-            # Get options expiration dates
-            exp_dates = ticker.options
-            if not exp_dates:
+            analyzed_chain = await self.get_analyzed_chain(symbol)
+            if not analyzed_chain:
                 return None
             
-            # Get options for nearest expiration (30-60 days out)
-            target_date = None
-            current_date = datetime.now().date()
-            
-            for exp_date in exp_dates:
-                exp_date_obj = datetime.strptime(exp_date, '%Y-%m-%d').date()
-                days_to_expiry = (exp_date_obj - current_date).days
-                
-                if 30 <= days_to_expiry <= 60:
-                    target_date = exp_date
-                    break
-            
-            if not target_date:
-                target_date = exp_dates[0]  # Use nearest expiration
-            
-            # Get options chain
-            opt = ticker.option_chain(target_date)
-            
-            if opt.calls is None or opt.puts is None:
+            # Strikes picked by target delta from the whole analyzed chain
+            current_price, analyzed = analyzed_chain
+            calls = contract_records(select_by_delta(analyzed, 'call', TARGET_CALL_DELTA))
+            # Puts come from the best call's expiration when it lists any, so both
+            # legs share the expiration_date and days_to_expiry reported below
+            same_expiry = analyzed[analyzed['expiration_date'] == calls[0]['expiration_date']] if calls else analyzed
+            puts = contract_records(select_by_delta(same_expiry, 'put', TARGET_PUT_DELTA)) or \
+                contract_records(select_by_delta(analyzed, 'put', TARGET_PUT_DELTA))
+            if not calls and not puts:
                 return None
             
-            current_price = ticker.info.get('currentPrice', 0)
-            
-            # Find near-the-money options
-            calls = opt.calls[opt.calls['strike'] >= current_price].head(3)
-            puts = opt.puts[opt.puts['strike'] <= current_price].tail(3)
-            
-            options_data = {
+            best = calls[0] if calls else puts[0]
+            return {
                 'underlying_price': current_price,
-                'expiration_date': target_date,
-                'days_to_expiry': (datetime.strptime(target_date, '%Y-%m-%d').date() - current_date).days,
-                'calls': [],
-                'puts': []
+                'expiration_date': best['expiration_date'],
+                'days_to_expiry': best['days_to_expiry'],
+                'calls': calls,
+                'puts': puts
             }
             
-            # Process calls (for covered calls)
-            for _, call in calls.iterrows():
-                options_data['calls'].append({
-                    'strike': call['strike'],
-                    'bid': call['bid'],
-                    'ask': call['ask'],
-                    'implied_vol': call.get('impliedVolatility'),
-                    'delta': call.get('delta'),
-                    'premium': call['bid']  # Use bid price
-                })
-            
-            # Process puts (for cash-secured puts)
-            for _, put in puts.iterrows():
-                options_data['puts'].append({
-                    'strike': put['strike'],
-                    'bid': put['bid'],
-                    'ask': put['ask'],
-                    'implied_vol': put.get('impliedVolatility'),
-                    'delta': put.get('delta'),
-                    'premium': put['bid']  # Use bid price
-                })
-            
-            return options_data
-            
         except Exception as e:
             print(f"Error fetching options for {symbol}: {e}")
-            return None
\ No newline at end of file
+            return None
+    
+    async def get_analyzed_chain(self, symbol: str, min_dte: int = OPTIONS_MIN_DTE,
+                                 max_dte: int = OPTIONS_MAX_DTE) -> Optional[Tuple[float, pd.DataFrame]]:
+        """Underlying price and the chain of the DTE window with Greeks and yields"""
+        # Spot comes from the short-TTL quote, so it is never older than the chains
+        chain, stock_data = await asyncio.gather(self.get_option_chain(symbol, min_dte, max_dte),
+                                                 self.get_stock_data(symbol))
+        current_price = stock_data.get('price') if stock_data else None
+        if chain is None or not current_price or not np.isfinite(current_price):
+            # Greeks and yields are meaningless without a spot price
+            return None
+        return current_price, analyze_chain(chain, current_price, date.today())
+    
+    async def get_option_chain(self, symbol: str, min_dte: int = OPTIONS_MIN_DTE,
+                               max_dte: int = OPTIONS_MAX_DTE) -> Optional[pd.DataFrame]:
+        """Chains of every expiration within the DTE window (or the nearest one).
+        
+        Each expiration is cached separately, so overlapping windows share
+        entries; the expirations missing from the cache are fetched concurrently.
+        """
+        expirations = self.cache.get('options', f"{symbol}:expirations")
+        if expirations is None:
+            expirations = await provider_executor.run(self._fetch_expirations, symbol)
+            if expirations:
+                self.cache.set('options', f"{symbol}:expirations", expirations)
+        if not expirations:
+            return None
+        
+        selected = expirations_in_window(expirations, date.today(), min_dte, max_dte)
+        chains = {expiry: self.cache.get('options', f"{symbol}:{expiry}") for expiry in selected}
+        missing = [expiry for expiry, chain in chains.items() if chain is None]
+        fetched = await asyncio.gather(*[
+            provider_executor.run(self._fetch_expiry_chain, symbol, expiry) for expiry in missing
+        ])
+        for expiry, chain in zip(missing, fetched):
+            if chain is not None:
+                self.cache.set('options', f"{symbol}:{expiry}", chain)
+            chains[expiry] = chain
+        
+        chains = {expiry: chain for expiry, chain in chains.items() if chain is not None and len(chain['is_call'])}
+        return chain_frame(chains) if chains else None
+    
+    def _fetch_expirations(self, symbol: str) -> List[str]:
+        """Blocking yfinance lookup of the listed option expiration dates"""
+        try:
+            self._count_request('options')
+            return list(self._get_ticker(symbol).options)
+        except Exception as e:
+            print(f"Error fetching option expirations for {symbol}: {e}")
+            return []
+    
+    def _fetch_expiry_chain(self, symbol: str, expiry: str) -> Optional[Dict]:
+        """Blocking yfinance fetch of one expiration's chain in packed form"""
+        try:
+            self._count_request('option_chain')
+            opt = self._get_ticker(symbol).option_chain(expiry)
+            return pack_chain(opt.calls, opt.puts)
+        except Exception as e:
+            print(f"Error fetching {expiry} options for {symbol}: {e}")
+            return None
@@ -3,14 +3,26 @@ import os
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 import feedparser
+from app.services.cache import MarketDataCache, get_cache
 
 class NewsService:
-    def __init__(self):
+    def __init__(self, cache: Optional[MarketDataCache] = None):
         self.api_key = os.getenv("NEWS_API_KEY")
         self.base_url = "https://newsapi.org/v2"
+        self.cache = cache or get_cache()
     
     async def get_stock_news(self, symbol: str, days_back: int = 7) -> List[Dict]:
         """Get recent news for a stock"""
+        cache_key = f"{symbol}:{days_back}"
+        news = self.cache.get('news', cache_key)
+        if news is None:
+            news = await self._fetch_stock_news(symbol, days_back)
+            if news:
+                self.cache.set('news', cache_key, news)
+        return news
+    
+    async def _fetch_stock_news(self, symbol: str, days_back: int) -> List[Dict]:
+        """Fetch recent news for a stock from the provider"""
         try:
             # For demonstration, using a mock news service
             # In production, this would call NewsAPI or similar service
@@ -0,0 +1,157 @@
+"""Daily OHLCV history in per-symbol memory-mapped files.
+
+Each symbol's bars are fixed-size BAR_DTYPE records appended to
+OHLCV_STORE_DIR/<SYMBOL>.bars in date order. Reading maps the file
+read-only and wraps the map in a NumPy array, so loading thousands of
+symbols copies nothing and pages are only read when touched.
+
+Ingestion backfills OHLCV_BACKFILL_YEARS of bars the first time a symbol
+is seen and afterwards downloads only the days after its last stored bar.
+Only completed sessions (before today) are stored. Bars are unadjusted, so
+stored history never changes after a split or dividend.
+
+    python -m app.services.ohlcv_store ingest [SYMBOL ...]
+"""
+import asyncio
+import mmap
+import os
+import sys
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from app.services.market_data import LARGE_CAP_UNIVERSE, MarketDataService
+from app.services.provider_executor import ProviderExecutor
+
+OHLCV_STORE_ENABLED = os.getenv("OHLCV_STORE_ENABLED", "true").lower() == "true"
+OHLCV_STORE_DIR = os.getenv("OHLCV_STORE_DIR", "data/ohlcv")
+# Years of daily bars downloaded for a symbol without history
+OHLCV_BACKFILL_YEARS = int(os.getenv("OHLCV_BACKFILL_YEARS", "10"))
+# Threads for bar downloads; kept apart from provider_executor so a long backfill
+# never queues ahead of the analyses' quote, options and news fetches
+OHLCV_INGEST_WORKERS = int(os.getenv("OHLCV_INGEST_WORKERS", "2"))
+
+ingest_executor = ProviderExecutor(OHLCV_INGEST_WORKERS, thread_name_prefix="ohlcv-ingest")
+
+BAR_DTYPE = np.dtype([
+    ('date', 'datetime64[D]'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'), ('volume', '<i8'),
+])
+
+def previous_session(today: date) -> np.datetime64:
+    """The last weekday before today; exchange holidays are not known"""
+    return np.busday_offset(np.datetime64(today, 'D'), -1, roll='forward')
+
+def bars_from_columns(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """BAR_DTYPE records from per-field arrays (as returned by download_daily_bars)"""
+    bars = np.empty(len(columns['date']), dtype=BAR_DTYPE)
+    for field in BAR_DTYPE.names:
+        bars[field] = np.nan_to_num(columns[field]) if field == 'volume' else columns[field]
+    return bars
+
+class OHLCVStore:
+    """Append-only per-symbol bar files under one directory"""
+
+    def __init__(self, root: str = OHLCV_STORE_DIR):
+        self.root = root
+
+    def path(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{symbol.upper().replace('/', '_')}.bars")
+
+    def load(self, symbol: str) -> np.ndarray:
+        """Read-only array over a memory map of a symbol's bars (empty when it has none)"""
+        try:
+            with open(self.path(symbol), 'rb') as f:
+                # A record still being appended is not part of the map
+                size = os.fstat(f.fileno()).st_size // BAR_DTYPE.itemsize * BAR_DTYPE.itemsize
+                if not size:
+                    return np.empty(0, dtype=BAR_DTYPE)
+                return np.frombuffer(mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ), dtype=BAR_DTYPE)
+        except FileNotFoundError:
+            return np.empty(0, dtype=BAR_DTYPE)
+
+    def load_many(self, symbols: Sequence[str]) -> Dict[str, np.ndarray]:
+        return {symbol: self.load(symbol) for symbol in symbols}
+
+    def last_date(self, symbol: str) -> Optional[date]:
+        """Date of the newest stored bar, read without mapping the file"""
+        try:
+            with open(self.path(symbol), 'rb') as f:
+                count = os.fstat(f.fileno()).st_size // BAR_DTYPE.itemsize
+                if not count:
+                    return None
+                f.seek((count - 1) * BAR_DTYPE.itemsize)
+                return np.frombuffer(f.read(BAR_DTYPE.itemsize), dtype=BAR_DTYPE)['date'][0].item()
+        except FileNotFoundError:
+            return None
+
+    def frame(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+        """Bars between start and end (inclusive) as a DataFrame indexed by date"""
+        bars = self.load(symbol)
+        dates = bars['date']
+        lo = np.searchsorted(dates, np.datetime64(start, 'D')) if start else 0
+        hi = np.searchsorted(dates, np.datetime64(end, 'D'), side='right') if end else len(bars)
+        window = bars[lo:hi]
+        return pd.DataFrame({column: window[column] for column in BAR_DTYPE.names[1:]},
+                            index=pd.DatetimeIndex(window['date'], name='date'))
+
+    def append(self, symbol: str, bars: np.ndarray) -> int:
+        """Append bars newer than the last stored one; returns the number written"""
+        bars = np.sort(bars.astype(BAR_DTYPE, copy=False), order='date')
+        last = self.last_date(symbol)
+        if last is not None:
+            bars = bars[bars['date'] > np.datetime64(last, 'D')]
+        if len(bars):
+            # One bar per session
+            bars = bars[np.concatenate(([True], bars['date'][1:] != bars['date'][:-1]))]
+        if not len(bars):
+            return 0
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.path(symbol), 'ab') as f:
+            size = f.tell()
+            # Drop a partial record left by an interrupted append
+            if size % BAR_DTYPE.itemsize:
+                f.truncate(size - size % BAR_DTYPE.itemsize)
+            f.write(bars.tobytes())
+        return len(bars)
+
+async def ingest(symbols: Sequence[str], market_service: Optional[MarketDataService] = None, store: Optional[OHLCVStore] = None,
+                 today: Optional[date] = None) -> Dict[str, int]:
+    """Backfill new symbols and append the sessions each symbol is missing.
+
+    Symbols are grouped by the first missing day so each group is one
+    batched download; symbols that are already current cost no request.
+    """
+    market_service = market_service or MarketDataService()
+    store = store or OHLCVStore()
+    today = today or date.today()
+    up_to = previous_session(today)
+
+    groups: Dict[Optional[date], List[str]] = defaultdict(list)
+    for symbol in dict.fromkeys(symbols):
+        last = store.last_date(symbol)
+        if last is None:
+            groups[None].append(symbol)
+        elif np.datetime64(last, 'D') < up_to:
+            groups[last + timedelta(days=1)].append(symbol)
+
+    downloads = await asyncio.gather(*[
+        market_service.download_daily_bars(group, start=start, period=f"{OHLCV_BACKFILL_YEARS}y",
+                                           executor=ingest_executor)
+        for start, group in groups.items()
+    ])
+    stats = {'symbols': len(set(symbols)), 'backfilled': 0, 'updated': 0, 'bars_written': 0}
+    for (start, group), downloaded in zip(groups.items(), downloads):
+        for symbol, columns in downloaded.items():
+            bars = bars_from_columns(columns)
+            # Today's bar is still forming
+            written = store.append(symbol, bars[bars['date'] < np.datetime64(today, 'D')])
+            if written:
+                stats['backfilled' if start is None else 'updated'] += 1
+                stats['bars_written'] += written
+    return stats
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["ingest"]:
+        sys.exit("usage: python -m app.services.ohlcv_store ingest [SYMBOL ...]")
+    print(asyncio.run(ingest([symbol.upper() for symbol in sys.argv[2:]] or LARGE_CAP_UNIVERSE)))
@@ -1,31 +1,152 @@
 import openai
+import asyncio
+import httpx
 import json
 import os
+import random
+import threading
+import time
 from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 from app.models import UserSecrets
+from app.services.rate_limiter import llm_rate_limiter
 from app.utils.encryption import decrypt_key
 
-class OpenAIService:
-    def __init__(self, db: Session):
-        self.db = db
-        self.client = None
-        self._setup_client()
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4")
+
+# Retry policy for rate-limited (429) and server-side (5xx) failures
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+OPENAI_BACKOFF_BASE = float(os.getenv("OPENAI_BACKOFF_BASE", "1.0"))
+OPENAI_BACKOFF_MAX = float(os.getenv("OPENAI_BACKOFF_MAX", "60.0"))
+
+# Keep-alive connection pool shared by every OpenAIService in the process
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+# How long a decrypted key is trusted before UserSecrets is read again; other
+# processes do not see invalidate() calls, so this bounds their staleness
+OPENAI_SECRET_TTL = float(os.getenv("OPENAI_SECRET_TTL", "300"))
+
+class OpenAIClientRegistry:
+    """Process-wide cache of the decrypted OpenAI key and its pooled client"""
     
-    def _setup_client(self):
-        """Setup OpenAI client with API key"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._api_key: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._clients: Dict[str, openai.AsyncOpenAI] = {}
+        self._closing = set()
+    
+    def get_api_key(self, db: Session) -> Optional[str]:
+        """Decrypted API key, read from the database at most once per TTL"""
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < OPENAI_SECRET_TTL:
+                return self._api_key
+        
         # Try to get API key from database first
-        secrets = self.db.query(UserSecrets).first()
+        secrets = db.query(UserSecrets).first()
         if secrets and secrets.openai_api_key_encrypted:
             api_key = decrypt_key(secrets.openai_api_key_encrypted)
         else:
             # Fallback to environment variable
             api_key = os.getenv("OPENAI_API_KEY")
         
+        with self._lock:
+            self._api_key = api_key
+            self._loaded_at = time.monotonic()
+        return api_key
+    
+    def get_client(self, db: Session) -> openai.AsyncOpenAI:
+        """Long-lived client for the current key"""
+        api_key = self.get_api_key(db)
         if not api_key:
             raise ValueError("OpenAI API key not found")
         
-        self.client = openai.OpenAI(api_key=api_key)
+        with self._lock:
+            client = self._clients.get(api_key)
+            # Clients of a replaced key (e.g. rotated by another process) are closed
+            retired = [self._clients.pop(key) for key in list(self._clients) if key != api_key]
+            if client is None:
+                # Retries are handled by OpenAIService so they share the rate limiter's view of the quota
+                client = self._clients[api_key] = openai.AsyncOpenAI(
+                    api_key=api_key,
+                    max_retries=0,
+                    http_client=httpx.AsyncClient(
+                        timeout=OPENAI_TIMEOUT,
+                        limits=httpx.Limits(
+                            max_connections=OPENAI_MAX_CONNECTIONS,
+                            max_keepalive_connections=OPENAI_MAX_CONNECTIONS
+                        )
+                    )
+                )
+        self._close_later(retired)
+        return client
+    
+    def _close_later(self, clients: List[openai.AsyncOpenAI]):
+        """Close clients on the running loop without waiting for them"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Outside the event loop (scripts) there is nothing to schedule on
+            return
+        for client in clients:
+            task = loop.create_task(client.close())
+            # The loop only keeps weak references to tasks
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+    
+    async def invalidate(self):
+        """Forget the cached key and close its clients, e.g. after the key was updated"""
+        with self._lock:
+            self._api_key = None
+            self._loaded_at = None
+            retired = list(self._clients.values())
+            self._clients.clear()
+        # Each client owns an httpx connection pool
+        await asyncio.gather(*[client.close() for client in retired], return_exceptions=True)
+
+openai_client_registry = OpenAIClientRegistry()
+
+class OpenAIService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.client = None
+        self._setup_client()
+    
+    def _setup_client(self):
+        """Setup OpenAI client with API key"""
+        self.client = openai_client_registry.get_client(self.db)
+    
+    async def _create_completion(self, **kwargs):
+        """Rate-limited chat completion with backoff on 429, 5xx and connection errors"""
+        prompt_chars = sum(len(message['content']) for message in kwargs['messages'])
+        estimated_tokens = prompt_chars // 4 + kwargs.get('max_tokens', 0)
+        
+        for attempt in range(OPENAI_MAX_RETRIES + 1):
+            await llm_rate_limiter.acquire(estimated_tokens)
+            try:
+                response = await self.client.chat.completions.create(**kwargs)
+            except (openai.RateLimitError, openai.InternalServerError,
+                    openai.APIConnectionError) as e:
+                if attempt == OPENAI_MAX_RETRIES:
+                    raise
+                status_code = getattr(e, 'status_code', None)
+                llm_rate_limiter.record_retry(status_code)
+                
+                # Honour Retry-After when the API provides it, otherwise back off exponentially
+                retry_after = None
+                error_response = getattr(e, 'response', None)
+                if error_response is not None:
+                    try:
+                        retry_after = float(error_response.headers.get('retry-after'))
+                    except (TypeError, ValueError):
+                        retry_after = None
+                delay = retry_after or min(OPENAI_BACKOFF_MAX, OPENAI_BACKOFF_BASE * 2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay * 0.1))
+                continue
+            
+            if response.usage is not None:
+                await llm_rate_limiter.reconcile(estimated_tokens, response.usage.total_tokens)
+            return response
     
     async def analyze_stock(self, stock_data: Dict) -> Dict:
         """Analyze stock using OpenAI GPT"""
@@ -92,8 +213,8 @@ Please provide your analysis in the following JSON format:
 }}"""
             
             # Make API call
-            response = self.client.chat.completions.create(
-                model="gpt-4",
+            response = await self._create_completion(
+                model=OPENAI_MODEL,
                 messages=[
                     {"role": "system", "content": system_message},
                     {"role": "user", "content": user_message}
@@ -119,8 +240,10 @@ Please provide your analysis in the following JSON format:
                 return analysis_result
                 
             except json.JSONDecodeError as e:
-                # If JSON parsing fails, return structured response
+                # If JSON parsing fails, return structured response; it is marked
+                # failed so it is neither cached nor carried forward
                 return {
+                    "analysis_failed": True,
                     "summary_markdown": content,
                     "entry": {
                         "rating": "hold",
@@ -143,6 +266,7 @@ Please provide your analysis in the following JSON format:
         except Exception as e:
             print(f"Error in OpenAI analysis: {e}")
             return {
+                "analysis_failed": True,
                 "summary_markdown": f"Analysis failed: {str(e)}",
                 "entry": {
                     "rating": "hold",
@@ -165,7 +289,7 @@ Please provide your analysis in the following JSON format:
     async def test_connection(self) -> Dict:
         """Test OpenAI API connection"""
         try:
-            response = self.client.chat.completions.create(
+            response = await self._create_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "user", "content": "Hello, this is a test."}
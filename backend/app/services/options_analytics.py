@@ -0,0 +1,155 @@
+"""Vectorized Black-Scholes analytics for whole option chains.
+
+A chain is a DataFrame with one row per contract across any number of
+expirations (columns: option_type, expiration_date, strike, bid, ask,
+impliedVolatility). Greeks, yields and strike selection are computed with
+NumPy over all rows at once.
+
+Each expiration's chain is cached in a compact columnar form (see
+pack_chain): one NumPy array per column instead of the provider's
+DataFrame, and chain_frame joins cached expirations back into a chain.
+"""
+import os
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+# Annual risk-free rate used for pricing Greeks
+OPTIONS_RISK_FREE_RATE = float(os.getenv("OPTIONS_RISK_FREE_RATE", "0.045"))
+# Strikes are selected by the delta closest to these targets
+TARGET_CALL_DELTA = float(os.getenv("TARGET_CALL_DELTA", "0.30"))
+TARGET_PUT_DELTA = float(os.getenv("TARGET_PUT_DELTA", "-0.30"))
+# Expirations considered for covered calls and cash-secured puts, in days
+OPTIONS_MIN_DTE = int(os.getenv("OPTIONS_MIN_DTE", "21"))
+OPTIONS_MAX_DTE = int(os.getenv("OPTIONS_MAX_DTE", "60"))
+
+# Contracts per side handed to the analysis, best match first
+CANDIDATES_PER_SIDE = 3
+
+# Option chain columns used by the analytics engine
+CHAIN_COLUMNS = ['strike', 'bid', 'ask', 'impliedVolatility']
+
+def expirations_in_window(expirations: Sequence[str], today: date,
+                          min_dte: int = OPTIONS_MIN_DTE, max_dte: int = OPTIONS_MAX_DTE) -> List[str]:
+    """Expirations (YYYY-MM-DD) within the days-to-expiry window, or the nearest one"""
+    upcoming = [expiry for expiry in expirations if (date.fromisoformat(expiry) - today).days > 0]
+    in_window = [
+        expiry for expiry in upcoming
+        if min_dte <= (date.fromisoformat(expiry) - today).days <= max_dte
+    ]
+    return in_window or upcoming[:1]
+
+def pack_chain(calls: Optional[pd.DataFrame], puts: Optional[pd.DataFrame]) -> Dict[str, np.ndarray]:
+    """Columnar arrays of one expiration's calls and puts, as stored in the cache"""
+    sides = [(is_call, contracts) for is_call, contracts in ((True, calls), (False, puts))
+             if contracts is not None and not contracts.empty]
+    frame = pd.concat([contracts[CHAIN_COLUMNS] for _, contracts in sides]) if sides else pd.DataFrame(columns=CHAIN_COLUMNS)
+    packed = {column: frame[column].to_numpy(dtype=float) for column in CHAIN_COLUMNS}
+    packed['is_call'] = np.repeat([is_call for is_call, _ in sides], [len(contracts) for _, contracts in sides]).astype(bool)
+    return packed
+
+def chain_frame(chains: Dict[str, Dict[str, np.ndarray]]) -> pd.DataFrame:
+    """One chain DataFrame from packed chains keyed by expiration date"""
+    expirations, packed = list(chains), list(chains.values())
+    columns = {column: np.concatenate([chain[column] for chain in packed] or [np.empty(0)]) for column in CHAIN_COLUMNS}
+    is_call = np.concatenate([chain['is_call'] for chain in packed] or [np.empty(0, dtype=bool)])
+    columns['option_type'] = np.where(is_call, 'call', 'put')
+    columns['expiration_date'] = np.repeat(expirations, [len(chain['is_call']) for chain in packed])
+    return pd.DataFrame(columns)
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal CDF (Abramowitz & Stegun 7.1.26, absolute error < 1.5e-7)"""
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / np.sqrt(2.0 * np.pi)
+
+def black_scholes_greeks(spot: float, strike: np.ndarray, years: np.ndarray, vol: np.ndarray,
+                         is_call: np.ndarray, rate: float = OPTIONS_RISK_FREE_RATE,
+                         dividend_yield: float = 0.0) -> Dict[str, np.ndarray]:
+    """Delta and theta (per calendar day) of European options, elementwise"""
+    sqrt_t = np.sqrt(years)
+    d1 = (np.log(spot / strike) + (rate - dividend_yield + 0.5 * vol * vol) * years) / (vol * sqrt_t)
+    d2 = d1 - vol * sqrt_t
+    carry = np.exp(-dividend_yield * years)
+    discount = np.exp(-rate * years)
+    sign = np.where(is_call, 1.0, -1.0)
+
+    delta = np.where(is_call, carry * norm_cdf(d1), carry * (norm_cdf(d1) - 1.0))
+    theta = (
+        -spot * carry * norm_pdf(d1) * vol / (2.0 * sqrt_t)
+        - sign * rate * strike * discount * norm_cdf(sign * d2)
+        + sign * dividend_yield * spot * carry * norm_cdf(sign * d1)
+    ) / 365.0
+    return {'delta': delta, 'theta': theta}
+
+def analyze_chain(chain: pd.DataFrame, spot: float, today: Optional[date] = None,
+                  rate: float = OPTIONS_RISK_FREE_RATE, dividend_yield: float = 0.0) -> pd.DataFrame:
+    """Add days_to_expiry, delta, theta and annualized_yield to every quotable contract.
+
+    Covered-call yield is premium over the share price, cash-secured put
+    yield premium over the cash set aside (the strike), both annualized.
+    """
+    today = today or date.today()
+    # A chain has few distinct expirations; convert each once
+    codes, expirations = pd.factorize(chain['expiration_date'])
+    days = np.array([(pd.Timestamp(expiry).date() - today).days for expiry in expirations], dtype=float)[codes]
+    strike = chain['strike'].to_numpy(dtype=float)
+    bid = chain['bid'].to_numpy(dtype=float)
+    vol = chain['impliedVolatility'].to_numpy(dtype=float)
+    is_call = (chain['option_type'] == 'call').to_numpy()
+
+    # Contracts without a bid or a usable implied volatility cannot be sold or priced
+    valid = (days > 0) & (bid > 0) & (strike > 0) & np.isfinite(vol) & (vol > 0.01)
+    days, strike, bid, vol, is_call = days[valid], strike[valid], bid[valid], vol[valid], is_call[valid]
+    greeks = black_scholes_greeks(spot, strike, days / 365.0, vol, is_call, rate, dividend_yield)
+
+    return chain[valid].assign(
+        days_to_expiry=days.astype(int),
+        delta=greeks['delta'],
+        theta=greeks['theta'],
+        annualized_yield=bid / np.where(is_call, spot, strike) * 365.0 / days,
+    )
+
+def select_by_delta(analyzed: pd.DataFrame, option_type: str, target_delta: float,
+                    min_dte: int = OPTIONS_MIN_DTE, max_dte: int = OPTIONS_MAX_DTE,
+                    limit: int = CANDIDATES_PER_SIDE) -> pd.DataFrame:
+    """Contracts of one side within the expiry window, closest to the target delta first"""
+    is_side = (analyzed['option_type'] == option_type).to_numpy()
+    days = analyzed['days_to_expiry'].to_numpy()
+    candidates = is_side & (days >= min_dte) & (days <= max_dte)
+    if not candidates.any() and is_side.any():
+        # Nothing in the window: fall back to the nearest expiration
+        candidates = is_side & (days == days[is_side].min())
+    index = np.flatnonzero(candidates)
+    distance = np.abs(analyzed['delta'].to_numpy()[index] - target_delta)
+    # Closest delta first, the shorter expiry on ties
+    order = np.lexsort((days[index], distance))[:limit]
+    return analyzed.iloc[index[order]]
+
+def _finite(value, digits: Optional[int] = None) -> Optional[float]:
+    """Plain float for JSON, or None for NaN and infinite provider values"""
+    value = float(value)
+    if not np.isfinite(value):
+        return None
+    return value if digits is None else round(value, digits)
+
+def contract_records(selected: pd.DataFrame) -> List[Dict]:
+    """Plain-Python contract dicts, as stored in the options cache and sent to the LLM"""
+    return [{
+        'strike': _finite(row.strike),
+        'bid': _finite(row.bid),
+        'ask': _finite(row.ask),
+        'implied_vol': _finite(row.impliedVolatility),
+        'delta': _finite(row.delta, 4),
+        'theta': _finite(row.theta, 4),
+        'premium': _finite(row.bid),  # Use bid price
+        'annualized_yield': _finite(row.annualized_yield, 4),
+        'expiration_date': str(row.expiration_date),
+        'days_to_expiry': int(row.days_to_expiry),
+    } for row in selected.itertuples(index=False)]
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Optional
+
+# Number of threads available for blocking data provider calls (yfinance etc.)
+PROVIDER_MAX_WORKERS = int(os.getenv("PROVIDER_MAX_WORKERS", "8"))
+
+class ProviderExecutor:
+    """Bounded thread pool that keeps blocking provider I/O off the event loop"""
+
+    def __init__(self, max_workers: int = PROVIDER_MAX_WORKERS, sample_size: int = 1000,
+                 thread_name_prefix: str = "provider"):
+        self.max_workers = max(1, max_workers)
+        self.thread_name_prefix = thread_name_prefix
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._started = 0
+        self._finished = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._wait_samples = deque(maxlen=sample_size)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.thread_name_prefix
+                )
+            return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run a blocking call on the pool and await its result"""
+        loop = asyncio.get_running_loop()
+        queued_at = time.perf_counter()
+        with self._lock:
+            self._submitted += 1
+        return await loop.run_in_executor(
+            self._get_executor(), partial(self._invoke, func, queued_at, *args, **kwargs)
+        )
+
+    def _invoke(self, func: Callable, queued_at: float, *args, **kwargs):
+        wait = time.perf_counter() - queued_at
+        with self._lock:
+            self._started += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            self._wait_samples.append(wait)
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._finished += 1
+
+    def stats(self) -> Dict:
+        """Snapshot of queue depth and wait-time metrics"""
+        with self._lock:
+            samples = sorted(self._wait_samples)
+            started = self._started
+            return {
+                'max_workers': self.max_workers,
+                'queue_depth': self._submitted - self._started,
+                'in_flight': self._started - self._finished,
+                'submitted': self._submitted,
+                'completed': self._finished,
+                'failed': self._failed,
+                'wait_avg_ms': round(self._total_wait / started * 1000, 2) if started else 0.0,
+                'wait_p95_ms': round(samples[int(len(samples) * 0.95) - 1] * 1000, 2) if samples else 0.0,
+                'wait_max_ms': round(self._max_wait * 1000, 2),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+# Process-wide pool shared by all data provider services
+provider_executor = ProviderExecutor()
@@ -0,0 +1,193 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from typing import Dict
+from app.services.cache import REDIS_URL
+
+# Account quota for the OpenAI API; requests are paced to stay within both limits
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "30000"))
+
+# "memory" paces each process on its own; "redis" shares the quota between
+# the API and every worker process through buckets stored at REDIS_URL
+LLM_RATE_LIMIT_BACKEND = os.getenv("LLM_RATE_LIMIT_BACKEND", "memory")
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of rejecting callers.
+
+    A caller that finds the bucket empty still takes its tokens (driving the
+    balance negative) and is told how long to wait, so waiters are served in
+    arrival order without an event-loop-bound lock.
+    """
+
+    def __init__(self, capacity: float, per_seconds: float = 60.0):
+        self.capacity = float(max(1, capacity))
+        self.rate = self.capacity / per_seconds
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take tokens and return the delay in seconds before they are usable"""
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount: float):
+        """Return tokens that were reserved but not consumed"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+class RedisTokenBucket:
+    """TokenBucket whose balance lives in Redis, shared by every process using the key.
+
+    Updates are optimistic transactions (WATCH/MULTI), so no server-side
+    scripting is needed. While Redis is unreachable the process falls back
+    to a local bucket with the full quota.
+    """
+
+    def __init__(self, client, key: str, capacity: float, per_seconds: float = 60.0):
+        self.client = client
+        self.key = key
+        self.capacity = float(max(1, capacity))
+        self.rate = self.capacity / per_seconds
+        self.fallback = TokenBucket(capacity, per_seconds)
+        self.errors = 0
+
+    def _add(self, amount: float) -> float:
+        """Refill by elapsed time, add amount (negative to take) and return the new balance"""
+        def update(pipe):
+            tokens, updated = pipe.hmget(self.key, 'tokens', 'updated')
+            now = time.time()
+            balance = self.capacity if tokens is None else \
+                min(self.capacity, float(tokens) + max(0.0, now - float(updated)) * self.rate)
+            balance = min(self.capacity, balance + amount)
+            pipe.multi()
+            pipe.hset(self.key, mapping={'tokens': balance, 'updated': now})
+            # An idle bucket is full again by the time its key expires
+            pipe.expire(self.key, math.ceil((self.capacity - balance) / self.rate) + 1)
+            return balance
+        return self.client.transaction(update, self.key, value_from_callable=True)
+
+    def reserve(self, amount: float) -> float:
+        amount = min(float(amount), self.capacity)
+        try:
+            balance = self._add(-amount)
+        except Exception as e:
+            self.errors += 1
+            print(f"Shared rate limit unavailable, pacing locally: {e}")
+            return self.fallback.reserve(amount)
+        return 0.0 if balance >= 0 else -balance / self.rate
+
+    def refund(self, amount: float):
+        try:
+            self._add(amount)
+        except Exception as e:
+            self.errors += 1
+            print(f"Shared rate limit unavailable, refunding locally: {e}")
+            self.fallback.refund(amount)
+
+class LLMRateLimiter:
+    """Paces LLM calls against requests-per-minute and tokens-per-minute limits.
+
+    With a Redis client the buckets are shared, so any number of worker
+    processes together stay within the account quota.
+    """
+
+    def __init__(self, rpm: int = OPENAI_RPM, tpm: int = OPENAI_TPM, client=None,
+                 prefix: str = "stockresearch:ratelimit:openai:"):
+        if client is not None:
+            self.requests = RedisTokenBucket(client, prefix + "requests", rpm)
+            self.tokens = RedisTokenBucket(client, prefix + "tokens", tpm)
+        else:
+            self.requests = TokenBucket(rpm)
+            self.tokens = TokenBucket(tpm)
+        self.backend = "memory" if client is None else "redis"
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.acquired = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.retries = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+
+    async def _run(self, func, *args):
+        """Call a bucket method; Redis round trips (and WATCH retries) run off the event loop"""
+        if self.backend == "redis":
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    def _reserve(self, tokens: int) -> float:
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    async def acquire(self, tokens: int):
+        """Wait until one request of the given token size fits in the quota"""
+        delay = await self._run(self._reserve, tokens)
+        with self._lock:
+            self.acquired += 1
+            self.total_wait += delay
+            self.max_wait = max(self.max_wait, delay)
+            if delay > 0:
+                self.delayed += 1
+                self.waiting += 1
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+
+    async def reconcile(self, estimated: int, actual: int):
+        """Give back tokens when a call used fewer than estimated"""
+        if actual < estimated:
+            await self._run(self.tokens.refund, estimated - actual)
+
+    def record_retry(self, status_code: int = None):
+        with self._lock:
+            self.retries += 1
+            if status_code == 429:
+                self.rate_limited += 1
+            elif status_code is not None and status_code >= 500:
+                self.server_errors += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'rpm_limit': int(self.requests.capacity),
+                'tpm_limit': int(self.tokens.capacity),
+                'waiting': self.waiting,
+                'acquired': self.acquired,
+                'delayed': self.delayed,
+                'wait_avg_ms': round(self.total_wait / self.acquired * 1000, 2) if self.acquired else 0.0,
+                'wait_max_ms': round(self.max_wait * 1000, 2),
+                'retries': self.retries,
+                'rate_limited': self.rate_limited,
+                'server_errors': self.server_errors,
+            }
+
+def _shared_client():
+    """Redis client for the shared buckets, or None to pace within the process"""
+    if LLM_RATE_LIMIT_BACKEND != "redis":
+        return None
+    try:
+        import redis
+        # Short timeouts: a stalled Redis must not stall the event loop
+        return redis.Redis.from_url(REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+    except Exception as e:
+        print(f"Redis rate limit unavailable, pacing per process: {e}")
+        return None
+
+# Process-wide limiter, since the quota belongs to the account rather than a request
+llm_rate_limiter = LLMRateLimiter(client=_shared_client())
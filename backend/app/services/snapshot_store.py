@@ -0,0 +1,212 @@
+"""Append-only Parquet history of stock snapshots, partitioned by month.
+
+Each daily run writes its stock_snapshots rows to
+SNAPSHOT_STORE_DIR/month=YYYY-MM/run-<id>.parquet alongside the database,
+and the run files of past months are compacted into one file per month
+(opening a file costs about as much as reading a few thousand rows).
+History queries (e.g. a year of prices across the universe) read only the
+months and columns they need into pandas, instead of loading and
+Decimal-converting ORM rows.
+
+Export runs written before the store existed with:
+
+    python -m app.services.snapshot_store backfill
+"""
+import os
+import sys
+from datetime import date
+from typing import List, Optional, Sequence, Set, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import Float, cast, select
+from sqlalchemy.orm import Session
+from app.models import DailyRun, DailyRunStatus, Stock, StockSnapshot
+
+SNAPSHOT_STORE_ENABLED = os.getenv("SNAPSHOT_STORE_ENABLED", "true").lower() == "true"
+SNAPSHOT_STORE_DIR = os.getenv("SNAPSHOT_STORE_DIR", "data/snapshots")
+
+# Numeric snapshot columns, stored as float64 (volume as int64)
+VALUE_COLUMNS = ['market_cap', 'price', 'open_price', 'day_high', 'day_low', 'volume',
+                 'high_52w', 'low_52w', 'pe_ratio', 'dividend_yield', 'beta']
+
+# A symbol has one snapshot per run; rows repeated while a month is compacted are dropped
+ROW_KEY = ['daily_run_id', 'symbol']
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema(
+        [('run_date', pa.date32()), ('symbol', pa.string()), ('stock_id', pa.int32()),
+         ('daily_run_id', pa.int32()), ('sequence', pa.int32()), ('as_of', pa.timestamp('us'))]
+        + [(column, pa.int64() if column == 'volume' else pa.float64()) for column in VALUE_COLUMNS]
+    )
+
+def _month_dir(root: str, month: str) -> str:
+    return os.path.join(root, f"month={month}")
+
+def _write_atomic(table, path: str):
+    """Write under a dot-prefixed name, which readers skip, then rename into place"""
+    import pyarrow.parquet as pq
+
+    partial = os.path.join(os.path.dirname(path), "." + os.path.basename(path))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table, partial, compression='zstd')
+    os.replace(partial, path)
+
+def _data_files(month_dir: str) -> List[str]:
+    return sorted(entry.path for entry in os.scandir(month_dir)
+                  if entry.name.endswith('.parquet') and not entry.name.startswith('.'))
+
+def write_run(db: Session, run_id: int, root: str = SNAPSHOT_STORE_DIR) -> Optional[str]:
+    """Write a run's snapshots to its month; returns the file path.
+
+    The file holds every snapshot of the run, so a resumed run simply
+    rewrites it.
+    """
+    import pyarrow as pa
+
+    run_date = db.scalar(select(DailyRun.run_date).where(DailyRun.id == run_id))
+    if run_date is None:
+        return None
+    # Numeric columns are cast in the query so no Decimal objects are built
+    rows = db.execute(select(
+        Stock.symbol, StockSnapshot.stock_id, StockSnapshot.daily_run_id, StockSnapshot.sequence, StockSnapshot.as_of,
+        *[getattr(StockSnapshot, column) if column == 'volume' else cast(getattr(StockSnapshot, column), Float)
+          for column in VALUE_COLUMNS]
+    ).join(Stock, Stock.id == StockSnapshot.stock_id).where(
+        StockSnapshot.daily_run_id == run_id
+    ).order_by(Stock.symbol)).all()
+    if not rows:
+        return None
+
+    schema = _schema()
+    table = pa.Table.from_pylist([dict(zip(schema.names, (run_date, *row))) for row in rows], schema=schema)
+    path = os.path.join(_month_dir(root, run_date.strftime('%Y-%m')), f"run-{run_id}.parquet")
+    _write_atomic(table, path)
+    return path
+
+def compact(root: str = SNAPSHOT_STORE_DIR, before: Optional[date] = None) -> int:
+    """Merge the files of every month before `before` (default: this month) into one.
+
+    Returns the number of months compacted. Readers running meanwhile may
+    see a run both in the merged file and in its own; they drop the repeat.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if not os.path.isdir(root):
+        return 0
+    current = (before or date.today()).strftime('%Y-%m')
+    compacted = 0
+    for entry in sorted(os.scandir(root), key=lambda entry: entry.name):
+        month = entry.name.split('=', 1)[-1]
+        if not entry.name.startswith('month=') or month >= current:
+            continue
+        files = _data_files(entry.path)
+        target = os.path.join(entry.path, f"month-{month}.parquet")
+        if not files or files == [target]:
+            continue
+        frame = pa.concat_tables([pq.read_table(path, schema=_schema()) for path in files]).to_pandas()
+        frame = frame.drop_duplicates(ROW_KEY, keep='last').sort_values(['run_date', 'symbol'])
+        _write_atomic(pa.Table.from_pandas(frame, schema=_schema(), preserve_index=False), target)
+        for path in files:
+            if path != target:
+                os.remove(path)
+        compacted += 1
+    return compacted
+
+def _month_files(root: str, start: Optional[date], end: Optional[date]) -> Tuple[List[str], bool]:
+    """Data files of the months overlapping start..end, and whether any run may be stored twice.
+
+    Months outside the range are never opened. A run appears twice only in a
+    month holding both its compacted file and run files (a compaction in
+    progress, or a run resumed after its month was compacted).
+    """
+    first, last = start and start.strftime('%Y-%m'), end and end.strftime('%Y-%m')
+    files, repeats = [], False
+    for entry in sorted(os.scandir(root), key=lambda entry: entry.name):
+        month = entry.name.split('=', 1)[-1]
+        if not entry.name.startswith('month=') or (first and month < first) or (last and month > last):
+            continue
+        month_files = _data_files(entry.path)
+        # The compacted month-*.parquet sorts before run-*.parquet, so keep='last' prefers run files
+        repeats = repeats or (len(month_files) > 1 and os.path.basename(month_files[0]).startswith('month-'))
+        files.extend(month_files)
+    return files, repeats
+
+def _read_table(symbols: Optional[Sequence[str]], start: Optional[date], end: Optional[date],
+                columns: List[str], root: str):
+    """Arrow table of the matching snapshots with projection and filters pushed into the scan"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    files, repeats = _month_files(root, start, end) if os.path.isdir(root) else ([], False)
+    schema = _schema()
+    if not files:
+        return schema.empty_table().select(columns)
+    condition = None
+    for clause in (
+        ds.field('run_date') >= pa.scalar(start, pa.date32()) if start else None,
+        ds.field('run_date') <= pa.scalar(end, pa.date32()) if end else None,
+        ds.field('symbol').isin(list(symbols)) if symbols is not None else None,
+    ):
+        if clause is not None:
+            condition = clause if condition is None else condition & clause
+    scanned = columns + [column for column in ROW_KEY if repeats and column not in columns]
+    table = ds.dataset(files, format='parquet', schema=schema).to_table(columns=scanned, filter=condition)
+    if repeats:
+        # Keep the last copy of each (run, symbol); files are scanned in list order
+        table = table.append_column('_row', pa.array(range(len(table)), pa.int64()))
+        last = table.group_by(ROW_KEY, use_threads=False).aggregate([('_row', 'max')])['_row_max']
+        table = table.filter(pc.is_in(table['_row'], value_set=last))
+    return table.select(columns)
+
+def read_snapshots(symbols: Optional[Sequence[str]] = None, start: Optional[date] = None,
+                   end: Optional[date] = None, columns: Optional[List[str]] = None,
+                   root: str = SNAPSHOT_STORE_DIR) -> pd.DataFrame:
+    """Snapshots between start and end (inclusive run dates), one row per symbol and run.
+
+    Only the months in the date range and the requested columns are read.
+    """
+    columns = ['run_date', 'symbol', 'daily_run_id', 'as_of', *(VALUE_COLUMNS if columns is None else columns)]
+    table = _read_table(symbols, start, end, columns, root)
+    table = table.sort_by([('run_date', 'ascending'), ('symbol', 'ascending')])
+    return table.to_pandas(date_as_object=False)
+
+def price_history(symbols: Optional[Sequence[str]] = None, start: Optional[date] = None,
+                  end: Optional[date] = None, column: str = 'price',
+                  root: str = SNAPSHOT_STORE_DIR) -> pd.DataFrame:
+    """One column of history as a run date x symbol frame (the newest snapshot per day)"""
+    table = _read_table(symbols, start, end, ['run_date', 'symbol', 'as_of', column], root)
+    table = table.sort_by([('run_date', 'ascending'), ('symbol', 'ascending'), ('as_of', 'ascending')])
+    frame = table.to_pandas(date_as_object=False)
+    dates, date_codes = np.unique(frame['run_date'].to_numpy(), return_inverse=True)
+    names, symbol_codes = np.unique(frame['symbol'].to_numpy(dtype=object), return_inverse=True)
+    # Rows are ordered by as_of within a day, so the newest snapshot is written last
+    values = np.full((len(dates), len(names)), np.nan)
+    newest = np.append((date_codes[1:] != date_codes[:-1]) | (symbol_codes[1:] != symbol_codes[:-1]), True)
+    values[date_codes[newest], symbol_codes[newest]] = frame[column].to_numpy(dtype=float)[newest]
+    return pd.DataFrame(values, index=pd.Index(dates, name='run_date'), columns=pd.Index(names, name='symbol'))
+
+def exported_runs(root: str = SNAPSHOT_STORE_DIR) -> Set[int]:
+    """Ids of the runs present in the store"""
+    return set(read_snapshots(columns=[], root=root)['daily_run_id'].astype(int))
+
+def backfill(db: Session, root: str = SNAPSHOT_STORE_DIR) -> int:
+    """Export completed daily runs missing from the store; returns the number written"""
+    exported = exported_runs(root)
+    written = 0
+    for run_id in db.scalars(select(DailyRun.id).where(
+        DailyRun.status == DailyRunStatus.COMPLETED, DailyRun.universe != "ON_DEMAND"
+    ).order_by(DailyRun.run_date)).all():
+        if run_id not in exported and write_run(db, run_id, root):
+            written += 1
+    compact(root)
+    return written
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["backfill"]:
+        sys.exit("usage: python -m app.services.snapshot_store backfill")
+    from app.database import SessionLocal
+    with SessionLocal() as session:
+        print(f"Wrote {backfill(session)} run files to {SNAPSHOT_STORE_DIR}")
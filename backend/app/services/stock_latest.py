@@ -0,0 +1,105 @@
+import enum
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models import Stock, AnalysisReport, NewsArticle, Filing, OptionsSnapshot, StockLatest
+from app.services.bulk_writer import upsert
+
+# Rows shown on the stock detail page
+RECENT_NEWS_LIMIT = 10
+LATEST_FILINGS_LIMIT = 5
+
+# Stocks refreshed per statement, to stay well below bind-parameter limits
+REFRESH_BATCH_SIZE = 500
+
+# Prompt, raw completion and input baseline are kept in analysis_reports but not copied to the detail view
+EXCLUDED_COLUMNS = {AnalysisReport: {'raw_prompt', 'raw_response', 'input_baseline'}}
+
+STOCK_FIELDS = ('id', 'symbol', 'name', 'exchange', 'sector', 'industry', 'is_tracked',
+                'latest_entry_rating', 'latest_covered_call_rating', 'latest_secured_put_rating')
+
+def _json_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def serialize_row(row) -> Dict:
+    """JSON-safe dict of a model instance's columns"""
+    excluded = EXCLUDED_COLUMNS.get(type(row), set())
+    return {
+        column.name: _json_value(getattr(row, column.name))
+        for column in row.__table__.columns if column.name not in excluded
+    }
+
+def _newest(db: Session, model, stock_id: int, order_by, limit: int) -> List:
+    """Newest rows of one stock; served by the (stock_id, <time column>) indexes"""
+    return db.scalars(select(model).where(model.stock_id == stock_id).order_by(order_by).limit(limit)).all()
+
+def build_latest_rows(db: Session, stock_ids: List[int], source_run_id: Optional[int] = None) -> List[Dict]:
+    """Compute stock_latest rows for a batch of stocks.
+
+    Each stock is read with short index range scans; a window function over
+    the whole history was measured several times slower on large tables.
+    """
+    stocks = db.scalars(select(Stock).where(Stock.id.in_(stock_ids))).all()
+
+    rows = []
+    now = datetime.utcnow()
+    for stock in stocks:
+        reports = _newest(db, AnalysisReport, stock.id, AnalysisReport.created_at.desc(), 1)
+        options = _newest(db, OptionsSnapshot, stock.id, OptionsSnapshot.id.desc(), 1)
+        stock_news = _newest(db, NewsArticle, stock.id, NewsArticle.published_at.desc(), RECENT_NEWS_LIMIT)
+        stock_filings = _newest(db, Filing, stock.id, Filing.file_date.desc(), LATEST_FILINGS_LIMIT)
+        report = reports[0] if reports else None
+        option = options[0] if options else None
+        rows.append({
+            'stock_id': stock.id,
+            'symbol': stock.symbol,
+            'report_id': report.id if report else None,
+            'options_snapshot_id': option.id if option else None,
+            'news_ids': [article.id for article in stock_news],
+            'filing_ids': [filing.id for filing in stock_filings],
+            'payload': {
+                'stock': {field: _json_value(getattr(stock, field)) for field in STOCK_FIELDS},
+                'latest_analysis': serialize_row(report) if report else None,
+                'recent_news': [serialize_row(article) for article in stock_news],
+                'latest_filings': [serialize_row(filing) for filing in stock_filings],
+                'latest_options': serialize_row(option) if option else None,
+            },
+            'source_run_id': source_run_id,
+            'refreshed_at': now,
+        })
+    return rows
+
+def refresh_stock_latest(db: Session, stock_ids: Iterable[int], source_run_id: Optional[int] = None) -> int:
+    """Rebuild the stock_latest rows of the given stocks and commit"""
+    stock_ids = list(dict.fromkeys(stock_ids))
+    refreshed = 0
+    for offset in range(0, len(stock_ids), REFRESH_BATCH_SIZE):
+        rows = build_latest_rows(db, stock_ids[offset:offset + REFRESH_BATCH_SIZE], source_run_id)
+        if rows:
+            upsert(db, StockLatest, rows, ('stock_id',))
+            refreshed += len(rows)
+    db.commit()
+    return refreshed
+
+def get_stock_detail_payload(db: Session, symbol: str) -> Optional[Dict]:
+    """Detail payload for a symbol in a single indexed lookup.
+
+    Stocks that have no stock_latest row yet (e.g. never analyzed since the
+    table was added) are built and stored on first access.
+    """
+    payload = db.scalar(select(StockLatest.payload).where(StockLatest.symbol == symbol))
+    if payload is not None:
+        return payload
+    stock_id = db.scalar(select(Stock.id).where(Stock.symbol == symbol))
+    if stock_id is None:
+        return None
+    refresh_stock_latest(db, [stock_id])
+    return db.scalar(select(StockLatest.payload).where(StockLatest.symbol == symbol))
@@ -0,0 +1,5 @@
+import hashlib
+
+def url_hash(url: str) -> str:
+    """Stable natural key for a news article URL"""
+    return hashlib.sha256(url.strip().encode()).hexdigest()
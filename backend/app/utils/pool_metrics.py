@@ -0,0 +1,87 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Dict
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds in milliseconds of the checkout-wait histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+class PoolMetrics:
+    """Checkout counters and wait-time histogram for one connection pool"""
+
+    def __init__(self, sample_size: int = 1000):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._wait_samples = deque(maxlen=sample_size)
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.total_wait += wait
+                self._wait_samples.append(wait)
+            self.max_wait = max(self.max_wait, wait)
+            self.buckets[bisect_left(WAIT_BUCKETS_MS, wait * 1000)] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            samples = sorted(self._wait_samples)
+            labels = [f"le_{bound}ms" for bound in WAIT_BUCKETS_MS] + ["gt_%dms" % WAIT_BUCKETS_MS[-1]]
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': round(self.total_wait / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                'wait_p95_ms': round(samples[int(len(samples) * 0.95) - 1] * 1000, 2) if samples else 0.0,
+                'wait_max_ms': round(self.max_wait * 1000, 2),
+                'wait_histogram': dict(zip(labels, self.buckets)),
+            }
+
+class TimedPoolMixin:
+    """Times every checkout, including waits for a free connection and pre-ping"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        # Keep the counters when the engine replaces the pool (e.g. after dispose)
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return connection
+
+    def stats(self) -> Dict:
+        """Snapshot of pool occupancy and checkout metrics"""
+        return {
+            'pool_size': self.size(),
+            'max_overflow': self._max_overflow,
+            'timeout_s': self.timeout(),
+            'checked_out': self.checkedout(),
+            'checked_in': self.checkedin(),
+            'overflow': max(0, self.overflow()),
+            **self.metrics.stats(),
+        }
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
@@ -0,0 +1,149 @@
+"""Worker process that runs queued analysis jobs.
+
+Start as many processes as needed; each claims one job at a time:
+
+    python -m app.worker
+"""
+import asyncio
+import os
+import signal
+import time
+import traceback
+from datetime import datetime, timezone
+from app.database import AsyncSessionLocal, dispose_async_engine
+from app.jobs import queue, scheduler, worker_metrics
+from app.models import AnalysisJob, JobType
+from app.services.provider_executor import provider_executor
+
+# Seconds between polls of an empty queue, and between heartbeats of a running job
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "2"))
+WORKER_HEARTBEAT_INTERVAL = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "30"))
+
+# Seconds between checks of the daily run schedule
+SCHEDULER_INTERVAL = float(os.getenv("SCHEDULER_INTERVAL", "30"))
+
+async def run_job(job: AnalysisJob):
+    """Dispatch a claimed job to the analysis service"""
+    from app.services.analysis_service import AnalysisService
+
+    async with AsyncSessionLocal() as db:
+        service = AnalysisService(db)
+        if job.job_type == JobType.DAILY_RUN:
+            if job.payload.get('prewarm'):
+                await prewarm_until(service, datetime.fromisoformat(job.payload['scheduled_at']))
+            await service.run_daily_analysis(job.daily_run_id)
+        elif job.job_type == JobType.ON_DEMAND:
+            await service.run_on_demand_analysis(job.payload['stock_id'], job.payload['symbol'])
+        else:
+            raise ValueError(f"Unknown job type {job.job_type}")
+
+async def prewarm_until(service, scheduled_at: datetime):
+    """Fill the caches for a scheduled run, then wait for its start time"""
+    if scheduled_at <= datetime.now(timezone.utc):
+        # Late start or a retried job: run straight away
+        return
+    start = time.perf_counter()
+    try:
+        requests = await service.prewarm()
+        print(f"Pre-warmed {requests['symbols']} symbols with {requests['total']} upstream requests "
+              f"in {time.perf_counter() - start:.1f} s")
+    except Exception as e:
+        print(f"Pre-warm failed, the run fetches its own data: {e}")
+    delay = (scheduled_at - datetime.now(timezone.utc)).total_seconds()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+async def _send_heartbeats(job_id: int, worker: str):
+    """Keep a running job claimed; returns once another worker has taken it over"""
+    while True:
+        await asyncio.sleep(WORKER_HEARTBEAT_INTERVAL)
+        try:
+            async with AsyncSessionLocal() as db:
+                if not await queue.heartbeat(db, job_id, worker):
+                    print(f"Job {job_id} was taken over by another worker")
+                    return
+        except Exception as e:
+            print(f"Heartbeat for job {job_id} failed: {e}")
+
+async def _publish_metrics(worker: str):
+    """Publish this worker's metrics for the API's /api/metrics/workers"""
+    while True:
+        try:
+            if not worker_metrics.publish(worker):
+                return
+        except Exception as e:
+            print(f"Publishing metrics of worker {worker} failed: {e}")
+        await asyncio.sleep(worker_metrics.WORKER_METRICS_INTERVAL)
+
+async def process_next(worker: str) -> bool:
+    """Claim and run one job; False when the queue had nothing due"""
+    async with AsyncSessionLocal() as db:
+        await queue.requeue_stale(db)
+        job = await queue.claim(db, worker)
+    if job is None:
+        return False
+
+    heartbeats = asyncio.create_task(_send_heartbeats(job.id, worker))
+    work = asyncio.create_task(run_job(job))
+    try:
+        await asyncio.wait({work, heartbeats}, return_when=asyncio.FIRST_COMPLETED)
+        if not work.done():
+            # Requeued and claimed elsewhere: stop here and leave the job to its new owner
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+            return True
+        try:
+            work.result()
+        except Exception as e:
+            print(f"Job {job.id} ({job.job_type.value}) failed: {e}")
+            async with AsyncSessionLocal() as db:
+                await queue.fail(db, job, worker, traceback.format_exc())
+        else:
+            async with AsyncSessionLocal() as db:
+                await queue.complete(db, job.id, worker)
+    finally:
+        work.cancel()
+        heartbeats.cancel()
+    return True
+
+async def main():
+    worker = queue.worker_id()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    print(f"Worker {worker} started")
+    next_schedule_check = 0.0
+    metrics = asyncio.create_task(_publish_metrics(worker))
+    try:
+        # A job in progress is finished before shutting down
+        while not stop.is_set():
+            if scheduler.SCHEDULER_ENABLED and time.monotonic() >= next_schedule_check:
+                next_schedule_check = time.monotonic() + SCHEDULER_INTERVAL
+                try:
+                    async with AsyncSessionLocal() as db:
+                        await scheduler.schedule_due_run(db)
+                except Exception as e:
+                    print(f"Worker {worker} could not check the schedule: {e}")
+            try:
+                if await process_next(worker):
+                    continue
+            except Exception as e:
+                print(f"Worker {worker} could not poll the queue: {e}")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=WORKER_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        metrics.cancel()
+        try:
+            worker_metrics.clear(worker)
+        except Exception as e:
+            print(f"Removing metrics of worker {worker} failed: {e}")
+        provider_executor.shutdown()
+        await dispose_async_engine()
+    print(f"Worker {worker} stopped")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+"""Cold-start cost of a worker: importing app.main and serving the first /health.
+
+Each sample runs in a fresh interpreter so import caches do not hide the cost.
+The lifespan startup hook is included in the time to first response.
+
+    cd backend && PYTHONPATH=. python benchmarks/cold_start.py [samples]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = r'''
+import asyncio, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def first_health():
+    startup = asyncio.Queue()
+    await startup.put({"type": "lifespan.startup"})
+    sent = []
+    async def lifespan_send(message):
+        sent.append(message)
+    lifespan = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}},
+                                       startup.get, lifespan_send))
+    while not sent:
+        await asyncio.sleep(0)
+
+    messages = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        messages.append(message)
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/health", "raw_path": b"/health", "root_path": "",
+             "query_string": b"", "headers": [], "client": ("127.0.0.1", 0), "server": ("test", 80)}
+    await app(scope, receive, send)
+    assert messages[0]["status"] == 200
+    await startup.put({"type": "lifespan.shutdown"})
+    await lifespan
+
+asyncio.run(first_health())
+served = time.perf_counter()
+print(f"{(imported - start) * 1000:.1f} {(served - start) * 1000:.1f}")
+'''
+
+def main(samples: int = 5):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "DATABASE_URL": os.getenv("DATABASE_URL", f"sqlite:///{tmp}/cold_start.db")}
+        imports, firsts = [], []
+        for _ in range(samples):
+            output = subprocess.run([sys.executable, "-c", PROBE], env=env, check=True,
+                                    capture_output=True, text=True).stdout.split()
+            imports.append(float(output[0]))
+            firsts.append(float(output[1]))
+    print(f"import app.main        median {statistics.median(imports):8.1f} ms")
+    print(f"first /health response median {statistics.median(firsts):8.1f} ms")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,120 @@
+"""Latency and query plans of the stock detail queries with and without the
+composite "latest per stock" indexes (migration 0003).
+
+Seeds a database with multi-million-row history tables, then runs the four
+per-stock queries of GET /api/stocks/{symbol} for random stocks before and
+after creating the indexes. Uses DATABASE_URL when set (seeding is skipped
+if the tables already hold data), otherwise a temporary SQLite file.
+
+    cd backend && PYTHONPATH=. python benchmarks/latest_per_stock.py [rows_per_table] [samples]
+"""
+import hashlib
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.orm import Session
+from app.models import AnalysisReport, AnalysisType, Base, Filing, NewsArticle, OptionsSnapshot, Stock
+
+STOCKS = 500
+BATCH = 50000
+
+# Indexes added by alembic/versions/0003; dropped before the "before" measurement
+BENCHMARK_INDEXES = [
+    index for table in (AnalysisReport, NewsArticle, Filing, OptionsSnapshot)
+    for index in table.__table__.indexes
+    if index.name.endswith(('_created_at', '_published_at', '_file_date', '_stock_id_id'))
+]
+
+def queries(stock_id: int):
+    """The per-stock queries issued by get_stock_detail"""
+    return {
+        'analysis': select(AnalysisReport).where(AnalysisReport.stock_id == stock_id)
+            .order_by(AnalysisReport.created_at.desc()).limit(1),
+        'news': select(NewsArticle).where(NewsArticle.stock_id == stock_id)
+            .order_by(NewsArticle.published_at.desc()).limit(10),
+        'filings': select(Filing).where(Filing.stock_id == stock_id)
+            .order_by(Filing.file_date.desc()).limit(5),
+        'options': select(OptionsSnapshot).where(OptionsSnapshot.stock_id == stock_id)
+            .order_by(OptionsSnapshot.id.desc()).limit(1),
+    }
+
+def seed(engine, rows: int):
+    start = time.perf_counter()
+    base = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Stock), [{'symbol': f"S{i:04d}", 'name': f"Stock {i}"} for i in range(STOCKS)])
+    for offset in range(0, rows, BATCH):
+        ids = range(offset, min(offset + BATCH, rows))
+        with engine.begin() as conn:
+            conn.execute(insert(AnalysisReport), [{
+                'stock_id': i % STOCKS + 1, 'analysis_type': AnalysisType.DAILY_AUTO,
+                'summary_markdown': "summary", 'created_at': base + timedelta(minutes=i)
+            } for i in ids])
+            conn.execute(insert(NewsArticle), [{
+                'stock_id': i % STOCKS + 1, 'title': "headline", 'url': f"https://news.example/{i}",
+                'url_hash': hashlib.sha256(f"https://news.example/{i}".encode()).hexdigest(),
+                'published_at': base + timedelta(minutes=i)
+            } for i in ids])
+            conn.execute(insert(Filing), [{
+                'stock_id': i % STOCKS + 1, 'filing_type': "10-Q", 'file_url': f"https://sec.example/{i}",
+                'file_date': date(2000, 1, 1) + timedelta(days=i // STOCKS)
+            } for i in ids])
+            conn.execute(insert(OptionsSnapshot), [{
+                'stock_id': i % STOCKS + 1, 'underlying_price': 100, 'days_to_expiry': 45
+            } for i in ids])
+    print(f"seeded {rows:,} rows per table in {time.perf_counter() - start:.1f} s")
+
+def explain(conn, statement) -> str:
+    if conn.dialect.name == 'postgresql':
+        prefix = "EXPLAIN "
+    else:
+        prefix = "EXPLAIN QUERY PLAN "
+    compiled = statement.compile(conn, compile_kwargs={"literal_binds": True})
+    rows = conn.execute(text(prefix + str(compiled))).all()
+    return " | ".join(str(row[-1]) for row in rows)
+
+def measure(engine, samples: int, label: str):
+    rng = random.Random(42)
+    stock_ids = [rng.randint(1, STOCKS) for _ in range(samples)]
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        print(f"\n== {label}")
+        for name, statement in queries(stock_ids[0]).items():
+            print(f"  plan {name:<9} {explain(conn, statement)}")
+    with Session(engine) as db:
+        timings = {name: [] for name in queries(0)}
+        for stock_id in stock_ids:
+            for name, statement in queries(stock_id).items():
+                start = time.perf_counter()
+                db.execute(statement).all()
+                timings[name].append((time.perf_counter() - start) * 1000)
+    for name, values in timings.items():
+        values.sort()
+        print(f"  {name:<14} p50 {statistics.median(values):8.2f} ms   p99 {values[int(len(values) * 0.99) - 1]:8.2f} ms")
+
+def main(rows: int = 1_000_000, samples: int = 200):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(os.getenv("DATABASE_URL", f"sqlite:///{tmp}/latest_per_stock.db"))
+        Base.metadata.create_all(bind=engine)
+        for index in BENCHMARK_INDEXES:
+            index.drop(bind=engine, checkfirst=True)
+        with Session(engine) as db:
+            if not db.scalar(select(func.count()).select_from(NewsArticle)):
+                seed(engine, rows)
+
+        measure(engine, samples, "without composite indexes")
+        start = time.perf_counter()
+        for index in BENCHMARK_INDEXES:
+            index.create(bind=engine)
+        print(f"\ncreated {len(BENCHMARK_INDEXES)} indexes in {time.perf_counter() - start:.1f} s")
+        measure(engine, samples, "with composite indexes")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
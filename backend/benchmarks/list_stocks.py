@@ -0,0 +1,91 @@
+"""Per-page latency of GET /api/stocks?entry_rating=... on a 5,000-stock universe.
+
+Compares the previous query (join every analysis report, OFFSET paging)
+with the denormalized latest-rating columns and keyset paging, for the
+first, middle and last page of the filtered listing.
+
+    cd backend && PYTHONPATH=. python benchmarks/list_stocks.py [reports_per_stock] [repeats]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+from app.models import AnalysisReport, AnalysisType, Base, EntryRating, Stock
+
+STOCKS = 5000
+PAGE_SIZE = 50
+RATING = EntryRating.BUY
+
+def seed(engine, reports_per_stock: int):
+    rng = random.Random(3)
+    ratings = list(EntryRating)
+    base = datetime(2020, 1, 1)
+    latest = [rng.choice(ratings) for _ in range(STOCKS)]
+    with engine.begin() as conn:
+        conn.execute(insert(Stock), [{
+            'symbol': f"S{i:05d}", 'name': f"Stock {i}", 'is_tracked': True,
+            'latest_entry_rating': latest[i], 'latest_report_at': base + timedelta(days=reports_per_stock)
+        } for i in range(STOCKS)])
+    for day in range(reports_per_stock):
+        with engine.begin() as conn:
+            conn.execute(insert(AnalysisReport), [{
+                'stock_id': i + 1, 'analysis_type': AnalysisType.DAILY_AUTO, 'summary_markdown': "summary",
+                'entry_rating': latest[i] if day == reports_per_stock - 1 else rng.choice(ratings),
+                'created_at': base + timedelta(days=day + 1)
+            } for i in range(STOCKS)])
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+
+def join_offset_page(db: Session, offset: int):
+    """The previous list_stocks query"""
+    return db.query(Stock).filter(Stock.is_tracked == True).join(AnalysisReport).filter(
+        AnalysisReport.entry_rating == RATING
+    ).offset(offset).limit(PAGE_SIZE).all()
+
+def keyset_page(db: Session, after):
+    query = db.query(Stock).filter(Stock.is_tracked == True, Stock.latest_entry_rating == RATING)
+    if after is not None:
+        query = query.filter(Stock.id > after)
+    return query.order_by(Stock.id).limit(PAGE_SIZE).all()
+
+def timed(engine, func, arg, repeats: int) -> float:
+    values = []
+    for _ in range(repeats):
+        with Session(engine) as db:
+            start = time.perf_counter()
+            func(db, arg)
+            values.append((time.perf_counter() - start) * 1000)
+    return statistics.median(values)
+
+def main(reports_per_stock: int = 200, repeats: int = 20):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(os.getenv("DATABASE_URL", f"sqlite:///{tmp}/list_stocks.db"))
+        Base.metadata.create_all(bind=engine)
+        start = time.perf_counter()
+        seed(engine, reports_per_stock)
+        print(f"seeded {STOCKS:,} stocks / {STOCKS * reports_per_stock:,} reports in {time.perf_counter() - start:.1f} s")
+
+        with Session(engine) as db:
+            matching = db.query(Stock.id).filter(Stock.latest_entry_rating == RATING).order_by(Stock.id).all()
+            joined = db.query(Stock.id).join(AnalysisReport).filter(AnalysisReport.entry_rating == RATING).count()
+        ids = [row.id for row in matching]
+        print(f"stocks currently rated {RATING.value}: {len(ids)}; rows matched by the join: {joined:,}")
+
+        # Each listing paged to its own first, middle and last page
+        for label, fraction in (('first', 0.0), ('middle', 0.5), ('last', 1.0)):
+            offset = int((joined - 1) // PAGE_SIZE * fraction) * PAGE_SIZE
+            keyset_offset = int((len(ids) - 1) // PAGE_SIZE * fraction) * PAGE_SIZE
+            after = ids[keyset_offset - 1] if keyset_offset else None
+            before = timed(engine, join_offset_page, offset, repeats)
+            after_ms = timed(engine, keyset_page, after, repeats)
+            print(f"{label:<7} page  join + OFFSET {before:8.2f} ms   latest column + keyset {after_ms:6.2f} ms")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
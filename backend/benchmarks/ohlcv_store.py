@@ -0,0 +1,98 @@
+"""Loading and ingesting daily bar history with the memory-mapped OHLCV store.
+
+Fills a temporary store with synthetic bars, then times mapping every
+symbol with OHLCVStore.load_many against reading the same files into
+memory with np.fromfile, and a computation over the mapped bars. A
+stand-in for yf.download (counting requests) shows the ingestion cost of
+the first backfill, of the next day's incremental run and of a rerun.
+
+    cd backend && PYTHONPATH=. python benchmarks/ohlcv_store.py [symbols] [years]
+"""
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from app.services import market_data
+from app.services.cache import InMemoryBackend, MarketDataCache
+from app.services.ohlcv_store import BAR_DTYPE, OHLCVStore, ingest, ingest_executor
+
+TODAY = date(2026, 1, 6)
+
+def synthetic_bars(sessions: np.ndarray, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(sessions))))
+    bars = np.empty(len(sessions), dtype=BAR_DTYPE)
+    bars['date'] = sessions
+    bars['open'] = close * 0.995
+    bars['high'] = close * 1.01
+    bars['low'] = close * 0.99
+    bars['close'] = close
+    bars['volume'] = rng.integers(1_000, 1_000_000, len(sessions))
+    return bars
+
+def fake_download(requests: list):
+    """yf.download stand-in returning weekday bars up to and including today; records its own time"""
+    def download(symbols, start=None, period=None, **kwargs):
+        began = time.perf_counter()
+        first = date.fromisoformat(start) if start else TODAY - timedelta(days=365 * int(period[:-1]))
+        index = pd.DatetimeIndex(pd.bdate_range(first, TODAY), name='Date')
+        frames = {}
+        for i, symbol in enumerate(symbols):
+            close = np.linspace(100.0, 110.0, len(index)) + i
+            frames[symbol] = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                                           'Adj Close': close, 'Volume': 1000}, index=index)
+        data = pd.concat(frames, axis=1)
+        requests.append(time.perf_counter() - began)
+        return data
+    return download
+
+def median_ms(func, samples: int = 5):
+    values = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        result = func()
+        values.append((time.perf_counter() - start) * 1000)
+    return statistics.median(values), result
+
+def main(symbols: int = 1000, years: int = 10):
+    names = [f"S{i:04d}" for i in range(symbols)]
+    sessions = np.arange(np.datetime64(TODAY, 'D') - 365 * years, np.datetime64(TODAY, 'D'))
+    sessions = sessions[np.is_busday(sessions)]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = OHLCVStore(tmp)
+        for i, name in enumerate(names):
+            store.append(name, synthetic_bars(sessions, i))
+        total_mb = symbols * len(sessions) * BAR_DTYPE.itemsize / 2 ** 20
+        print(f"{symbols} symbols x {len(sessions)} sessions ({years} years), {total_mb:,.0f} MiB")
+
+        mapped_ms, mapped = median_ms(lambda: store.load_many(names))
+        copied_ms, _ = median_ms(lambda: {name: np.fromfile(store.path(name), dtype=BAR_DTYPE) for name in names})
+        compute_ms, _ = median_ms(lambda: [bars['close'][-252:].mean() for bars in mapped.values()])
+        print(f"load_many (memmap)     {mapped_ms:8.1f} ms")
+        print(f"np.fromfile (copy)     {copied_ms:8.1f} ms")
+        print(f"1-year mean close      {compute_ms:8.1f} ms over the mapped bars")
+
+    requests = []
+    market_data.yf.download = fake_download(requests)
+    service = market_data.MarketDataService(MarketDataCache(InMemoryBackend()))
+    with tempfile.TemporaryDirectory() as tmp:
+        store = OHLCVStore(tmp)
+        for label, today in (("backfill", TODAY), ("next day", TODAY + timedelta(days=1)),
+                             ("same day rerun", TODAY + timedelta(days=1))):
+            del requests[:]
+            start = time.perf_counter()
+            stats = asyncio.run(ingest(names, service, store, today=today))
+            elapsed = (time.perf_counter() - start) * 1000
+            # Threads building stand-in responses hold the GIL; their time is reported apart
+            provider_ms = sum(requests) * 1000
+            print(f"ingest {label:<15} {elapsed:8.1f} ms   {len(requests)} downloads "
+                  f"({provider_ms:.0f} ms building stand-in responses), {stats['bars_written']:,} bars written")
+    ingest_executor.shutdown()
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,47 @@
+"""Per-symbol overhead of constructing OpenAIService.
+
+Compares the previous behaviour (query UserSecrets, decrypt the key and
+build a fresh client for every symbol) with the shared client registry.
+
+    cd backend && PYTHONPATH=. python benchmarks/openai_client_setup.py [iterations]
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import openai
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, UserSecrets
+from app.services.openai_service import OpenAIService, openai_client_registry
+from app.utils.encryption import decrypt_key, encrypt_key
+
+def per_symbol_setup(db):
+    """The pre-registry construction path"""
+    secrets = db.query(UserSecrets).first()
+    api_key = decrypt_key(secrets.openai_api_key_encrypted)
+    return openai.AsyncOpenAI(api_key=api_key, max_retries=0)
+
+def timed(label, func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed / iterations * 1e6:10.1f} us/symbol")
+
+def main(iterations: int = 500):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(UserSecrets(openai_api_key_encrypted=encrypt_key("sk-benchmark")))
+    db.commit()
+
+    timed("per-symbol client", lambda: per_symbol_setup(db), iterations)
+    asyncio.run(openai_client_registry.invalidate())
+    timed("shared client registry", lambda: OpenAIService(db), iterations)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,116 @@
+"""Wall time of fetching option chains for a DTE window, and their cache size.
+
+A stand-in for yf.Ticker sleeps for a fixed provider latency per request
+and returns yfinance-shaped chains. Fetching each expiration in turn (the
+previous approach) is compared with MarketDataService.get_option_chain,
+which fetches the expirations missing from the cache concurrently, and
+with a second read served from the chain cache.
+
+    cd backend && PYTHONPATH=. python benchmarks/option_chain_fetch.py [symbols] [expirations] [latency_ms]
+"""
+import asyncio
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from app.services import market_data
+from app.services.cache import InMemoryBackend, MarketDataCache, encode
+from app.services.options_analytics import CHAIN_COLUMNS, expirations_in_window, pack_chain
+
+STRIKES = 150
+
+def yfinance_side(strikes: int, rng) -> pd.DataFrame:
+    """Contracts with the columns yfinance returns"""
+    strike = np.linspace(50.0, 150.0, strikes)
+    return pd.DataFrame({
+        'contractSymbol': [f"SYM260101C{int(value * 1000):08d}" for value in strike],
+        'lastTradeDate': pd.Timestamp('2026-01-02 15:59', tz='UTC'),
+        'strike': strike,
+        'lastPrice': rng.uniform(0.05, 10.0, strikes),
+        'bid': rng.uniform(0.05, 10.0, strikes),
+        'ask': rng.uniform(10.0, 11.0, strikes),
+        'change': 0.0,
+        'percentChange': 0.0,
+        'volume': rng.integers(0, 5000, strikes).astype(float),
+        'openInterest': rng.integers(0, 50000, strikes),
+        'impliedVolatility': rng.uniform(0.15, 0.6, strikes),
+        'inTheMoney': strike < 100.0,
+        'contractSize': 'REGULAR',
+        'currency': 'USD',
+    })
+
+class SlowTicker:
+    """yf.Ticker stand-in answering after a fixed latency"""
+    latency = 0.1
+    expirations = 8
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self._rng = np.random.default_rng(len(symbol))
+
+    @property
+    def options(self):
+        time.sleep(self.latency)
+        # Weekly expirations, the first ones inside the default 21-60 day window
+        return tuple((date.today() + timedelta(days=21 + 5 * i)).isoformat() for i in range(self.expirations))
+
+    def option_chain(self, expiry: str):
+        time.sleep(self.latency)
+        return type('Options', (), {'calls': yfinance_side(STRIKES, self._rng), 'puts': yfinance_side(STRIKES, self._rng)})
+
+def sequential(symbol: str) -> pd.DataFrame:
+    """One expiration after another, as the options fetch used to do"""
+    ticker = SlowTicker(symbol)
+    frames = []
+    for expiry in expirations_in_window(ticker.options, date.today()):
+        opt = ticker.option_chain(expiry)
+        for option_type, contracts in (('call', opt.calls), ('put', opt.puts)):
+            frames.append(contracts[CHAIN_COLUMNS].assign(option_type=option_type, expiration_date=expiry))
+    return pd.concat(frames, ignore_index=True)
+
+async def timed(coroutine_factory):
+    start = time.perf_counter()
+    result = await coroutine_factory()
+    return (time.perf_counter() - start) * 1000, result
+
+async def run(symbols: int, expirations: int, latency_ms: int):
+    SlowTicker.latency = latency_ms / 1000
+    SlowTicker.expirations = expirations
+    market_data.yf.Ticker = SlowTicker
+    names = [f"SYM{i}" for i in range(symbols)]
+    service = market_data.MarketDataService(MarketDataCache(InMemoryBackend()))
+    executor = market_data.provider_executor
+
+    async def all_sequential():
+        return await asyncio.gather(*[executor.run(sequential, name) for name in names])
+
+    async def all_concurrent():
+        return await asyncio.gather(*[service.get_option_chain(name) for name in names])
+
+    sequential_ms, frames = await timed(all_sequential)
+    concurrent_ms, chains = await timed(all_concurrent)
+    cold_requests = service.request_stats()['total']
+    service.reset_run_cache()
+    cached_ms, cached = await timed(all_concurrent)
+    same = all(len(a) == len(b) == len(c) for a, b, c in zip(frames, chains, cached))
+
+    expiry = SlowTicker('SYM0').option_chain('')
+    # Serialized as the Redis backend stores them
+    raw_bytes = len(encode([expiry.calls, expiry.puts]))
+    packed_bytes = len(encode(pack_chain(expiry.calls, expiry.puts)))
+
+    print(f"{symbols} symbols x {len(frames[0]) // (2 * STRIKES)} expirations in window, "
+          f"{latency_ms} ms per provider request, {executor.max_workers} provider threads")
+    print(f"sequential per expiry   {sequential_ms:8.1f} ms")
+    print(f"concurrent, cold cache  {concurrent_ms:8.1f} ms   ({cold_requests} requests)")
+    print(f"chain cache, warm       {cached_ms:8.1f} ms   ({service.request_stats()['total']} requests, same rows: {same})")
+    print(f"cached size per expiry  {packed_bytes / 1024:8.1f} KiB packed vs {raw_bytes / 1024:.1f} KiB as DataFrames")
+
+def main(symbols: int = 5, expirations: int = 8, latency_ms: int = 100):
+    asyncio.run(run(symbols, expirations, latency_ms))
+    market_data.provider_executor.shutdown()
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:4]))
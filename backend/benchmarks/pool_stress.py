@@ -0,0 +1,71 @@
+"""Reproduce connection pool exhaustion and show the pool metrics.
+
+A simulated daily run keeps ANALYSIS_CONCURRENCY sessions busy with slow
+writes while dashboard clients issue short reads, all against the async
+engine. With a small pool and a short timeout, the reads queue behind the
+run and checkouts time out. The same load is then repeated with the
+configured pool settings. Each pass prints the GET /api/metrics/db snapshot.
+
+    cd backend && PYTHONPATH=. python benchmarks/pool_stress.py [seconds] [clients]
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp.name}/pool_stress.db")
+
+from sqlalchemy import exc, text
+import app.database as database
+from app.services.analysis_service import ANALYSIS_CONCURRENCY
+
+# Seconds a run session holds its connection, and a dashboard read holds its own
+RUN_HOLD = 0.2
+READ_HOLD = 0.01
+
+async def hold(hold_for: float, counters: dict, key: str):
+    try:
+        async with database.AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
+            await asyncio.sleep(hold_for)
+        counters[key] += 1
+    except exc.TimeoutError:
+        counters['timeouts'] += 1
+
+async def run_worker(stop: asyncio.Event, counters: dict):
+    while not stop.is_set():
+        await hold(RUN_HOLD, counters, 'run_sessions')
+
+async def dashboard_client(stop: asyncio.Event, counters: dict):
+    while not stop.is_set():
+        await hold(READ_HOLD, counters, 'reads')
+
+async def stress(label: str, seconds: float, clients: int):
+    counters = {'run_sessions': 0, 'reads': 0, 'timeouts': 0}
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(run_worker(stop, counters)) for _ in range(ANALYSIS_CONCURRENCY)]
+    tasks += [asyncio.create_task(dashboard_client(stop, counters)) for _ in range(clients)]
+    start = time.perf_counter()
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    print(f"{label}: {counters['reads'] / elapsed:.0f} reads/s, "
+          f"{counters['run_sessions']} run sessions, {counters['timeouts']} checkout timeouts")
+    print(json.dumps(database.pool_stats()['async'], indent=2))
+    await database.dispose_async_engine()
+
+async def main(seconds: float = 5.0, clients: int = 50):
+    configured = (database.DB_POOL_SIZE, database.DB_MAX_OVERFLOW, database.DB_POOL_TIMEOUT)
+    # The old engine defaults, with a short timeout so exhaustion shows up within the run
+    database.DB_POOL_SIZE, database.DB_MAX_OVERFLOW, database.DB_POOL_TIMEOUT = 5, 0, 0.5
+    await stress("pool 5 + 0 overflow, 0.5 s timeout", seconds, clients)
+    database.DB_POOL_SIZE, database.DB_MAX_OVERFLOW, database.DB_POOL_TIMEOUT = configured
+    await stress(f"pool {configured[0]} + {configured[1]} overflow, {configured[2]:g} s timeout", seconds, clients)
+
+if __name__ == "__main__":
+    args = sys.argv[1:3]
+    asyncio.run(main(float(args[0]) if args else 5.0, int(args[1]) if len(args) > 1 else 50))
@@ -0,0 +1,122 @@
+"""Read throughput of the API while a daily run is writing, sync vs async sessions.
+
+Concurrent clients request GET /api/stocks/{symbol} through the ASGI app
+(one event loop, as in a single uvicorn worker) while a simulated daily run
+bulk-writes news rows and refreshes stock_latest. Two setups are measured:
+
+- sync:  the previous pattern, a SessionLocal used inside async handlers and
+         run-time writes committed on the event loop
+- async: the AsyncSession endpoints and the async BulkWriter
+
+    cd backend && PYTHONPATH=. python benchmarks/read_under_run.py [seconds] [clients]
+"""
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp.name}/read_under_run.db")
+
+import httpx
+from sqlalchemy import insert, select
+from app.database import SessionLocal, create_tables, engine, dispose_async_engine
+from app.main import app
+from app.models import NewsArticle, Stock
+from app.services.bulk_writer import BulkWriter
+from app.services.stock_latest import get_stock_detail_payload, refresh_stock_latest
+from benchmarks.latest_per_stock import STOCKS, seed
+
+ROWS_PER_FLUSH = 500
+
+@app.get("/bench/sync/{symbol}")
+async def sync_stock_detail(symbol: str):
+    """The pre-AsyncSession handler shape: blocking queries on the event loop"""
+    db = SessionLocal()
+    try:
+        return get_stock_detail_payload(db, symbol)
+    finally:
+        db.close()
+
+def news_rows(batch: int):
+    now = datetime.utcnow()
+    return [{
+        'stock_id': i % STOCKS + 1, 'title': "run", 'url': f"https://run.example/{batch}/{i}",
+        'url_hash': hashlib.sha256(f"https://run.example/{batch}/{i}".encode()).hexdigest(),
+        'published_at': now
+    } for i in range(ROWS_PER_FLUSH)]
+
+async def sync_run(stop: asyncio.Event):
+    batch = 0
+    while not stop.is_set():
+        db = SessionLocal()
+        try:
+            db.execute(insert(NewsArticle), news_rows(batch))
+            db.commit()
+            refresh_stock_latest(db, range(1 + batch % STOCKS, 1 + batch % STOCKS + 20))
+        finally:
+            db.close()
+        batch += 1
+        await asyncio.sleep(0)
+
+async def async_run(stop: asyncio.Event):
+    from app.database import AsyncSessionLocal
+    batch = 0
+    while not stop.is_set():
+        writer = BulkWriter(chunk_size=ROWS_PER_FLUSH)
+        await writer.add_symbol(f"B{batch}", [(NewsArticle, row) for row in news_rows(batch)])
+        await writer.flush()
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(refresh_stock_latest, range(1 + batch % STOCKS, 1 + batch % STOCKS + 20))
+        batch += 1
+
+async def reader(client: httpx.AsyncClient, path: str, stop: asyncio.Event, latencies: list, index: int):
+    n = index
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get(path.format(symbol=f"S{n % STOCKS:04d}"))
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        n += 7
+        # In-process requests that never wait on I/O would otherwise starve the other tasks
+        await asyncio.sleep(0)
+
+async def measure(path: str, run, seconds: float, clients: int):
+    stop = asyncio.Event()
+    latencies: list = []
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        tasks = [asyncio.create_task(reader(client, path, stop, latencies, i)) for i in range(clients)]
+        if run:
+            tasks.append(asyncio.create_task(run(stop)))
+        await asyncio.sleep(seconds)
+        stop.set()
+        await asyncio.gather(*tasks)
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+    return len(latencies) / seconds, p99
+
+async def main(seconds: float = 5.0, clients: int = 20):
+    create_tables()
+    with SessionLocal() as db:
+        if db.scalar(select(Stock.id).limit(1)) is None:
+            seed(engine, 50000)
+            refresh_stock_latest(db, db.scalars(select(Stock.id)).all())
+
+    setups = {
+        'sync': ("/bench/sync/{symbol}", sync_run),
+        'async': ("/api/stocks/{symbol}", async_run),
+    }
+    for name, (path, run) in setups.items():
+        idle_rps, idle_p99 = await measure(path, None, seconds, clients)
+        busy_rps, busy_p99 = await measure(path, run, seconds, clients)
+        print(f"{name:<6} idle {idle_rps:7.0f} req/s (p99 {idle_p99:7.1f} ms)   "
+              f"during run {busy_rps:7.0f} req/s (p99 {busy_p99:7.1f} ms)   "
+              f"retained {busy_rps / idle_rps:5.0%}")
+    await dispose_async_engine()
+
+if __name__ == "__main__":
+    args = sys.argv[1:3]
+    asyncio.run(main(float(args[0]) if args else 5.0, int(args[1]) if len(args) > 1 else 20))
@@ -0,0 +1,90 @@
+"""History queries over stock snapshots: ORM rows versus the Parquet store.
+
+Seeds a temporary SQLite database with one snapshot per symbol per daily
+run, exports every run with app.services.snapshot_store.write_run and
+compacts all but the last month as the daily runs do, then
+builds a run date x symbol price frame through the ORM (StockSnapshot
+objects with Numeric columns) and through price_history, for the whole
+universe and for a single symbol.
+
+    cd backend && PYTHONPATH=. python benchmarks/snapshot_history.py [symbols] [runs] [samples]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from app.models import Base, DailyRun, DailyRunStatus, Stock, StockSnapshot
+from app.services.snapshot_store import compact, price_history, write_run
+
+def seed(engine, symbols: int, runs: int):
+    first = date(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Stock), [{'symbol': f"S{i:04d}", 'name': f"Stock {i}"} for i in range(symbols)])
+        conn.execute(insert(DailyRun), [{
+            'run_date': first + timedelta(days=day), 'universe': "US_LARGE_CAP", 'status': DailyRunStatus.COMPLETED
+        } for day in range(runs)])
+        for day in range(runs):
+            as_of = datetime.combine(first + timedelta(days=day), datetime.min.time()) + timedelta(hours=9)
+            conn.execute(insert(StockSnapshot), [{
+                'daily_run_id': day + 1, 'stock_id': i + 1, 'sequence': i + 1, 'market_cap': 1e9 + i,
+                'price': 100 + (i * 7 + day) % 50 + 0.25, 'open_price': 100, 'day_high': 101, 'day_low': 99,
+                'volume': 1000 + i, 'high_52w': 150, 'low_52w': 50, 'pe_ratio': 20, 'beta': 1.1, 'as_of': as_of
+            } for i in range(symbols)])
+    return first, first + timedelta(days=runs - 1)
+
+def orm_history(engine, start: date, end: date, symbol=None) -> pd.DataFrame:
+    """Price frame built from ORM objects, as a history endpoint would today"""
+    with Session(engine) as db:
+        query = select(StockSnapshot, DailyRun.run_date, Stock.symbol).join(
+            DailyRun, DailyRun.id == StockSnapshot.daily_run_id
+        ).join(Stock, Stock.id == StockSnapshot.stock_id).where(DailyRun.run_date.between(start, end))
+        if symbol:
+            query = query.where(Stock.symbol == symbol)
+        rows = [{'run_date': run_date, 'symbol': name, 'price': float(snapshot.price)}
+                for snapshot, run_date, name in db.execute(query)]
+    return pd.DataFrame(rows).pivot(index='run_date', columns='symbol', values='price')
+
+def timed(func, samples: int):
+    values = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        result = func()
+        values.append((time.perf_counter() - start) * 1000)
+    return statistics.median(values), result
+
+def main(symbols: int = 500, runs: int = 250, samples: int = 3):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/history.db")
+        Base.metadata.create_all(engine)
+        start, end = seed(engine, symbols, runs)
+        root = os.path.join(tmp, "snapshots")
+
+        began = time.perf_counter()
+        with Session(engine) as db:
+            for run_id in range(1, runs + 1):
+                write_run(db, run_id, root)
+        write_ms = (time.perf_counter() - began) * 1000 / runs
+        began = time.perf_counter()
+        months = compact(root, before=end)
+        compact_ms = (time.perf_counter() - began) * 1000
+        files = [os.path.join(path, name) for path, _, names in os.walk(root) for name in names]
+        store_kib = sum(os.path.getsize(path) for path in files) / 1024
+
+        print(f"{symbols} symbols x {runs} runs = {symbols * runs:,} snapshots; write {write_ms:.1f} ms per run; "
+              f"{months} months compacted in {compact_ms:.0f} ms; {len(files)} files, {store_kib:,.0f} KiB")
+        for label, symbol in (("universe", None), ("one symbol", "S0007")):
+            orm_ms, orm_frame = timed(lambda: orm_history(engine, start, end, symbol), samples)
+            store_ms, store_frame = timed(lambda: price_history([symbol] if symbol else None, start, end, root=root), samples)
+            same = orm_frame.to_numpy().tolist() == store_frame.to_numpy().tolist()
+            print(f"{label:<10}  ORM {orm_ms:9.1f} ms   Parquet {store_ms:8.1f} ms   "
+                  f"({orm_ms / store_ms:.0f}x, {store_frame.size:,} values, same: {same})")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:4]))
@@ -0,0 +1,76 @@
+"""p50/p99 latency of building the GET /api/stocks/{symbol} response.
+
+Compares the previous five sequential queries plus per-row serialization
+with a single lookup in the stock_latest table. Both paths include
+validation into StockDetailResponse. Seeds the same data set as
+latest_per_stock.py (composite indexes present in both cases).
+
+    cd backend && PYTHONPATH=. python benchmarks/stock_detail.py [rows_per_table] [samples]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+from app.models import AnalysisReport, Base, Filing, NewsArticle, OptionsSnapshot, Stock
+from app.schemas.stock_schemas import StockDetailResponse
+from app.services.stock_latest import get_stock_detail_payload, refresh_stock_latest, serialize_row
+from benchmarks.latest_per_stock import STOCKS, seed
+
+def five_queries(db: Session, symbol: str):
+    """The pre-stock_latest endpoint body"""
+    stock = db.query(Stock).filter(Stock.symbol == symbol).first()
+    latest_analysis = db.query(AnalysisReport).filter(
+        AnalysisReport.stock_id == stock.id
+    ).order_by(AnalysisReport.created_at.desc()).first()
+    recent_news = db.query(NewsArticle).filter(
+        NewsArticle.stock_id == stock.id
+    ).order_by(NewsArticle.published_at.desc()).limit(10).all()
+    latest_filings = db.query(Filing).filter(
+        Filing.stock_id == stock.id
+    ).order_by(Filing.file_date.desc()).limit(5).all()
+    latest_options = db.query(OptionsSnapshot).filter(
+        OptionsSnapshot.stock_id == stock.id
+    ).order_by(OptionsSnapshot.id.desc()).first()
+    return {
+        "stock": stock,
+        "latest_analysis": serialize_row(latest_analysis) if latest_analysis else None,
+        "recent_news": [serialize_row(row) for row in recent_news],
+        "latest_filings": [serialize_row(row) for row in latest_filings],
+        "latest_options": serialize_row(latest_options) if latest_options else None,
+    }
+
+def timed(engine, label: str, build, symbols):
+    values = []
+    for symbol in symbols:
+        # A fresh session per request, as with the get_db dependency
+        with Session(engine) as db:
+            start = time.perf_counter()
+            StockDetailResponse.model_validate(build(db, symbol))
+            values.append((time.perf_counter() - start) * 1000)
+    values.sort()
+    print(f"{label:<22} p50 {statistics.median(values):8.2f} ms   p99 {values[int(len(values) * 0.99) - 1]:8.2f} ms")
+
+def main(rows: int = 1_000_000, samples: int = 1000):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(os.getenv("DATABASE_URL", f"sqlite:///{tmp}/stock_detail.db"))
+        Base.metadata.create_all(bind=engine)
+        with Session(engine) as db:
+            if not db.scalar(select(func.count()).select_from(NewsArticle)):
+                seed(engine, rows)
+            start = time.perf_counter()
+            refresh_stock_latest(db, db.scalars(select(Stock.id)).all())
+            print(f"refreshed stock_latest for {STOCKS} stocks in {time.perf_counter() - start:.2f} s")
+
+        rng = random.Random(7)
+        symbols = [f"S{rng.randrange(STOCKS):04d}" for _ in range(samples)]
+        timed(engine, "five queries", five_queries, symbols)
+        timed(engine, "stock_latest lookup", get_stock_detail_payload, symbols)
+        engine.dispose()
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,137 @@
+"""Shared fixtures: a throwaway SQLite database and an event loop runner.
+
+The database URL is set before any app module is imported, since
+app.database creates its engines at import time.
+"""
+import asyncio
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="stockresearch-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ.setdefault("ENCRYPTION_PASSWORD", "test-password")
+os.environ.setdefault("CACHE_BACKEND", "memory")
+# Runs write no files outside the test database
+os.environ.setdefault("OHLCV_STORE_ENABLED", "false")
+os.environ.setdefault("SNAPSHOT_STORE_ENABLED", "false")
+
+import pytest
+from app.database import SessionLocal, dispose_async_engine, engine
+from app.models import Base
+
+@pytest.fixture(autouse=True)
+def tables():
+    """Fresh tables for every test"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion; async engine connections are closed on the same loop"""
+    def run_coroutine(coroutine):
+        async def scoped():
+            try:
+                return await coroutine
+            finally:
+                await dispose_async_engine()
+        return asyncio.run(scoped())
+    return run_coroutine
+
+@pytest.fixture
+def market():
+    """Provider data served to analyses in place of yfinance and news; tests edit it"""
+    return {'price': 100.0, 'market_cap': 3e12, 'news': [], 'earnings': {'upcoming': [], 'historical': []}, 'options': None}
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Replace OpenAI with a stub; returns the list of prompts it received"""
+    prompts = []
+
+    class StubOpenAIService:
+        def __init__(self, db):
+            pass
+
+        async def analyze_stock(self, stock_data):
+            prompts.append(stock_data)
+            return {
+                'summary_markdown': f"Report {len(prompts)}",
+                'entry': {'rating': 'buy', 'rationale': 'Stub'},
+                'covered_call': {'rating': 'neutral', 'rationale': 'Stub'},
+                'secured_put': {'rating': 'neutral', 'rationale': 'Stub'},
+                'risks_and_issues': [],
+            }
+
+    monkeypatch.setattr("app.services.analysis_service.OpenAIService", StubOpenAIService)
+    return prompts
+
+class AnalysisHarness:
+    """One stock and daily run, analyzed against stubbed providers and LLM"""
+
+    def __init__(self, db, run, market):
+        from datetime import date
+        from app.models import DailyRun, DailyRunStatus, Stock
+
+        self.run, self.market = run, market
+        stock = Stock(symbol="AAPL", name="Apple Inc.")
+        daily_run = DailyRun(run_date=date.today(), universe="US_LARGE_CAP", status=DailyRunStatus.RUNNING)
+        db.add_all([stock, daily_run])
+        db.commit()
+        self.stock_id, self.run_id = stock.id, daily_run.id
+
+    def service(self, session):
+        """AnalysisService whose market data and news come from self.market"""
+        from datetime import datetime
+        from app.services.analysis_service import AnalysisService
+
+        market = self.market
+
+        class StubMarketData:
+            def reset_run_cache(self):
+                pass
+
+            def request_stats(self):
+                return {'total': 0}
+
+            async def get_stock_data(self, symbol):
+                return {'symbol': symbol, 'name': "Apple Inc.", 'price': market['price'],
+                        'market_cap': market['market_cap'], 'as_of': datetime.now()}
+
+            async def get_earnings_data(self, symbol):
+                return market['earnings']
+
+            async def get_options_data(self, symbol):
+                return market['options']
+
+        class StubNews:
+            async def get_stock_news(self, symbol):
+                return market['news']
+
+        service = AnalysisService(session)
+        service.market_service, service.news_service = StubMarketData(), StubNews()
+        return service
+
+    def analyze(self, analysis_type=None):
+        """Analyze the stock once (a daily-run analysis by default) and write its rows"""
+        from app.database import AsyncSessionLocal
+        from app.models import AnalysisType
+        from app.services.bulk_writer import BulkWriter
+
+        async def analyze_stock():
+            async with AsyncSessionLocal() as session:
+                service = self.service(session)
+                writer = BulkWriter()
+                await service._analyze_single_stock("AAPL", self.stock_id, self.run_id, rank=1, writer=writer,
+                                                    analysis_type=analysis_type or AnalysisType.DAILY_AUTO)
+                assert await writer.flush()
+                return service
+        return self.run(analyze_stock())
+
+@pytest.fixture
+def analysis(db, run, market, llm):
+    return AnalysisHarness(db, run, market)
@@ -0,0 +1,40 @@
+import asyncio
+
+from app.database import AsyncSessionLocal, get_async_engine
+from app.models import RunSymbolProgress, SymbolStatus
+from app.services.bulk_writer import BulkWriter
+
+def test_no_connection_is_held_during_the_llm_call(analysis, db, run, monkeypatch):
+    checked_out = []
+    all_waiting = asyncio.Barrier(3)
+
+    class MeasuringOpenAIService:
+        def __init__(self, db):
+            pass
+
+        async def analyze_stock(self, stock_data):
+            # Measured once every analysis is waiting on the LLM
+            await all_waiting.wait()
+            checked_out.append(get_async_engine().pool.checkedout())
+            return {'entry': {'rating': 'hold', 'rationale': ''}, 'covered_call': {'rating': 'neutral', 'rationale': ''},
+                    'secured_put': {'rating': 'neutral', 'rationale': ''}}
+
+    monkeypatch.setattr("app.services.analysis_service.OpenAIService", MeasuringOpenAIService)
+    progress = RunSymbolProgress(daily_run_id=analysis.run_id, stock_id=analysis.stock_id, symbol="AAPL",
+                                 rank=1, status=SymbolStatus.PENDING)
+    db.add(progress)
+    db.commit()
+
+    async def analyze_concurrently():
+        async with AsyncSessionLocal() as session:
+            service = analysis.service(session)
+            writer = BulkWriter()
+            semaphore = asyncio.Semaphore(3)
+            results = await asyncio.gather(*[
+                service._analyze_symbol_isolated(semaphore, row, analysis.run_id, writer) for row in [progress] * 3
+            ])
+            await writer.flush()
+            return results
+
+    assert run(analyze_concurrently()) == [True, True, True]
+    assert checked_out == [0, 0, 0]
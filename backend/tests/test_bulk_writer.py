@@ -0,0 +1,24 @@
+from datetime import date
+
+import pytest
+from app.models import EarningsEvent, EventType, Stock
+from app.services.bulk_writer import UPSERT_KEYS, _select_then_write, upsert
+
+def event(stock_id, day, eps):
+    return {'stock_id': stock_id, 'event_type': EventType.HISTORICAL, 'event_date': date(2026, 1, day),
+            'eps_actual': eps, 'eps_estimate': None, 'surprise_percent': None, 'fiscal_period': None}
+
+# ON CONFLICT on SQLite, and the fallback used by other dialects
+@pytest.mark.parametrize("write", [upsert, _select_then_write])
+def test_upsert_updates_existing_keys_and_inserts_new_ones(db, write):
+    stock = Stock(symbol="AAPL", name="Apple Inc.")
+    db.add(stock)
+    db.commit()
+    upsert(db, EarningsEvent, [event(stock.id, 5, 1.0)], UPSERT_KEYS[EarningsEvent])
+    db.commit()
+
+    write(db, EarningsEvent, [event(stock.id, 5, 2.0), event(stock.id, 6, 3.0)], UPSERT_KEYS[EarningsEvent])
+    db.commit()
+    db.expire_all()
+    rows = db.query(EarningsEvent).order_by(EarningsEvent.event_date).all()
+    assert [(row.event_date.day, float(row.eps_actual)) for row in rows] == [(5, 2.0), (6, 3.0)]
@@ -0,0 +1,66 @@
+import pickle
+from datetime import date, datetime
+
+import fakeredis
+import numpy as np
+import pandas as pd
+from app.services.cache import InMemoryBackend, MarketDataCache, RedisBackend, decode, encode
+
+def test_memory_backend_expires_entries(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("app.services.cache.time.monotonic", lambda: clock[0])
+    cache = MarketDataCache(InMemoryBackend(), ttls={'quote': 30})
+    cache.set('quote', 'AAPL', {'price': 1.0})
+    assert cache.get('quote', 'AAPL') == {'price': 1.0}
+    clock[0] += 31
+    assert cache.get('quote', 'AAPL') is None
+    assert cache.hits['quote'] == 1 and cache.misses['quote'] == 1
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = InMemoryBackend(max_entries=2)
+    backend.set('a', 1, 60)
+    backend.set('b', 2, 60)
+    backend.get('a')
+    backend.set('c', 3, 60)
+    assert backend.size() == 2 and backend.evictions == 1
+    assert backend.get('a') == 1 and backend.get('c') == 3
+
+def test_redis_backend_round_trips_market_data():
+    cache = MarketDataCache(RedisBackend(fakeredis.FakeStrictRedis()))
+    value = {
+        'as_of': datetime(2026, 1, 5, 15, 30, 1, 250),
+        'event_date': pd.Timestamp('2026-01-29 16:00', tz='America/New_York'),
+        'expiry': date(2026, 2, 20),
+        'price': np.float64(187.5),
+        'volume': np.int64(1_200_000),
+        'eps': float('nan'),
+        'strike': np.array([100.0, np.nan, 110.0]),
+        'is_call': np.array([True, False, True]),
+        'bars': pd.DataFrame({'close': [1.0, 2.0]}, index=['a', 'b']),
+    }
+    cache.set('quote', 'AAPL', value)
+    restored = cache.get('quote', 'AAPL')
+
+    assert restored['as_of'] == value['as_of']
+    assert restored['event_date'] == value['event_date']
+    assert restored['expiry'] == value['expiry']
+    assert restored['price'] == 187.5 and restored['volume'] == 1_200_000
+    assert np.isnan(restored['eps'])
+    np.testing.assert_array_equal(restored['strike'], value['strike'])
+    assert restored['is_call'].dtype == bool
+    pd.testing.assert_frame_equal(restored['bars'], value['bars'])
+
+def test_redis_backend_never_unpickles():
+    class Payload:
+        def __reduce__(self):
+            return (exec, ("raise SystemExit('pickle payload executed')",))
+
+    client = fakeredis.FakeStrictRedis()
+    cache = MarketDataCache(RedisBackend(client))
+    client.set("stockresearch:quote:AAPL", pickle.dumps(Payload()))
+    assert cache.get('quote', 'AAPL', default='missing') == 'missing'
+    assert cache.errors == 1
+
+def test_encode_is_plain_json():
+    assert decode(encode({'symbols': ['AAPL', 'MSFT'], 'count': 2})) == {'symbols': ['AAPL', 'MSFT'], 'count': 2}
+    assert encode([1.5]) == b'[1.5]'
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+from app.models import AnalysisReport, AnalysisType
+from app.services.delta_detection import DELTA_MAX_AGE_HOURS, detect_changes
+
+def reports(db):
+    db.expire_all()
+    return db.query(AnalysisReport).order_by(AnalysisReport.id).all()
+
+def baseline(analyzed_at):
+    return {'analyzed_at': analyzed_at.isoformat(), 'price': 100.0, 'implied_vol': 0.3, 'has_options': True,
+            'news': ['a'], 'issue_news': [], 'earnings': []}
+
+def test_only_age_triggers_on_unchanged_inputs():
+    now = datetime(2026, 3, 10, 12)
+    current = baseline(now)
+    assert detect_changes(baseline(now - timedelta(hours=DELTA_MAX_AGE_HOURS - 1)), current, now) == []
+    assert detect_changes(baseline(now - timedelta(hours=DELTA_MAX_AGE_HOURS + 1)), current, now) == ['stale']
+
+def test_copies_keep_the_origin_age(analysis, llm, db):
+    analysis.analyze(AnalysisType.ON_DEMAND)
+    analysis.analyze(AnalysisType.ON_DEMAND)  # LLM cache hit
+    analysis.analyze()  # carried forward by delta detection
+    origin, *copies = reports(db)
+    assert len(llm) == 1
+    assert all(copy.carried_from_id == origin.id for copy in copies)
+    assert all(copy.input_baseline == origin.input_baseline for copy in copies)
+
+    # Nothing changed but the origin is now past the max age: the copies must not keep it alive
+    old = (datetime.utcnow() - timedelta(hours=DELTA_MAX_AGE_HOURS + 1)).isoformat()
+    origin.created_at = datetime.utcnow() - timedelta(hours=DELTA_MAX_AGE_HOURS + 1)
+    for report in (origin, *copies):
+        report.input_baseline = {**report.input_baseline, 'analyzed_at': old}
+    db.commit()
+
+    service = analysis.analyze()
+    fresh = reports(db)[-1]
+    assert len(llm) == 2 and service.unchanged_skips == 0
+    assert fresh.carried_from_id is None and fresh.input_baseline['analyzed_at'] > old
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import update
+from app import worker
+from app.database import AsyncSessionLocal
+from app.jobs import queue
+from app.models import AnalysisJob, DailyRun, DailyRunStatus, JobStatus, JobType
+
+def enqueue_jobs(run, count: int = 1, daily_run_id=None):
+    async def add():
+        async with AsyncSessionLocal() as db:
+            jobs = [queue.enqueue(db, JobType.ON_DEMAND, {'symbol': f"S{i}"}, daily_run_id) for i in range(count)]
+            await db.commit()
+            return [job.id for job in jobs]
+    return run(add())
+
+def claim(run, worker: str):
+    async def take():
+        async with AsyncSessionLocal() as db:
+            return await queue.claim(db, worker)
+    return run(take())
+
+def test_jobs_are_claimed_oldest_first_and_only_once(run):
+    first, second = enqueue_jobs(run, 2)
+    job = claim(run, "a")
+    assert job.id == first and job.status == JobStatus.RUNNING and job.attempts == 1 and job.locked_by == "a"
+    assert claim(run, "b").id == second
+    assert claim(run, "c") is None
+
+def test_failed_job_is_retried_after_a_delay_then_failed(run, db):
+    daily_run = DailyRun(run_date=date.today(), universe="US_LARGE_CAP", status=DailyRunStatus.RUNNING)
+    db.add(daily_run)
+    db.commit()
+    [job_id] = enqueue_jobs(run, daily_run_id=daily_run.id)
+
+    async def fail(job):
+        async with AsyncSessionLocal() as session:
+            await queue.fail(session, job, "a", "boom")
+
+    run(fail(claim(run, "a")))
+    job = db.get(AnalysisJob, job_id)
+    assert job.status == JobStatus.QUEUED and job.run_after > datetime.utcnow() and job.locked_by is None
+    assert claim(run, "a") is None
+
+    for _ in range(job.max_attempts - 1):
+        job.run_after = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+        run(fail(claim(run, "a")))
+        db.expire_all()
+    assert db.get(AnalysisJob, job_id).status == JobStatus.FAILED
+    assert db.get(DailyRun, daily_run.id).status == DailyRunStatus.FAILED
+
+def test_stale_jobs_are_requeued(run, db):
+    [job_id] = enqueue_jobs(run)
+    claim(run, "crashed")
+    job = db.get(AnalysisJob, job_id)
+    job.heartbeat_at = datetime.utcnow() - timedelta(seconds=queue.JOB_HEARTBEAT_TIMEOUT + 1)
+    db.commit()
+
+    async def requeue():
+        async with AsyncSessionLocal() as session:
+            return await queue.requeue_stale(session)
+
+    assert run(requeue()) == 1
+    taken = claim(run, "b")
+    assert taken.id == job_id and taken.attempts == 2 and taken.locked_by == "b"
+
+    async def heartbeat(worker):
+        async with AsyncSessionLocal() as session:
+            return await queue.heartbeat(session, job_id, worker)
+
+    # The crashed worker no longer owns the job
+    assert run(heartbeat("crashed")) is False
+    assert run(heartbeat("b")) is True
+
+def test_worker_stops_a_job_taken_over_by_another_worker(run, db, monkeypatch):
+    [job_id] = enqueue_jobs(run)
+    cancelled = []
+
+    async def run_job(job):
+        # Another worker requeued and claimed the job meanwhile
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(AnalysisJob).where(AnalysisJob.id == job.id).values(locked_by="b"))
+            await session.commit()
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(job.id)
+            raise
+
+    monkeypatch.setattr(worker, "run_job", run_job)
+    monkeypatch.setattr(worker, "WORKER_HEARTBEAT_INTERVAL", 0.01)
+    assert run(worker.process_next("a")) is True
+
+    job = db.get(AnalysisJob, job_id)
+    assert cancelled == [job_id]
+    assert job.status == JobStatus.RUNNING and job.locked_by == "b"
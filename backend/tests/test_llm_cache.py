@@ -0,0 +1,87 @@
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+from app.models import AnalysisReport, AnalysisType
+from app.services.llm_cache import analysis_input_hash
+from app.services.options_analytics import analyze_chain, contract_records, select_by_delta
+
+def reports(db):
+    db.expire_all()
+    return db.query(AnalysisReport).order_by(AnalysisReport.id).all()
+
+def test_unchanged_input_reuses_the_report(analysis, llm, db):
+    analysis.analyze(AnalysisType.ON_DEMAND)
+    service = analysis.analyze(AnalysisType.ON_DEMAND)
+
+    origin, copy = reports(db)
+    assert len(llm) == 1 and service.llm_cache_hits == 1
+    assert copy.summary_markdown == origin.summary_markdown
+    assert copy.carried_from_id == origin.id
+    assert copy.input_baseline == origin.input_baseline
+
+def test_price_move_within_band_hits_the_cache(analysis, llm, market):
+    analysis.analyze(AnalysisType.ON_DEMAND)
+    market['price'] *= 1.002
+    analysis.analyze(AnalysisType.ON_DEMAND)
+    assert len(llm) == 1
+
+def test_max_age_counts_from_the_original_report(analysis, llm, db):
+    analysis.analyze(AnalysisType.ON_DEMAND)
+    analysis.analyze(AnalysisType.ON_DEMAND)
+    origin = reports(db)[0]
+    origin.created_at = datetime.utcnow() - timedelta(hours=25)
+    db.commit()
+
+    # The fresh copy made by the cache hit must not keep the report alive
+    analysis.analyze(AnalysisType.ON_DEMAND)
+    assert len(llm) == 2
+    assert reports(db)[-1].carried_from_id is None
+
+def test_input_hash_ignores_fetch_time():
+    data = {'symbol': 'AAPL', 'quote': {'price': 100.0, 'as_of': datetime(2026, 1, 5, 10)}}
+    later = {'symbol': 'AAPL', 'quote': {'price': 100.0, 'as_of': datetime(2026, 1, 5, 11)}}
+    assert analysis_input_hash(data, 'gpt-4') == analysis_input_hash(later, 'gpt-4')
+
+def test_small_spot_move_keeps_the_options_hash():
+    chain = pd.DataFrame([
+        {'option_type': side, 'expiration_date': '2026-04-01', 'strike': strike, 'impliedVolatility': 0.3,
+         'bid': max(0.0, 100 - strike if side == 'call' else strike - 100) + 1.0,
+         'ask': max(0.0, 100 - strike if side == 'call' else strike - 100) + 1.1}
+        for strike in [80 + 2.5 * i for i in range(17)] for side in ('call', 'put')
+    ])
+
+    def analysis_input(spot):
+        analyzed = analyze_chain(chain, spot, date(2026, 3, 2))
+        return {'symbol': 'AAPL', 'quote': {'price': spot}, 'options': {
+            'underlying_price': spot,
+            'calls': contract_records(select_by_delta(analyzed, 'call', 0.3)),
+            'puts': contract_records(select_by_delta(analyzed, 'put', -0.3)),
+        }}
+
+    before, after = analysis_input(100.0), analysis_input(100.2)
+    # Greeks and yields differ, the hashed input does not
+    assert before['options']['calls'][0]['delta'] != after['options']['calls'][0]['delta']
+    assert analysis_input_hash(before, 'gpt-4') == analysis_input_hash(after, 'gpt-4')
+
+def test_unparseable_response_is_not_reused(analysis, db, monkeypatch):
+    from types import SimpleNamespace
+    from app.services.openai_service import OpenAIService
+
+    calls = []
+
+    class UnparseableOpenAIService(OpenAIService):
+        def _setup_client(self):
+            pass
+
+        async def _create_completion(self, **kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Not JSON"))])
+
+    monkeypatch.setattr("app.services.analysis_service.OpenAIService", UnparseableOpenAIService)
+    analysis.analyze(AnalysisType.ON_DEMAND)
+    analysis.analyze(AnalysisType.ON_DEMAND)
+    analysis.analyze()
+
+    # Neither the LLM cache nor delta detection reuses the placeholder report
+    assert len(calls) == 3
+    assert all(report.input_hash is None and report.carried_from_id is None for report in reports(db))
@@ -0,0 +1,46 @@
+import pandas as pd
+from app.services import market_data
+from app.services.cache import InMemoryBackend, MarketDataCache
+
+class FakeTicker:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.info = {'longName': 'Apple Inc.', 'sector': 'Technology', 'sharesOutstanding': 1000,
+                     'trailingPE': 30.0, 'currentPrice': 999.0, 'marketCap': 999_000}
+
+    def history(self, period: str):
+        return pd.DataFrame({'Open': [99.0, 100.0], 'High': [101.0, 102.0], 'Low': [98.0, 99.0],
+                             'Close': [100.0, 101.0], 'Volume': [10, 20]})
+
+def test_live_fields_are_not_cached_with_fundamentals(monkeypatch):
+    monkeypatch.setattr(market_data.yf, "Ticker", FakeTicker)
+    service = market_data.MarketDataService(MarketDataCache(InMemoryBackend()))
+    stock = service._fetch_stock_data('AAPL')
+
+    fundamentals = service.cache.get('fundamentals', 'AAPL')
+    assert 'currentPrice' not in fundamentals and 'marketCap' not in fundamentals
+    assert fundamentals['trailingPE'] == 30.0
+    assert stock['price'] == 101.0
+    assert stock['market_cap'] == 101.0 * 1000
+
+def test_put_shares_the_best_call_expiration(run):
+    contracts = [
+        # (type, expiration, days, strike, delta)
+        ('call', '2026-04-01', 30, 105.0, 0.30),
+        ('put', '2026-04-01', 30, 90.0, -0.20),
+        ('put', '2026-04-16', 45, 95.0, -0.30),
+    ]
+    analyzed = pd.DataFrame([
+        {'option_type': side, 'expiration_date': expiry, 'days_to_expiry': days, 'strike': strike, 'delta': delta,
+         'bid': 1.0, 'ask': 1.1, 'impliedVolatility': 0.3, 'theta': -0.05, 'annualized_yield': 0.12}
+        for side, expiry, days, strike, delta in contracts
+    ])
+    service = market_data.MarketDataService(MarketDataCache(InMemoryBackend()))
+
+    async def analyzed_chain(symbol):
+        return 100.0, analyzed
+    service.get_analyzed_chain = analyzed_chain
+
+    options = run(service.get_options_data('AAPL'))
+    assert options['calls'][0]['expiration_date'] == options['expiration_date'] == '2026-04-01'
+    assert [put['strike'] for put in options['puts']] == [90.0]
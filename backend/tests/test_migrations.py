@@ -0,0 +1,46 @@
+import os
+from datetime import datetime
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import MetaData, text
+from app.database import engine
+from app.models import Base
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), os.pardir, "alembic.ini")
+
+def article(stock_id, url, **values):
+    return {'stock_id': stock_id, 'title': "Title", 'url': url, 'published_at': datetime(2026, 3, 2), **values}
+
+@pytest.fixture
+def migrations():
+    """Empty database migrated step by step; the test tables are restored afterwards"""
+    Base.metadata.drop_all(bind=engine)
+    config = Config(os.path.abspath(ALEMBIC_INI))
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "alembic"))
+    yield config
+    schema = MetaData()
+    schema.reflect(bind=engine)
+    schema.drop_all(bind=engine)
+
+def test_migration_dedups_news_on_the_constrained_key(migrations):
+    command.upgrade(migrations, "0001")
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO stocks (id, symbol, name) VALUES (1, 'AAPL', 'Apple Inc.')"))
+        connection.execute(text(
+            "INSERT INTO news_articles (stock_id, title, url, published_at) VALUES (:stock_id, :title, :url, :published_at)"
+        ), [article(1, "https://example.com/a"), article(1, " https://example.com/a\n"), article(1, "https://example.com/b")])
+
+    command.upgrade(migrations, "0002")
+    with engine.connect() as connection:
+        urls = connection.execute(text("SELECT url FROM news_articles ORDER BY id")).scalars().all()
+    assert urls == [" https://example.com/a\n", "https://example.com/b"]
+
+def test_migrations_build_the_schema_of_the_models(migrations):
+    # The API no longer creates tables on startup, so head must match the ORM
+    command.upgrade(migrations, "head")
+    with engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
@@ -0,0 +1,50 @@
+import asyncio
+from datetime import date
+
+import pandas as pd
+from app.database import AsyncSessionLocal
+from app.models import RunSymbolProgress, SymbolStatus
+from app.services import market_data, ohlcv_store
+from app.services.analysis_service import AnalysisService
+from app.services.cache import InMemoryBackend, MarketDataCache
+from app.services.provider_executor import provider_executor
+
+def test_bar_downloads_do_not_queue_on_the_provider_pool(monkeypatch, tmp_path, run):
+    monkeypatch.setattr(market_data.yf, "download", lambda symbols, **kwargs: pd.DataFrame())
+    service = market_data.MarketDataService(MarketDataCache(InMemoryBackend()))
+    provider_calls = provider_executor.stats()['submitted']
+    ingest_calls = ohlcv_store.ingest_executor.stats()['submitted']
+
+    run(ohlcv_store.ingest(["AAPL", "MSFT"], service, ohlcv_store.OHLCVStore(str(tmp_path)), today=date(2026, 3, 2)))
+    assert provider_executor.stats()['submitted'] == provider_calls
+    assert ohlcv_store.ingest_executor.stats()['submitted'] == ingest_calls + 1
+
+def test_failed_run_cancels_the_bar_ingestion(analysis, db, monkeypatch, run):
+    db.add(RunSymbolProgress(daily_run_id=analysis.run_id, stock_id=analysis.stock_id, symbol="AAPL", rank=1,
+                             status=SymbolStatus.PENDING, attempts=0))
+    db.commit()
+    ingesting = asyncio.Event()
+    cancelled = []
+
+    async def ingest_bars(self, symbols):
+        ingesting.set()
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.append(symbols)
+            raise
+
+    async def analyze(self, *args, **kwargs):
+        await ingesting.wait()
+        raise RuntimeError("analysis crashed")
+
+    monkeypatch.setattr(AnalysisService, "_ingest_bars", ingest_bars)
+    monkeypatch.setattr(AnalysisService, "_analyze_symbol_isolated", analyze)
+
+    async def daily_run():
+        async with AsyncSessionLocal() as session:
+            await analysis.service(session).run_daily_analysis(analysis.run_id)
+        await asyncio.sleep(0)
+        return list(cancelled)
+
+    assert run(daily_run()) == [["AAPL"]]
@@ -0,0 +1,34 @@
+from app.models import UserSecrets
+from app.services.openai_service import OpenAIClientRegistry
+from app.utils.encryption import encrypt_key
+
+def test_invalidate_closes_clients(db, run):
+    db.add(UserSecrets(openai_api_key_encrypted=encrypt_key("sk-old")))
+    db.commit()
+    registry = OpenAIClientRegistry()
+
+    async def rotate():
+        client = registry.get_client(db)
+        await registry.invalidate()
+        return client
+
+    client = run(rotate())
+    assert client.is_closed()
+
+def test_client_of_a_replaced_key_is_closed(db, run, monkeypatch):
+    monkeypatch.setattr("app.services.openai_service.OPENAI_SECRET_TTL", 0)
+    secrets = UserSecrets(openai_api_key_encrypted=encrypt_key("sk-old"))
+    db.add(secrets)
+    db.commit()
+    registry = OpenAIClientRegistry()
+
+    async def rotate():
+        old = registry.get_client(db)
+        secrets.openai_api_key_encrypted = encrypt_key("sk-new")
+        db.commit()
+        new = registry.get_client(db)
+        await registry.invalidate()
+        return old, new
+
+    old, new = run(rotate())
+    assert old is not new and old.is_closed()
@@ -0,0 +1,64 @@
+import asyncio
+import time
+import fakeredis
+from app.jobs import worker_metrics
+from app.services.rate_limiter import LLMRateLimiter, RedisTokenBucket
+
+def test_workers_share_one_quota_through_redis():
+    client = fakeredis.FakeStrictRedis()
+    workers = [LLMRateLimiter(rpm=10, tpm=100_000, client=client) for _ in range(2)]
+    delays = [workers[i % 2].requests.reserve(1) for i in range(20)]
+    # The first 10 requests of the fleet are free, the rest wait for the refill
+    assert delays[:10] == [0.0] * 10
+    assert all(delay > 0 for delay in delays[10:])
+    assert delays[-1] > delays[10]
+
+def test_memory_limiters_pace_each_process_alone():
+    workers = [LLMRateLimiter(rpm=10, tpm=100_000) for _ in range(2)]
+    assert [workers[i % 2].requests.reserve(1) for i in range(20)] == [0.0] * 20
+
+def test_refund_returns_tokens_to_the_shared_bucket():
+    bucket = RedisTokenBucket(fakeredis.FakeStrictRedis(), "test:tokens", 1000)
+    assert bucket.reserve(1000) == 0.0
+    bucket.refund(600)
+    assert bucket.reserve(500) == 0.0
+
+def test_unreachable_redis_falls_back_to_local_pacing():
+    class DownRedis:
+        def transaction(self, *args, **kwargs):
+            raise ConnectionError("redis down")
+
+    bucket = RedisTokenBucket(DownRedis(), "test:tokens", 2)
+    assert [bucket.reserve(1) for _ in range(3)][:2] == [0.0, 0.0]
+    assert bucket.errors == 3
+
+def test_worker_metrics_are_published_and_expire():
+    client = fakeredis.FakeStrictRedis()
+    assert worker_metrics.publish("host:1", client)
+    assert worker_metrics.publish("host:2", client)
+    collected = worker_metrics.collect(client)
+    assert sorted(collected) == ["host:1", "host:2"]
+    assert {'providers', 'cache', 'llm', 'db'} <= set(collected["host:1"])
+    assert client.ttl(worker_metrics.KEY_PREFIX + "host:1") > 0
+
+    worker_metrics.clear("host:1", client)
+    assert list(worker_metrics.collect(client)) == ["host:2"]
+
+def test_shared_buckets_do_not_block_the_event_loop(run):
+    class SlowRedis(fakeredis.FakeStrictRedis):
+        def transaction(self, *args, **kwargs):
+            time.sleep(0.2)
+            return super().transaction(*args, **kwargs)
+
+    limiter = LLMRateLimiter(rpm=10, tpm=100_000, client=SlowRedis())
+
+    async def measure():
+        acquiring = asyncio.create_task(limiter.acquire(100))
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        responsive_after = time.perf_counter() - start
+        await acquiring
+        await limiter.reconcile(100, 50)
+        return responsive_after
+
+    assert run(measure()) < 0.1
@@ -0,0 +1,28 @@
+from app.database import AsyncSessionLocal
+from app.models import AnalysisReport, DailyRun, DailyRunStatus, RunSymbolProgress, Stock, SymbolStatus
+
+def test_resumed_run_only_analyzes_unfinished_symbols(analysis, llm, db, run):
+    stocks = {symbol: Stock(symbol=symbol, name=symbol) for symbol in ("MSFT", "NVDA")}
+    db.add_all(stocks.values())
+    db.commit()
+    statuses = {"AAPL": SymbolStatus.DONE, "MSFT": SymbolStatus.FAILED, "NVDA": SymbolStatus.PENDING}
+    stock_ids = {"AAPL": analysis.stock_id, **{symbol: stock.id for symbol, stock in stocks.items()}}
+    db.add_all([RunSymbolProgress(daily_run_id=analysis.run_id, stock_id=stock_ids[symbol], symbol=symbol,
+                                  rank=rank, status=status, attempts=1)
+                for rank, (symbol, status) in enumerate(statuses.items(), 1)])
+    db.commit()
+
+    async def resume():
+        async with AsyncSessionLocal() as session:
+            await analysis.service(session).run_daily_analysis(analysis.run_id)
+
+    run(resume())
+    db.expire_all()
+    assert sorted(prompt['symbol'] for prompt in llm) == ["MSFT", "NVDA"]
+    progress = {row.symbol: row for row in db.query(RunSymbolProgress)}
+    assert all(row.status == SymbolStatus.DONE for row in progress.values())
+    assert progress["AAPL"].attempts == 1 and progress["MSFT"].attempts == 2
+    daily_run = db.get(DailyRun, analysis.run_id)
+    assert daily_run.status == DailyRunStatus.COMPLETED
+    assert "resumed with 2 remaining" in daily_run.notes
+    assert db.query(AnalysisReport).count() == 2
@@ -0,0 +1,29 @@
+from datetime import date, datetime, timezone
+from fastapi.testclient import TestClient
+from app.database import AsyncSessionLocal
+from app.jobs import scheduler
+from app.main import app
+from app.models import DailyRun
+
+# 02:30 UTC is still the previous evening in the default America/New_York zone
+NOW = datetime(2026, 3, 10, 2, 30, tzinfo=timezone.utc)
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW.astimezone(tz)
+
+def test_manual_and_scheduled_runs_share_the_local_run_date(db, run, monkeypatch):
+    monkeypatch.setattr(scheduler, "datetime", FrozenDatetime)
+
+    response = TestClient(app).post("/api/runs/run_daily")
+    assert response.status_code == 200
+    assert response.json()['run_date'] == "2026-03-09"
+
+    async def schedule():
+        async with AsyncSessionLocal() as session:
+            return await scheduler.schedule_due_run(session, NOW)
+
+    # The scheduler sees the manual run as today's and does not start another
+    assert run(schedule()) is None
+    assert [r.run_date for r in db.query(DailyRun)] == [date(2026, 3, 9)]
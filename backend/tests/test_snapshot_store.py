@@ -0,0 +1,46 @@
+import os
+from datetime import date, datetime
+
+import pandas as pd
+import pyarrow as pa
+from app.services import snapshot_store
+from app.services.snapshot_store import _schema, _write_atomic, price_history, read_snapshots
+
+def write(root, name, rows):
+    month = rows[0]['run_date'].strftime('%Y-%m')
+    _write_atomic(pa.Table.from_pylist(rows, schema=_schema()), os.path.join(root, f"month={month}", name))
+
+def row(run_id, symbol, run_date, hour, price):
+    return {'run_date': run_date, 'symbol': symbol, 'daily_run_id': run_id, 'as_of': datetime(2026, 1, 1, hour),
+            'price': price}
+
+def test_history_reads_keep_the_newest_copy_of_each_row(tmp_path):
+    root = str(tmp_path)
+    day, later = date(2026, 2, 2), date(2026, 2, 3)
+    # Run 1 was compacted and then resumed: its run file is newer than the month file
+    write(root, "month-2026-02.parquet", [row(1, "AAPL", day, 9, 100.0), row(1, "MSFT", day, 9, 200.0)])
+    write(root, "run-1.parquet", [row(1, "AAPL", day, 9, 101.0), row(1, "MSFT", day, 9, 201.0)])
+    # A second run on the same day: its later snapshot wins in price_history
+    write(root, "run-2.parquet", [row(2, "AAPL", day, 15, 102.0)])
+    write(root, "run-3.parquet", [row(3, "AAPL", later, 9, 103.0)])
+    write(root, "run-4.parquet", [row(4, "AAPL", date(2026, 3, 2), 9, 104.0)])
+
+    frame = read_snapshots(["AAPL"], day, later, ['price'], root)
+    assert list(zip(frame['daily_run_id'], frame['price'])) == [(1, 101.0), (2, 102.0), (3, 103.0)]
+
+    prices = price_history(None, day, later, root=root)
+    assert list(prices.columns) == ["AAPL", "MSFT"]
+    assert prices.loc[pd.Timestamp(day)].tolist() == [102.0, 201.0]
+    assert prices.loc[pd.Timestamp(later)].isna().tolist() == [False, True]
+    assert prices.loc[pd.Timestamp(later), "AAPL"] == 103.0
+
+def test_history_reads_open_only_the_months_in_range(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    write(root, "run-1.parquet", [row(1, "AAPL", date(2026, 1, 5), 9, 100.0)])
+    write(root, "run-2.parquet", [row(2, "AAPL", date(2026, 2, 5), 9, 101.0)])
+    opened = []
+    data_files = snapshot_store._data_files
+    monkeypatch.setattr(snapshot_store, "_data_files", lambda month_dir: opened.append(month_dir) or data_files(month_dir))
+
+    assert price_history(["AAPL"], date(2026, 2, 1), root=root)["AAPL"].tolist() == [101.0]
+    assert [os.path.basename(path) for path in opened] == ["month=2026-02"]
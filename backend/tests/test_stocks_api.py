@@ -0,0 +1,45 @@
+import pandas as pd
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models import Stock
+
+def test_stock_pages_expose_the_cursor_to_browsers(db):
+    db.add_all([Stock(symbol=f"S{i}", name=f"Stock {i}", is_tracked=True) for i in range(3)])
+    db.commit()
+    client = TestClient(app)
+    origin = {"Origin": "http://localhost:3000"}
+
+    first = client.get("/api/stocks/", params={"limit": 2}, headers=origin)
+    assert [stock['symbol'] for stock in first.json()] == ["S0", "S1"]
+    assert "x-next-cursor" in first.headers["access-control-expose-headers"].lower()
+
+    second = client.get("/api/stocks/", params={"limit": 2, "after": first.headers["x-next-cursor"]}, headers=origin)
+    assert [stock['symbol'] for stock in second.json()] == ["S2"]
+    assert "x-next-cursor" not in second.headers
+
+def test_option_chain_with_missing_quotes_is_served(monkeypatch):
+    from app.services.market_data import MarketDataService
+
+    chain = pd.DataFrame({'option_type': ['call', 'put'], 'expiration_date': ['2026-12-18'] * 2,
+                          'strike': [105.0, 95.0], 'bid': [1.2, 1.1], 'ask': [float('nan'), 1.3],
+                          'impliedVolatility': [0.3, 0.3]})
+
+    async def option_chain(self, symbol, min_dte, max_dte):
+        return chain
+
+    async def stock_data(self, symbol):
+        return {'symbol': symbol, 'price': 100.0}
+
+    monkeypatch.setattr(MarketDataService, "get_option_chain", option_chain)
+    monkeypatch.setattr(MarketDataService, "get_stock_data", stock_data)
+    response = TestClient(app).get("/api/stocks/AAPL/options", params={"min_dte": 0, "max_dte": 3650})
+    assert response.status_code == 200
+    assert response.json()['calls'][0]['ask'] is None
+    assert response.json()['puts'][0]['ask'] == 1.3
+
+    async def no_quote(self, symbol):
+        return None
+
+    monkeypatch.setattr(MarketDataService, "get_stock_data", no_quote)
+    # Without a spot price there are no Greeks to serve
+    assert TestClient(app).get("/api/stocks/AAPL/options").status_code == 404